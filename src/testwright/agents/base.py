@@ -1,9 +1,44 @@
+import asyncio
+import copy
 import json
+import threading
+import time
 import httpx # type: ignore
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, TypeVar
 from datetime import datetime
 
+from testwright.llm.batch import BatchRunner
+from testwright.llm.batching import TokenBatcher, get_batcher
+from testwright.llm.cache import ResponseCache, cache_key
+from testwright.llm.continuation import OutputBudget, continuation_prompt, merge_continuation
+from testwright.llm.debuglog import DebugLogger
+from testwright.llm.hedging import HedgePolicy, Route
+from testwright.llm.metrics import CallMetrics, CallRecord, usage_counts
+from testwright.llm.pool import HTTPPool
+from testwright.llm.ratelimit import RateLimiter, estimate_tokens
+from testwright.llm.repair import repair_json
+from testwright.llm.retry import BreakerRegistry, CircuitOpenError, LLMAPIError, RetryPolicy
+from testwright.llm.singleflight import FlightAbandoned, SingleFlight
+from testwright.llm.slots import CallSlots, release_on_close
+from testwright.llm.streaming import (
+    JSONArrayStreamParser,
+    aiter_sse_events,
+    event_delta,
+    event_finish_reason,
+    iter_sse_events,
+)
+from testwright.llm.structured import (
+    StructuredOutputStats,
+    is_unsupported_error,
+    json_schema_format,
+)
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
 
 class BaseAgent(ABC):
     """Base class for all agents with OpenAI/OpenRouter integration and debug logging"""
@@ -12,6 +47,60 @@ class BaseAgent(ABC):
     _debug_initialized = False
     _logged_system_prompts = set()
 
+    # Process-wide HTTP pool shared by every agent instance
+    _pool: Optional[HTTPPool] = None
+    _pool_lock = threading.Lock()
+
+    # Optional persistent response cache shared by every agent instance
+    _cache: Optional[ResponseCache] = None
+
+    # Retry/backoff policy and per-provider circuit breakers
+    _retry_policy: RetryPolicy = RetryPolicy()
+    _breakers: BreakerRegistry = BreakerRegistry(stats=_retry_policy.stats)
+
+    # Optional client-side RPM/TPM pacing shared by every agent instance
+    _rate_limiter: Optional[RateLimiter] = None
+
+    # Native json_schema response_format for agents that declare output_schema
+    _structured_output = True
+    _structured_stats: StructuredOutputStats = StructuredOutputStats()
+
+    # Optional per-call token/latency/cost accounting
+    _metrics: Optional[CallMetrics] = None
+
+    # Identical concurrent requests share one network call
+    _single_flight: SingleFlight = SingleFlight()
+
+    # Optional hedging / failover to secondary routes
+    _hedge_policy: Optional[HedgePolicy] = None
+
+    # Optional provider batch-API mode for latency-insensitive runs
+    _batch_runner: Optional[BatchRunner] = None
+
+    # Background JSONL writer for --debug; None falls back to the text file
+    _debug_logger: Optional[DebugLogger] = None
+
+    # Most LLM calls one agent keeps in flight when it fans out over items
+    _concurrency: int = 8
+
+    # Process-wide cap on requests in flight across every agent and run
+    # (set while generate_many runs several specs at once)
+    _call_slots: Optional[CallSlots] = None
+
+    # Truncated JSON responses are continued along this top-level array
+    continuation_key: Optional[str] = None
+    max_continuations: int = 2
+
+    # Cap call_llm_json's max_tokens at the completion sizes this agent has
+    # shown.  Only agents that can continue a truncated answer are capped;
+    # agents that size max_tokens per batch opt out
+    learn_max_tokens: bool = True
+    _output_budget: Optional[OutputBudget] = None
+
+    # Completion tokens each item of a batched prompt costs (see _plan_batches)
+    output_tokens_per_item: int = 0
+    output_tokens_overhead: int = 50
+
     def __init__(
         self,
         api_key: str,
@@ -19,24 +108,139 @@ class BaseAgent(ABC):
         provider: str = "openai",
         debug: bool = False,
         debug_file: str = "debug_log.txt",
+        stream: bool = False,
+        run_id: Optional[str] = None,
     ):
         self.api_key = api_key
         self.model = model
         self.provider = provider.lower()
         self.debug = debug
         self.debug_file = debug_file
+        self.stream = stream  # Opt-in SSE streaming for agents that support it
+        self.run_id = run_id  # Tags this agent's call records with its pipeline run
 
         # Set base URL based on provider
-        if self.provider == "openai":
-            self.base_url = "https://api.openai.com/v1"
-        elif self.provider == "github":
-            self.base_url = "https://models.inference.ai.azure.com"
-        else:  # openrouter
-            self.base_url = "https://openrouter.ai/api/v1"
+        self.base_url = self._base_url_for(self.provider)
 
-        self.client = httpx.Client(timeout=120.0)
         self._system_prompt_logged = False  # Track if this agent's system prompt was logged
 
+        # Ids of items this agent answered with a fallback after an LLM
+        # failure; their results must not be reused by later runs
+        self.degraded: Set[Any] = set()
+
+    @classmethod
+    def configure_pool(cls, pool: Optional[HTTPPool]):
+        """Install the HTTP pool shared by all agents (None resets to default)"""
+        with cls._pool_lock:
+            cls._pool = pool
+
+    @classmethod
+    def get_pool(cls) -> HTTPPool:
+        """Return the shared HTTP pool, creating a default one if needed"""
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = HTTPPool()
+            return cls._pool
+
+    @classmethod
+    def configure_cache(cls, cache: Optional[ResponseCache]):
+        """Install the response cache shared by all agents (None disables it)"""
+        cls._cache = cache
+
+    @classmethod
+    def configure_retry(
+        cls,
+        policy: RetryPolicy,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+    ):
+        """Install the retry policy and reset the per-provider circuit breakers"""
+        cls._retry_policy = policy
+        cls._breakers = BreakerRegistry(
+            failure_threshold=failure_threshold,
+            recovery_timeout=recovery_timeout,
+            stats=policy.stats,
+        )
+
+    @classmethod
+    def configure_rate_limit(cls, limiter: Optional[RateLimiter]):
+        """Install the rate limiter shared by all agents (None disables it)"""
+        cls._rate_limiter = limiter
+
+    @classmethod
+    def configure_structured_output(cls, stats: StructuredOutputStats, enabled: bool = True):
+        """Install structured-output counters and toggle json_schema mode"""
+        cls._structured_stats = stats
+        cls._structured_output = enabled
+
+    @classmethod
+    def configure_metrics(cls, metrics: Optional[CallMetrics]):
+        """Install the per-call metrics collector (None disables recording)"""
+        cls._metrics = metrics
+
+    @classmethod
+    def configure_hedging(cls, policy: Optional[HedgePolicy]):
+        """Install the hedging/failover policy shared by all agents (None disables it)"""
+        cls._hedge_policy = policy
+
+    @classmethod
+    def configure_debug_log(cls, logger: Optional[DebugLogger]):
+        """Route _log_debug through a background DebugLogger (None restores the text file)"""
+        cls._debug_logger = logger
+
+    @classmethod
+    def configure_concurrency(cls, limit: int):
+        """Set how many items an agent processes at once (1 runs them serially)"""
+        cls._concurrency = max(1, limit)
+
+    @classmethod
+    def configure_call_slots(cls, limit: Optional[int]):
+        """Cap LLM requests in flight across all agents (None removes the cap)"""
+        cls._call_slots = CallSlots(limit) if limit else None
+
+    @classmethod
+    def configure_output_budget(cls, budget: Optional[OutputBudget]):
+        """Install the learned per-agent max_tokens (None keeps the requested values)"""
+        cls._output_budget = budget
+
+    @classmethod
+    def configure_batch(cls, runner: Optional[BatchRunner]):
+        """Install the batch-API runner used by prefetch_batch (None disables it)"""
+        cls._batch_runner = runner
+
+    @staticmethod
+    def _base_url_for(provider: str) -> str:
+        """Chat completions base URL of a provider"""
+        if provider == "openai":
+            return "https://api.openai.com/v1"
+        elif provider == "github":
+            return "https://models.inference.ai.azure.com"
+        elif provider == "replay":
+            # Served offline by ReplayTransport; never leaves the process
+            return "http://replay.invalid/v1"
+        else:  # openrouter
+            return "https://openrouter.ai/api/v1"
+
+    def _route_agent(self, route: Route) -> "BaseAgent":
+        """Shallow copy of this agent that talks to ``route`` instead"""
+        agent = copy.copy(self)
+        if route.provider:
+            agent.provider = route.provider.lower()
+            agent.base_url = self._base_url_for(agent.provider)
+        agent.model = route.model or self.model
+        agent.api_key = route.api_key or self.api_key
+        return agent
+
+    @classmethod
+    def configure_single_flight(cls, single_flight: SingleFlight):
+        """Install the registry used to coalesce identical in-flight requests"""
+        cls._single_flight = single_flight
+
+    @property
+    def client(self) -> httpx.Client:
+        """Shared sync client for this agent's provider"""
+        return self.get_pool().client(self.provider)
+
     @classmethod
     def reset_debug_state(cls):
         """Reset debug state for a new session. Call this before initializing agents."""
@@ -49,17 +253,29 @@ class BaseAgent(ABC):
         if cls._debug_initialized:
             return
         cls._debug_initialized = True
+        if cls._debug_logger is not None:
+            cls._debug_logger.log("session", "DEBUG SESSION STARTED", f"Model: {model}", model=model)
+            return
         with open(debug_file, 'w', encoding='utf-8') as f:
             f.write(f"{'='*80}\n")
             f.write(f"DEBUG SESSION STARTED: {datetime.now().isoformat()}\n")
             f.write(f"Model: {model}\n")
             f.write(f"{'='*80}\n\n")
 
-    def _log_debug(self, label: str, content: str):
-        """Log debug information to file"""
+    def _log_debug(self, label: str, content: str, record: Optional[CallRecord] = None):
+        """Log debug information, tagged with the call it belongs to if known"""
         if not self.debug:
             return
 
+        logger = self._debug_logger
+        if logger is not None:
+            logger.log(
+                self.name, label, content,
+                call_id=record.call_id if record is not None else None,
+                duration=time.time() - record.timestamp if record is not None else None,
+            )
+            return
+
         with open(self.debug_file, 'a', encoding='utf-8') as f:
             f.write(f"\n{'-'*60}\n")
             f.write(f"[{datetime.now().strftime('%H:%M:%S')}] {self.name} - {label}\n")
@@ -79,24 +295,39 @@ class BaseAgent(ABC):
         """Return the system prompt for this agent"""
         pass
 
-    def call_llm(
+    @property
+    def batcher(self) -> TokenBatcher:
+        """Token-budget batcher for this agent's model"""
+        return get_batcher(self.model)
+
+    def _plan_batches(
         self,
-        user_prompt: str,
-        temperature: float = 0.7,
-        max_tokens: int = 4096,
-        response_format: Optional[Dict] = None
-    ) -> str:
-        """Call OpenAI or OpenRouter API with the given prompt"""
+        items: Sequence[Any],
+        render: Callable[[Any], str],
+        fixed_prompt: str
+    ) -> List[List[Any]]:
+        """Pack items into the fewest prompts that fit the model's token limits"""
+        return self.batcher.plan(
+            items,
+            render,
+            f"{self.system_prompt}\n{fixed_prompt}",
+            self.output_tokens_per_item,
+            self.output_tokens_overhead,
+        )
 
-        # Log input if debug enabled
-        if self.debug:
-            # Only log system prompt once per agent to avoid redundancy
-            if not self._system_prompt_logged:
-                self._log_debug("SYSTEM PROMPT", self.system_prompt)
-                self._system_prompt_logged = True
-            self._log_debug("USER PROMPT", user_prompt)
+    def _batch_max_tokens(self, n_items: int) -> int:
+        """max_tokens for a batch of ``n_items``, from the agent's per-item cost"""
+        return self.batcher.max_tokens_for(
+            n_items, self.output_tokens_per_item, self.output_tokens_overhead
+        )
+
+    @property
+    def output_schema(self) -> Optional[Dict[str, Any]]:
+        """JSON schema of this agent's call_llm_json response, if it has a fixed shape"""
+        return None
 
-        # Build headers based on provider
+    def _build_headers(self) -> Dict[str, str]:
+        """Build request headers for the configured provider"""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -107,6 +338,16 @@ class BaseAgent(ABC):
             headers["HTTP-Referer"] = "https://testwright.dev"
             headers["X-Title"] = "TestWright"
 
+        return headers
+
+    def _build_payload(
+        self,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict]
+    ) -> Dict[str, Any]:
+        """Build the chat completions request body"""
         payload = {
             "model": self.model,
             "messages": [
@@ -120,78 +361,1286 @@ class BaseAgent(ABC):
         if response_format:
             payload["response_format"] = response_format
 
-        response = self.client.post(
-            f"{self.base_url}/chat/completions",
-            headers=headers,
-            json=payload
-        )
+        return payload
 
+    def _log_request(self, user_prompt: str, record: Optional[CallRecord] = None):
+        """Log the outgoing prompt if debug enabled"""
+        if not self.debug:
+            return
+        # Only log system prompt once per agent to avoid redundancy
+        if not self._system_prompt_logged:
+            self._log_debug("SYSTEM PROMPT", self.system_prompt)
+            self._system_prompt_logged = True
+        self._log_debug("USER PROMPT", user_prompt, record)
+
+    def _handle_response(
+        self,
+        response: httpx.Response,
+        record: Optional[CallRecord] = None
+    ) -> Tuple[str, Optional[str]]:
+        """Validate an API response and extract the message content and finish_reason"""
+        if record is not None:
+            record.http_status = response.status_code
         if response.status_code != 200:
             provider_name = self.provider.upper()
             error_msg = f"{provider_name} API error: {response.status_code} - {response.text}"
             if self.debug:
-                self._log_debug("ERROR", error_msg)
-            raise Exception(error_msg)
+                self._log_debug("ERROR", error_msg, record)
+            raise LLMAPIError(error_msg, response.status_code, response.text)
 
         result = response.json()
-        response_content = result["choices"][0]["message"]["content"]
+        choice = result["choices"][0]
+        response_content = choice["message"]["content"]
+        finish_reason = choice.get("finish_reason")
+        if record is not None:
+            record.finish_reason = finish_reason
+            record.prompt_tokens, record.completion_tokens, record.cached_tokens = \
+                usage_counts(result.get("usage"))
 
         # Log output if debug enabled
         if self.debug:
-            self._log_debug("LLM RESPONSE", response_content)
+            self._log_debug("LLM RESPONSE", response_content, record)
+            if finish_reason == "length":
+                self._log_debug("TRUNCATED", "Response hit max_tokens (finish_reason=length)", record)
+
+        return response_content, finish_reason
+
+    def _post(
+        self,
+        payload: Dict[str, Any],
+        stream: bool = False,
+        record: Optional[CallRecord] = None
+    ) -> httpx.Response:
+        """POST to the provider with pacing, retries, backoff and the circuit breaker
+
+        With ``stream=True`` the body is left unread on success so the caller
+        can iterate it, and must close the response, which also frees its
+        call slot.  Retries are counted on ``record`` when one is given.
+        Each attempt's token reservation is refunded if it fails and
+        corrected to the reported usage if it succeeds; streamed bodies are
+        reconciled by the caller once read.
+        """
+        breaker = self._breakers.get(self.provider)
+        limiter = self._rate_limiter
+        estimated = self._estimate_request_tokens(payload)
+        attempt = 0
+        while True:
+            if limiter:
+                limiter.acquire(self.provider, self.model, estimated)
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                self._reconcile_tokens(estimated, 0)
+                raise
+            try:
+                request = self.client.build_request(
+                    "POST",
+                    f"{self.base_url}/chat/completions",
+                    headers=self._build_headers(),
+                    json=payload
+                )
+                response = self._send_in_slot(request, stream)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                self._reconcile_tokens(estimated, 0)
+                delay = self._retry_delay(attempt, type(e).__name__)
+                if delay is None:
+                    raise
+            except BaseException:
+                # Cancelled or interrupted: no verdict on the provider, but a
+                # half-open probe must not stay claimed
+                breaker.release_probe()
+                self._reconcile_tokens(estimated, 0)
+                raise
+            else:
+                if not self._retry_policy.is_retryable(response.status_code):
+                    breaker.record_success()
+                    if stream and response.status_code != 200:
+                        response.read()
+                    if not stream or response.status_code != 200:
+                        self._reconcile_usage(response, estimated)
+                    return response
+                breaker.record_failure()
+                self._reconcile_tokens(estimated, 0)
+                if stream:
+                    response.read()
+                    response.close()
+                delay = self._retry_delay(attempt, f"HTTP {response.status_code}", response)
+                if delay is None:
+                    return response
+            time.sleep(delay)
+            attempt += 1
+            if record is not None:
+                record.retries = attempt
+
+    async def _apost(
+        self,
+        payload: Dict[str, Any],
+        stream: bool = False,
+        record: Optional[CallRecord] = None
+    ) -> httpx.Response:
+        """Awaitable variant of _post"""
+        breaker = self._breakers.get(self.provider)
+        limiter = self._rate_limiter
+        estimated = self._estimate_request_tokens(payload)
+        attempt = 0
+        while True:
+            if limiter:
+                await limiter.aacquire(self.provider, self.model, estimated)
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                self._reconcile_tokens(estimated, 0)
+                raise
+            try:
+                client = self.get_pool().async_client(self.provider)
+                request = client.build_request(
+                    "POST",
+                    f"{self.base_url}/chat/completions",
+                    headers=self._build_headers(),
+                    json=payload
+                )
+                response = await self._asend_in_slot(client, request, stream)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                self._reconcile_tokens(estimated, 0)
+                delay = self._retry_delay(attempt, type(e).__name__)
+                if delay is None:
+                    raise
+            except BaseException:
+                # Cancelled or interrupted: no verdict on the provider, but a
+                # half-open probe must not stay claimed
+                breaker.release_probe()
+                self._reconcile_tokens(estimated, 0)
+                raise
+            else:
+                if not self._retry_policy.is_retryable(response.status_code):
+                    breaker.record_success()
+                    if stream and response.status_code != 200:
+                        await response.aread()
+                    if not stream or response.status_code != 200:
+                        self._reconcile_usage(response, estimated)
+                    return response
+                breaker.record_failure()
+                self._reconcile_tokens(estimated, 0)
+                if stream:
+                    await response.aread()
+                    await response.aclose()
+                delay = self._retry_delay(attempt, f"HTTP {response.status_code}", response)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+            if record is not None:
+                record.retries = attempt
+
+    def _send_in_slot(self, request: httpx.Request, stream: bool) -> httpx.Response:
+        """Send while holding one of _call_slots, until the response body is closed"""
+        slots = self._call_slots
+        if slots is None:
+            return self.client.send(request, stream=stream)
+        slots.acquire()
+        try:
+            response = self.client.send(request, stream=stream)
+        except BaseException:
+            slots.release()
+            raise
+        release_on_close(response, slots.release)
+        return response
+
+    async def _asend_in_slot(
+        self,
+        client: httpx.AsyncClient,
+        request: httpx.Request,
+        stream: bool
+    ) -> httpx.Response:
+        """Awaitable variant of _send_in_slot"""
+        slots = self._call_slots
+        if slots is None:
+            return await client.send(request, stream=stream)
+        await slots.aacquire()
+        try:
+            response = await client.send(request, stream=stream)
+        except BaseException:
+            slots.release()
+            raise
+        release_on_close(response, slots.release)
+        return response
+
+    @staticmethod
+    def _estimate_request_tokens(payload: Dict[str, Any]) -> int:
+        """Estimate prompt plus worst-case completion tokens for a request"""
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in payload["messages"])
+        return prompt_tokens + payload.get("max_tokens", 0)
+
+    def _reconcile_usage(self, response: httpx.Response, estimated: int):
+        """Return unused token reservation to the rate limiter"""
+        if self._rate_limiter is None:
+            return
+        if response.status_code != 200:
+            # Rejected requests are not charged
+            self._reconcile_tokens(estimated, 0)
+            return
+        try:
+            usage = response.json().get("usage") or {}
+        except ValueError:
+            return
+        actual = usage.get("total_tokens")
+        if actual is None and "prompt_tokens" in usage:
+            actual = usage["prompt_tokens"] + usage.get("completion_tokens", 0)
+        self._reconcile_tokens(estimated, actual)
+
+    def _reconcile_stream(self, payload: Dict[str, Any], record: CallRecord, parts: List[str]):
+        """Correct a streamed call's reservation once its body has been read"""
+        if self._rate_limiter is None:
+            return
+        actual = record.prompt_tokens + record.completion_tokens
+        if not actual:
+            # No usage chunk (stream cut short): estimate what was sent and received
+            actual = self._estimate_request_tokens(dict(payload, max_tokens=0)) + estimate_tokens("".join(parts))
+        self._reconcile_tokens(self._estimate_request_tokens(payload), actual)
+
+    def _reconcile_tokens(self, estimated: int, actual: Optional[int]):
+        """Correct one attempt's token reservation to what it actually used"""
+        limiter = self._rate_limiter
+        if limiter is not None and actual is not None:
+            limiter.reconcile(self.provider, self.model, estimated, actual)
+
+    def _retry_delay(
+        self,
+        attempt: int,
+        reason: str,
+        response: Optional[httpx.Response] = None
+    ) -> Optional[float]:
+        """Return the backoff before the next attempt, or None to give up"""
+        policy = self._retry_policy
+        if attempt >= policy.max_retries:
+            policy.stats.record_give_up()
+            return None
+
+        retry_after = policy.retry_after(response) if response is not None else None
+        delay = policy.backoff(attempt, retry_after)
+        policy.stats.record_retry(delay)
+
+        msg = (f"{self.provider.upper()} request failed ({reason}); retrying in {delay:.1f}s "
+               f"(attempt {attempt + 2}/{policy.max_retries + 1})")
+        print(f"  Warning: {self.name}: {msg}")
+        if self.debug:
+            self._log_debug("RETRY", msg)
+        return delay
+
+    def _fetch(self, payload: Dict[str, Any], record: CallRecord) -> Tuple[str, Optional[str]]:
+        """Send a completion request, hedged across routes if a policy is set"""
+        policy = self._hedge_policy
+        if policy is None or not policy.routes:
+            return self._fetch_direct(payload, record)
+        return self._fetch_hedged(policy, payload, record)
+
+    async def _afetch(self, payload: Dict[str, Any], record: CallRecord) -> Tuple[str, Optional[str]]:
+        """Awaitable variant of _fetch"""
+        policy = self._hedge_policy
+        if policy is None or not policy.routes:
+            return await self._afetch_direct(payload, record)
+        return await self._afetch_hedged(policy, payload, record)
+
+    def _fetch_direct(self, payload: Dict[str, Any], record: CallRecord) -> Tuple[str, Optional[str]]:
+        return self._handle_response(self._post(payload, record=record), record)
 
-        return response_content
+    async def _afetch_direct(self, payload: Dict[str, Any], record: CallRecord) -> Tuple[str, Optional[str]]:
+        return self._handle_response(await self._apost(payload, record=record), record)
+
+    def _hedge_routes(self, policy: HedgePolicy) -> List["BaseAgent"]:
+        """This agent followed by one copy per secondary route"""
+        return [self] + [self._route_agent(route) for route in policy.routes]
+
+    def _hedge_note(self, policy: HedgePolicy, agent: "BaseAgent", error: Optional[BaseException] = None):
+        """Count and report a hedge (no ``error``) or a failover to ``agent``"""
+        target = f"{agent.provider}/{agent.model}"
+        if error is None:
+            policy.stats.record("hedged")
+            msg = f"Slower than p{policy.percentile:g}; hedging to {target}"
+        else:
+            policy.stats.record("failovers")
+            msg = f"Failing over to {target} after: {error}"
+            print(f"  Warning: {self.name}: {msg}")
+        if self.debug:
+            self._log_debug("HEDGE", msg)
+
+    def _hedge_won(
+        self,
+        policy: HedgePolicy,
+        index: int,
+        hedged: bool,
+        winner: "BaseAgent",
+        attempt: CallRecord,
+        record: CallRecord,
+        elapsed: float
+    ):
+        """Copy the winning attempt into ``record`` and update the learned latencies"""
+        record.provider, record.model = winner.provider, winner.model
+        record.prompt_tokens = attempt.prompt_tokens
+        record.completion_tokens = attempt.completion_tokens
+        record.cached_tokens = attempt.cached_tokens
+        record.retries = attempt.retries
+        record.http_status = attempt.http_status
+        record.finish_reason = attempt.finish_reason
+        if index == 0:
+            policy.observe(self.name, elapsed)
+        elif hedged:
+            policy.stats.record("hedge_wins")
+
+    def _fetch_hedged(
+        self,
+        policy: HedgePolicy,
+        payload: Dict[str, Any],
+        record: CallRecord
+    ) -> Tuple[str, Optional[str]]:
+        """Race the request across routes: hedge when slow, fail over on errors
+
+        A synchronous request cannot be interrupted mid-read, so a losing
+        original is abandoned to the policy's worker threads.  When it
+        eventually completes its real latency is learned and the time the
+        hedge saved is measured rather than estimated.
+        """
+        agents = self._hedge_routes(policy)
+        threshold = policy.delay(self.name)
+        policy.stats.record("calls")
+        start = time.perf_counter()
+        pending: Dict[Future, Tuple[int, CallRecord]] = {}
+        hedged = set()
+        last_error: Optional[BaseException] = None
+
+        def launch(index: int) -> Future:
+            agent = agents[index]
+            attempt = agent._new_call_record()
+            attempt.call_id = record.call_id
+            future = policy.executor.submit(agent._fetch_direct, dict(payload, model=agent.model), attempt)
+            pending[future] = (index, attempt)
+            return future
+
+        def settle(won_at: float):
+            def done(future: Future):
+                if future.cancelled() or future.exception() is not None:
+                    policy.stats.record("saved_seconds", policy.estimate_saved(self.name, won_at))
+                    return
+                latency = time.perf_counter() - start
+                policy.observe(self.name, latency)
+                policy.stats.record("saved_seconds", latency - won_at)
+            return done
+
+        primary = launch(0)
+        launched = 1
+        while pending:
+            timeout = None
+            if launched < len(agents):
+                timeout = max(threshold * launched - (time.perf_counter() - start), 0.0)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                self._hedge_note(policy, agents[launched])
+                hedged.add(launched)
+                launch(launched)
+                launched += 1
+                continue
+            for future in done:
+                index, attempt = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                elapsed = time.perf_counter() - start
+                self._hedge_won(policy, index, index in hedged, agents[index], attempt, record, elapsed)
+                if index in hedged and primary in pending:
+                    primary.add_done_callback(settle(elapsed))
+                for other in pending:
+                    other.cancel()
+                return result
+            if not pending and launched < len(agents):
+                self._hedge_note(policy, agents[launched], last_error)
+                launch(launched)
+                launched += 1
+
+        raise last_error
+
+    async def _afetch_hedged(
+        self,
+        policy: HedgePolicy,
+        payload: Dict[str, Any],
+        record: CallRecord
+    ) -> Tuple[str, Optional[str]]:
+        """Awaitable variant of _fetch_hedged; losing requests are cancelled
+
+        A cancelled original never reports its latency, so the time saved
+        is estimated from the agent's latency history instead.
+        """
+        agents = self._hedge_routes(policy)
+        threshold = policy.delay(self.name)
+        policy.stats.record("calls")
+        start = time.perf_counter()
+        pending: Dict[asyncio.Future, Tuple[int, CallRecord]] = {}
+        hedged = set()
+        last_error: Optional[BaseException] = None
+
+        def launch(index: int) -> asyncio.Future:
+            agent = agents[index]
+            attempt = agent._new_call_record()
+            attempt.call_id = record.call_id
+            task = asyncio.ensure_future(agent._afetch_direct(dict(payload, model=agent.model), attempt))
+            pending[task] = (index, attempt)
+            return task
+
+        primary = launch(0)
+        launched = 1
+        try:
+            while pending:
+                timeout = None
+                if launched < len(agents):
+                    timeout = max(threshold * launched - (time.perf_counter() - start), 0.0)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self._hedge_note(policy, agents[launched])
+                    hedged.add(launched)
+                    launch(launched)
+                    launched += 1
+                    continue
+                for task in done:
+                    index, attempt = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    elapsed = time.perf_counter() - start
+                    self._hedge_won(policy, index, index in hedged, agents[index], attempt, record, elapsed)
+                    if index in hedged and primary in pending:
+                        policy.stats.record("saved_seconds", policy.estimate_saved(self.name, elapsed))
+                    return result
+                if not pending and launched < len(agents):
+                    self._hedge_note(policy, agents[launched], last_error)
+                    launch(launched)
+                    launched += 1
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error
+
+    def _new_call_record(self, streamed: bool = False) -> CallRecord:
+        """Start a metrics record for one completion request"""
+        return CallRecord(
+            agent=self.name,
+            provider=self.provider,
+            model=self.model,
+            status="ok",
+            latency=0.0,
+            streamed=streamed,
+            run_id=self.run_id,
+        )
+
+    def _finish_call_record(self, record: CallRecord, start: float):
+        """Stamp the wall latency and hand the record to the collector"""
+        record.latency = time.perf_counter() - start
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.record(record)
+        budget = self._output_budget
+        if budget is not None and record.status == "ok":
+            budget.observe(self.name, record.completion_tokens)
+
+    @staticmethod
+    def _record_stream_event(record: CallRecord, event: Dict[str, Any]):
+        """Pick up finish_reason and the trailing usage chunk of a stream"""
+        finish_reason = event_finish_reason(event)
+        if finish_reason:
+            record.finish_reason = finish_reason
+        if event.get("usage"):
+            record.prompt_tokens, record.completion_tokens, record.cached_tokens = \
+                usage_counts(event["usage"])
+
+    def _cache_lookup(
+        self,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict],
+        record: Optional[CallRecord] = None
+    ) -> tuple:
+        """Return (request key, cached (response, finish_reason)); None on a miss or if caching is off"""
+        key = self._request_key(user_prompt, temperature, max_tokens, response_format)
+        cache = self._cache
+        if cache is None:
+            return key, None
+
+        cached = cache.get(key)
+        if cached is not None:
+            if record is not None:
+                record.finish_reason = cached[1]
+            if self.debug:
+                self._log_debug("LLM RESPONSE (CACHED)", cached[0], record)
+        return key, cached
+
+    def _request_key(
+        self,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict]
+    ) -> str:
+        """Hash identifying a request for caching, coalescing and batch results"""
+        return cache_key(
+            self.provider, self.model, self.system_prompt, user_prompt,
+            temperature, max_tokens, response_format
+        )
+
+    def _batch_result(
+        self,
+        key: str,
+        record: CallRecord,
+        json_only: bool = False
+    ) -> Optional[Tuple[str, Optional[str]]]:
+        """Answer a request from an ingested batch job, if it produced one"""
+        runner = self._batch_runner
+        result = runner.result(key) if runner is not None else None
+        if result is None:
+            return None
+        content, finish_reason, usage = result
+        record.status = "batched"
+        record.finish_reason = finish_reason
+        record.prompt_tokens, record.completion_tokens, record.cached_tokens = usage_counts(usage)
+        self._cache_store(key, content, finish_reason, json_only)
+        if self.debug:
+            self._log_debug("LLM RESPONSE (BATCH)", content, record)
+        return content, finish_reason
+
+    def batch_request(
+        self,
+        user_prompt: str,
+        temperature: float = 0.3,
+        max_tokens: int = 1500,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """(request key, payload) of the first request call_llm_json would send"""
+        response_format = self._structured_format(schema)
+        if response_format is None:
+            user_prompt = self._json_prompt(user_prompt, 0)
+        key = self._request_key(user_prompt, temperature, max_tokens, response_format)
+        return key, self._build_payload(
+            user_prompt, temperature, self._sent_max_tokens(max_tokens, True), response_format
+        )
+
+    def prefetch_batch(self, stage: str, requests: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Run a stage's requests as one provider batch job before the stage itself
+
+        The stage then executes as usual and its calls are answered from
+        the batch results.  Returns the number of requests the job answered.
+        """
+        runner = self._batch_runner
+        if runner is None or self.stream or not requests:
+            return 0
+        return runner.run(self, stage, requests)
+
+    def _cache_store(
+        self,
+        key: Optional[str],
+        content: str,
+        finish_reason: Optional[str],
+        json_only: bool = False
+    ):
+        """Store a complete response under its request key
+
+        Responses cut off by max_tokens, and for JSON requests responses
+        that do not parse even after local repair, are not stored: the
+        retry would otherwise be answered with the same bad completion.
+        """
+        cache = self._cache
+        if cache is None or key is None or finish_reason == "length":
+            return
+        if json_only and not self._parses_as_json(content):
+            return
+        cache.put(key, content, finish_reason)
+
+    def _parses_as_json(self, content: str) -> bool:
+        """True if content is JSON, directly or after repairing it without truncation"""
+        try:
+            json.loads(self._strip_code_fences(content))
+        except json.JSONDecodeError:
+            repaired = repair_json(content)
+            return repaired is not None and isinstance(repaired.value, dict) and not repaired.truncated
+        return True
+
+    def call_llm(
+        self,
+        user_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        response_format: Optional[Dict] = None
+    ) -> str:
+        """Call OpenAI or OpenRouter API with the given prompt"""
+        content, _ = self._complete(user_prompt, temperature, max_tokens, response_format)
+        return content
+
+    def _complete(
+        self,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict] = None,
+        json_only: bool = False,
+        learned_cap: bool = False
+    ) -> Tuple[str, Optional[str]]:
+        """Return the completion text and its finish_reason
+
+        ``json_only`` responses are cached only if they parse as JSON.
+        With ``learned_cap`` the request is sent with max_tokens lowered to
+        the agent's learned budget, but keyed (cache, coalescing, batch
+        results) on the ``max_tokens`` asked for, so the key does not
+        depend on what the budget has learned so far.
+        """
+        record = self._new_call_record()
+        self._log_request(user_prompt, record)
+        start = time.perf_counter()
+        try:
+            key, cached = self._cache_lookup(user_prompt, temperature, max_tokens, response_format, record)
+            if cached is not None:
+                record.status = "cached"
+                return cached
+            batched = self._batch_result(key, record, json_only)
+            if batched is not None:
+                return batched
+
+            # Join an identical request that is already in flight, or take
+            # over from a leader that was abandoned
+            while True:
+                flight, leader = self._single_flight.join(key)
+                if leader:
+                    break
+                try:
+                    content, finish_reason = flight.result()
+                except FlightAbandoned:
+                    continue
+                record.status = "coalesced"
+                if self.debug:
+                    self._log_debug("LLM RESPONSE (COALESCED)", content, record)
+                return content, finish_reason
+
+            try:
+                content, finish_reason = self._fetch(
+                    self._build_payload(
+                        user_prompt, temperature, self._sent_max_tokens(max_tokens, learned_cap),
+                        response_format
+                    ),
+                    record
+                )
+                self._cache_store(key, content, finish_reason, json_only)
+            except BaseException as e:
+                self._single_flight.finish(key, flight, error=e)
+                raise
+            self._single_flight.finish(key, flight, result=(content, finish_reason))
+            return content, finish_reason
+        except Exception:
+            record.status = "error"
+            raise
+        finally:
+            self._finish_call_record(record, start)
+
+    async def acall_llm(
+        self,
+        user_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        response_format: Optional[Dict] = None
+    ) -> str:
+        """Awaitable variant of call_llm using httpx.AsyncClient"""
+        content, _ = await self._acomplete(user_prompt, temperature, max_tokens, response_format)
+        return content
+
+    async def _acomplete(
+        self,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict] = None,
+        json_only: bool = False,
+        learned_cap: bool = False
+    ) -> Tuple[str, Optional[str]]:
+        """Awaitable variant of _complete"""
+        record = self._new_call_record()
+        self._log_request(user_prompt, record)
+        start = time.perf_counter()
+        try:
+            key, cached = self._cache_lookup(user_prompt, temperature, max_tokens, response_format, record)
+            if cached is not None:
+                record.status = "cached"
+                return cached
+            batched = self._batch_result(key, record, json_only)
+            if batched is not None:
+                return batched
+
+            # Join an identical request that is already in flight, or take
+            # over from a leader that was abandoned
+            while True:
+                flight, leader = self._single_flight.join(key)
+                if leader:
+                    break
+                try:
+                    content, finish_reason = await asyncio.wrap_future(flight)
+                except FlightAbandoned:
+                    continue
+                record.status = "coalesced"
+                if self.debug:
+                    self._log_debug("LLM RESPONSE (COALESCED)", content, record)
+                return content, finish_reason
+
+            try:
+                content, finish_reason = await self._afetch(
+                    self._build_payload(
+                        user_prompt, temperature, self._sent_max_tokens(max_tokens, learned_cap),
+                        response_format
+                    ),
+                    record
+                )
+                self._cache_store(key, content, finish_reason, json_only)
+            except BaseException as e:
+                self._single_flight.finish(key, flight, error=e)
+                raise
+            self._single_flight.finish(key, flight, result=(content, finish_reason))
+            return content, finish_reason
+        except Exception:
+            record.status = "error"
+            raise
+        finally:
+            self._finish_call_record(record, start)
+
+    def stream_llm(
+        self,
+        user_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        response_format: Optional[Dict] = None,
+        json_only: bool = False
+    ) -> Iterator[str]:
+        """Yield content deltas of a streamed (server-sent events) completion"""
+        record = self._new_call_record(streamed=True)
+        self._log_request(user_prompt, record)
+
+        key, cached = self._cache_lookup(user_prompt, temperature, max_tokens, response_format, record)
+        if cached is not None:
+            record.status = "cached"
+            self._finish_call_record(record, time.perf_counter())
+            yield cached[0]
+            return
+
+        payload = self._build_payload(user_prompt, temperature, max_tokens, response_format)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+
+        start = time.perf_counter()
+        parts = []
+        try:
+            response = self._post(payload, stream=True, record=record)
+        except Exception:
+            record.status = "error"
+            self._finish_call_record(record, start)
+            raise
+        try:
+            record.http_status = response.status_code
+            if response.status_code != 200:
+                self._handle_response(response, record)
+            for event in iter_sse_events(response.iter_lines()):
+                self._record_stream_event(record, event)
+                delta = event_delta(event)
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except Exception:
+            record.status = "error"
+            raise
+        finally:
+            response.close()
+            if response.status_code == 200:
+                self._reconcile_stream(payload, record, parts)
+            self._finish_call_record(record, start)
+
+        content = "".join(parts)
+        if self.debug:
+            self._log_debug("LLM RESPONSE (STREAMED)", content, record)
+        self._cache_store(key, content, record.finish_reason, json_only)
+
+    async def astream_llm(
+        self,
+        user_prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        response_format: Optional[Dict] = None,
+        json_only: bool = False
+    ) -> AsyncIterator[str]:
+        """Awaitable variant of stream_llm"""
+        record = self._new_call_record(streamed=True)
+        self._log_request(user_prompt, record)
+
+        key, cached = self._cache_lookup(user_prompt, temperature, max_tokens, response_format, record)
+        if cached is not None:
+            record.status = "cached"
+            self._finish_call_record(record, time.perf_counter())
+            yield cached[0]
+            return
+
+        payload = self._build_payload(user_prompt, temperature, max_tokens, response_format)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+
+        start = time.perf_counter()
+        parts = []
+        try:
+            response = await self._apost(payload, stream=True, record=record)
+        except Exception:
+            record.status = "error"
+            self._finish_call_record(record, start)
+            raise
+        try:
+            record.http_status = response.status_code
+            if response.status_code != 200:
+                self._handle_response(response, record)
+            async for event in aiter_sse_events(response.aiter_lines()):
+                self._record_stream_event(record, event)
+                delta = event_delta(event)
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except Exception:
+            record.status = "error"
+            raise
+        finally:
+            await response.aclose()
+            if response.status_code == 200:
+                self._reconcile_stream(payload, record, parts)
+            self._finish_call_record(record, start)
+
+        content = "".join(parts)
+        if self.debug:
+            self._log_debug("LLM RESPONSE (STREAMED)", content, record)
+        self._cache_store(key, content, record.finish_reason, json_only)
+
+    def stream_llm_json_items(
+        self,
+        user_prompt: str,
+        array_key: str,
+        temperature: float = 0.3,
+        max_tokens: int = 1500
+    ) -> Iterator[Any]:
+        """Stream a JSON completion, yielding each ``array_key`` element once complete"""
+        parser = JSONArrayStreamParser(array_key)
+        started = time.perf_counter()
+        first_item = None
+        count = 0
+
+        for delta in self.stream_llm(
+            self._json_prompt(user_prompt, 0), temperature, max_tokens, json_only=True
+        ):
+            for item in parser.feed(delta):
+                if first_item is None:
+                    first_item = time.perf_counter() - started
+                count += 1
+                yield item
+
+        self._log_stream_timing(array_key, count, first_item, time.perf_counter() - started)
+
+    async def astream_llm_json_items(
+        self,
+        user_prompt: str,
+        array_key: str,
+        temperature: float = 0.3,
+        max_tokens: int = 1500
+    ) -> AsyncIterator[Any]:
+        """Awaitable variant of stream_llm_json_items"""
+        parser = JSONArrayStreamParser(array_key)
+        started = time.perf_counter()
+        first_item = None
+        count = 0
+
+        async for delta in self.astream_llm(
+            self._json_prompt(user_prompt, 0), temperature, max_tokens, json_only=True
+        ):
+            for item in parser.feed(delta):
+                if first_item is None:
+                    first_item = time.perf_counter() - started
+                count += 1
+                yield item
+
+        self._log_stream_timing(array_key, count, first_item, time.perf_counter() - started)
+
+    def _log_stream_timing(
+        self,
+        array_key: str,
+        count: int,
+        first_item: Optional[float],
+        total: float
+    ):
+        """Log time-to-first-item next to total stream latency"""
+        if not self.debug:
+            return
+        first = f"{first_item:.2f}s" if first_item is not None else "n/a"
+        self._log_debug(
+            "STREAM TIMING",
+            f"{count} '{array_key}' items; first item after {first}; total {total:.2f}s"
+        )
+
+    @staticmethod
+    def _json_prompt(user_prompt: str, attempt: int) -> str:
+        """Append the JSON-only instruction, stricter on retries"""
+        if attempt == 0:
+            return f"{user_prompt}\n\nIMPORTANT: Return your response as valid JSON only. No markdown, no code blocks, just pure JSON."
+        return f"{user_prompt}\n\nIMPORTANT: Return ONLY valid JSON. Ensure all strings are properly quoted and escaped. No markdown formatting."
+
+    @staticmethod
+    def _strip_code_fences(response: str) -> str:
+        """Remove markdown code blocks wrapped around a JSON response"""
+        response = response.strip()
+        if response.startswith("```json"):
+            response = response[7:]
+        elif response.startswith("```"):
+            response = response[3:]
+        if response.endswith("```"):
+            response = response[:-3]
+        return response.strip()
+
+    def _repair_json(
+        self,
+        response: str,
+        finish_reason: Optional[str],
+        accept_partial: Optional[Callable[[Dict[str, Any]], bool]]
+    ) -> Optional[Dict[str, Any]]:
+        """Try to salvage an unparseable response locally instead of re-asking
+
+        Truncated results (finish_reason ``length`` or unclosed brackets) are
+        only returned if ``accept_partial`` approves them.
+        """
+        repaired = repair_json(response)
+        if repaired is None or not isinstance(repaired.value, dict):
+            return None
+
+        stats = self._structured_stats
+        truncated = repaired.truncated or finish_reason == "length"
+        if truncated and not (accept_partial and accept_partial(repaired.value)):
+            stats.record("partial_rejected")
+            if self.debug:
+                self._log_debug("JSON REPAIR REJECTED", f"Truncated (finish_reason={finish_reason}); "
+                                f"salvaged result not accepted: {', '.join(repaired.changes)}")
+            return None
+
+        stats.record("repaired_locally")
+        if truncated:
+            stats.record("partial_accepted")
+            print(f"  Warning: {self.name}: response was truncated; using salvaged partial result")
+        if self.debug:
+            self._log_debug("JSON REPAIRED", f"finish_reason={finish_reason}; {', '.join(repaired.changes)}")
+        return repaired.value
+
+    def _parse_json_attempt(
+        self,
+        response: str,
+        finish_reason: Optional[str],
+        attempt: int,
+        max_retries: int,
+        accept_partial: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Parse one JSON attempt; return None if the caller should retry"""
+        try:
+            parsed = json.loads(self._strip_code_fences(response))
+        except json.JSONDecodeError as e:
+            repaired = self._repair_json(response, finish_reason, accept_partial)
+            if repaired is not None:
+                return repaired
+
+            error_msg = f"Failed to parse LLM response as JSON (attempt {attempt + 1}/{max_retries + 1}): {e}"
+            if self.debug:
+                self._log_debug("JSON PARSE ERROR", f"{error_msg}\nResponse: {response[:500]}...")
+
+            if attempt < max_retries:
+                print(f"  Warning: {error_msg}. Retrying...")
+                return None
+
+            # Last attempt failed
+            error_msg = f"Failed to parse LLM response as JSON after {max_retries + 1} attempts: {e}\nResponse: {response}"
+            if self.debug:
+                self._log_debug("JSON PARSE ERROR - FINAL", error_msg)
+            raise Exception(error_msg)
+
+        if self.debug:
+            self._log_debug("PARSED JSON", json.dumps(parsed, indent=2))
+        return parsed
+
+    def _map_bounded(
+        self,
+        fn: Callable[[T], R],
+        items: Iterable[T],
+        on_done: Optional[Callable[[T, R], None]] = None
+    ) -> List[R]:
+        """``[fn(item) for item in items]`` with up to _concurrency calls in flight
+
+        Results keep the order of ``items``; fn is expected to handle its
+        own errors so one failing item does not abort the others.
+        ``on_done(item, result)`` runs as each item finishes, in completion
+        order and on the worker thread.
+        """
+        items = list(items)
+
+        def run(item: T) -> R:
+            result = fn(item)
+            if on_done is not None:
+                on_done(item, result)
+            return result
+
+        workers = min(self._concurrency, len(items))
+        if workers <= 1:
+            return [run(item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=type(self).__name__) as executor:
+            return list(executor.map(run, items))
+
+    async def _agather_bounded(self, aws: Iterable[Awaitable[R]]) -> List[R]:
+        """asyncio.gather limited to _concurrency awaitables running at once"""
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def bounded(aw: Awaitable[R]) -> R:
+            async with semaphore:
+                return await aw
+
+        return list(await asyncio.gather(*(bounded(aw) for aw in aws)))
+
+    def _sent_max_tokens(self, requested: int, learned_cap: bool) -> int:
+        """max_tokens to send: with ``learned_cap``, lowered to the learned budget if known"""
+        budget = self._output_budget
+        if not learned_cap or budget is None or not self.learn_max_tokens or not self.continuation_key:
+            return requested
+        return budget.max_tokens(self.name, requested)
+
+    def _continuation_start(self, response: str) -> Optional[Tuple[Dict[str, Any], List[Any]]]:
+        """(partial result, complete items) of a truncated response, or None if it cannot be continued"""
+        key = self.continuation_key
+        if not key:
+            return None
+        repaired = repair_json(response)
+        if repaired is None or not isinstance(repaired.value, dict):
+            return None
+        if not isinstance(repaired.value.get(key), list):
+            return None
+        self._structured_stats.record("continued")
+        return repaired.value, list(repaired.value[key])
+
+    def _continuation_request(self, user_prompt: str, received: List[Any], structured: bool) -> str:
+        self._structured_stats.record("continuation_calls")
+        prompt = continuation_prompt(user_prompt, self.continuation_key, received)
+        return prompt if structured else self._json_prompt(prompt, 0)
+
+    def _continuation_step(self, received: List[Any], content: str, finish_reason: Optional[str]) -> bool:
+        """Add a continuation's new items to ``received``; True if another continuation is needed"""
+        more = repair_json(content)
+        if more is None or not isinstance(more.value, dict):
+            return False
+        fresh = merge_continuation(received, more.value, self.continuation_key)
+        received.extend(fresh)
+        if self.debug:
+            self._log_debug("CONTINUATION", f"{len(fresh)} new {self.continuation_key} "
+                            f"(finish_reason={finish_reason}, {len(received)} in total)")
+        return finish_reason == "length" and bool(fresh)
+
+    def _continue_json(
+        self,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict],
+        response: str
+    ) -> Optional[Dict[str, Any]]:
+        """Resume a response cut off by max_tokens and stitch the items together"""
+        start = self._continuation_start(response)
+        if start is None:
+            return None
+        result, received = start
+        for _ in range(self.max_continuations):
+            content, finish_reason = self._complete(
+                self._continuation_request(user_prompt, received, response_format is not None),
+                temperature, max_tokens, response_format, json_only=True, learned_cap=True
+            )
+            if not self._continuation_step(received, content, finish_reason):
+                break
+        result[self.continuation_key] = received
+        return result
+
+    async def _acontinue_json(
+        self,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict],
+        response: str
+    ) -> Optional[Dict[str, Any]]:
+        """Awaitable variant of _continue_json"""
+        start = self._continuation_start(response)
+        if start is None:
+            return None
+        result, received = start
+        for _ in range(self.max_continuations):
+            content, finish_reason = await self._acomplete(
+                self._continuation_request(user_prompt, received, response_format is not None),
+                temperature, max_tokens, response_format, json_only=True, learned_cap=True
+            )
+            if not self._continuation_step(received, content, finish_reason):
+                break
+        result[self.continuation_key] = received
+        return result
+
+    def _structured_format(self, schema: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Return the json_schema response_format to use, or None for the legacy path"""
+        schema = schema if schema is not None else self.output_schema
+        if schema is None or not self._structured_output:
+            return None
+        if not self._structured_stats.supports(self.provider, self.model):
+            return None
+        name = "".join(c if c.isalnum() else "_" for c in self.name.lower())
+        return json_schema_format(name, schema)
+
+    def _structured_unsupported(self, error: Exception) -> bool:
+        """Remember providers/models that reject json_schema; True if so"""
+        if not is_unsupported_error(error):
+            return False
+        self._structured_stats.mark_unsupported(self.provider, self.model)
+        print(f"  Warning: {self.provider}/{self.model} rejected json_schema output; "
+              f"using prompt-based JSON instead")
+        return True
+
+    def _parse_structured(
+        self,
+        response: str,
+        finish_reason: Optional[str],
+        accept_partial: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Parse a schema-constrained response; None means fall back to re-asking"""
+        stats = self._structured_stats
+        try:
+            parsed = json.loads(self._strip_code_fences(response))
+        except json.JSONDecodeError as e:
+            repaired = self._repair_json(response, finish_reason, accept_partial)
+            if repaired is not None:
+                return repaired
+            stats.record("structured_fallbacks")
+            if self.debug:
+                self._log_debug("STRUCTURED PARSE ERROR", f"{e}\nResponse: {response[:500]}...")
+            return None
+
+        stats.record("structured_first_try")
+        if self.debug:
+            self._log_debug("PARSED JSON", json.dumps(parsed, indent=2))
+        return parsed
 
     def call_llm_json(
         self,
         user_prompt: str,
         temperature: float = 0.3,
         max_tokens: int = 1500,
-        max_retries: int = 2
+        max_retries: int = 2,
+        schema: Optional[Dict[str, Any]] = None,
+        accept_partial: Optional[Callable[[Dict[str, Any]], bool]] = None
     ) -> Dict[str, Any]:
-        """Call LLM and parse response as JSON with retry on parse errors"""
-        # Add instruction to return JSON
-        json_prompt = f"{user_prompt}\n\nIMPORTANT: Return your response as valid JSON only. No markdown, no code blocks, just pure JSON."
+        """Call LLM and parse response as JSON
 
-        last_error = None
-        for attempt in range(max_retries + 1):
+        Uses the provider's json_schema mode when the agent declares an
+        output schema, otherwise retries on parse errors.  Malformed output
+        is repaired locally first.  A response cut off by max_tokens is
+        continued along ``continuation_key`` when the agent declares one;
+        otherwise it is salvaged only if ``accept_partial`` returns True for
+        the partial result.
+        """
+        response_format = self._structured_format(schema)
+        if response_format is not None:
+            self._structured_stats.record("structured_calls")
             try:
-                response = self.call_llm(
-                    user_prompt=json_prompt,
-                    temperature=temperature,
-                    max_tokens=max_tokens
+                response, finish_reason = self._complete(
+                    user_prompt, temperature, max_tokens, response_format, json_only=True, learned_cap=True
                 )
+            except LLMAPIError as e:
+                if not self._structured_unsupported(e):
+                    raise
+            else:
+                if finish_reason == "length":
+                    continued = self._continue_json(
+                        user_prompt, temperature, max_tokens, response_format, response
+                    )
+                    if continued is not None:
+                        return continued
+                parsed = self._parse_structured(response, finish_reason, accept_partial)
+                if parsed is not None:
+                    return parsed
 
-                # Clean up response - remove markdown code blocks if present
-                response = response.strip()
-                if response.startswith("```json"):
-                    response = response[7:]
-                elif response.startswith("```"):
-                    response = response[3:]
-                if response.endswith("```"):
-                    response = response[:-3]
-                response = response.strip()
-
-                parsed = json.loads(response)
-                if self.debug:
-                    self._log_debug("PARSED JSON", json.dumps(parsed, indent=2))
+        self._structured_stats.record("legacy_calls")
+        for attempt in range(max_retries + 1):
+            if attempt:
+                self._structured_stats.record("legacy_reasks")
+            response, finish_reason = self._complete(
+                self._json_prompt(user_prompt, attempt), temperature, max_tokens, json_only=True,
+                learned_cap=True
+            )
+            if finish_reason == "length":
+                continued = self._continue_json(user_prompt, temperature, max_tokens, None, response)
+                if continued is not None:
+                    return continued
+            parsed = self._parse_json_attempt(
+                response, finish_reason, attempt, max_retries, accept_partial
+            )
+            if parsed is not None:
                 return parsed
 
-            except json.JSONDecodeError as e:
-                last_error = e
-                error_msg = f"Failed to parse LLM response as JSON (attempt {attempt + 1}/{max_retries + 1}): {e}"
-                if self.debug:
-                    self._log_debug("JSON PARSE ERROR", f"{error_msg}\nResponse: {response[:500]}...")
-
-                if attempt < max_retries:
-                    print(f"  Warning: {error_msg}. Retrying...")
-                    json_prompt = f"{user_prompt}\n\nIMPORTANT: Return ONLY valid JSON. Ensure all strings are properly quoted and escaped. No markdown formatting."
-                else:
-                    # Last attempt failed
-                    error_msg = f"Failed to parse LLM response as JSON after {max_retries + 1} attempts: {last_error}\nResponse: {response}"
-                    if self.debug:
-                        self._log_debug("JSON PARSE ERROR - FINAL", error_msg)
-                    raise Exception(error_msg)
+        # Should never reach here
+        raise Exception(f"Failed to parse JSON after {max_retries + 1} attempts")
+
+    async def acall_llm_json(
+        self,
+        user_prompt: str,
+        temperature: float = 0.3,
+        max_tokens: int = 1500,
+        max_retries: int = 2,
+        schema: Optional[Dict[str, Any]] = None,
+        accept_partial: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Dict[str, Any]:
+        """Awaitable variant of call_llm_json"""
+        response_format = self._structured_format(schema)
+        if response_format is not None:
+            self._structured_stats.record("structured_calls")
+            try:
+                response, finish_reason = await self._acomplete(
+                    user_prompt, temperature, max_tokens, response_format, json_only=True, learned_cap=True
+                )
+            except LLMAPIError as e:
+                if not self._structured_unsupported(e):
+                    raise
+            else:
+                if finish_reason == "length":
+                    continued = await self._acontinue_json(
+                        user_prompt, temperature, max_tokens, response_format, response
+                    )
+                    if continued is not None:
+                        return continued
+                parsed = self._parse_structured(response, finish_reason, accept_partial)
+                if parsed is not None:
+                    return parsed
+
+        self._structured_stats.record("legacy_calls")
+        for attempt in range(max_retries + 1):
+            if attempt:
+                self._structured_stats.record("legacy_reasks")
+            response, finish_reason = await self._acomplete(
+                self._json_prompt(user_prompt, attempt), temperature, max_tokens, json_only=True,
+                learned_cap=True
+            )
+            if finish_reason == "length":
+                continued = await self._acontinue_json(user_prompt, temperature, max_tokens, None, response)
+                if continued is not None:
+                    return continued
+            parsed = self._parse_json_attempt(
+                response, finish_reason, attempt, max_retries, accept_partial
+            )
+            if parsed is not None:
+                return parsed
 
         # Should never reach here
         raise Exception(f"Failed to parse JSON after {max_retries + 1} attempts")
@@ -200,7 +1649,3 @@ class BaseAgent(ABC):
     def run(self, *args, **kwargs) -> Any:
         """Execute the agent's main task"""
         pass
-
-    def __del__(self):
-        if hasattr(self, 'client'):
-            self.client.close()
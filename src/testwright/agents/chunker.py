@@ -1,12 +1,15 @@
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
 from testwright.agents.base import BaseAgent
+from testwright.llm.structured import STRING, STRING_LIST, array_of, object_schema
 from testwright.models.schemas import ParsedModule, WorkflowChunk
 
 
 class ChunkerAgent(BaseAgent):
     """Agent responsible for splitting modules into workflow-based chunks"""
 
+    continuation_key = "workflow_chunks"
+
     @property
     def name(self) -> str:
         return "Chunker Agent"
@@ -31,9 +34,49 @@ FIELD-LEVEL GRANULARITY:
 3. Each field with validation rules should retain its associated rules
 4. This granularity enables per-field test case generation for comprehensive coverage"""
 
+    @property
+    def output_schema(self) -> dict:
+        return object_schema({
+            "workflow_chunks": array_of(object_schema({
+                "workflow_name": STRING,
+                "workflow_description": STRING,
+                "related_items": STRING_LIST,
+                "related_rules": STRING_LIST,
+                "related_behaviors": STRING_LIST,
+            })),
+        })
+
     def run(self, module: ParsedModule) -> List[WorkflowChunk]:
         """Split a module into workflow-based chunks"""
 
+        chunks = self._trivial_chunks(module)
+        if chunks is not None:
+            return chunks
+
+        # Multiple workflows - use LLM to map items to workflows
+        return self._split_by_workflows(module)
+
+    async def arun(self, module: ParsedModule) -> List[WorkflowChunk]:
+        """Awaitable variant of run"""
+
+        chunks = self._trivial_chunks(module)
+        if chunks is not None:
+            return chunks
+
+        try:
+            result = await self.acall_llm_json(
+                self._build_split_prompt(module), max_tokens=4000,
+                accept_partial=lambda partial: self._covers_workflows(module, partial)
+            )
+            return self._build_chunks(module, result)
+        except Exception as e:
+            print(f"Warning: Workflow splitting failed for module {module.title}: {e}")
+            self.degraded.add(module.id)
+            return self._fallback_chunks(module)
+
+    def _trivial_chunks(self, module: ParsedModule) -> Optional[List[WorkflowChunk]]:
+        """Return chunks for modules that need no LLM split, else None"""
+
         # If no workflows detected, create a single "full" chunk
         if not module.workflows:
             return [WorkflowChunk(
@@ -60,18 +103,39 @@ FIELD-LEVEL GRANULARITY:
                 related_behaviors=module.expected_behaviors
             )]
 
-        # Multiple workflows - use LLM to map items to workflows
-        return self._split_by_workflows(module)
+        return None
+
+    def batch_requests(self, modules: List[ParsedModule]) -> List[Tuple[str, Dict[str, Any]]]:
+        """The requests run() will make for ``modules``, for a batch-API prefetch"""
+        return [
+            self.batch_request(self._build_split_prompt(module), max_tokens=4000)
+            for module in modules
+            if self._trivial_chunks(module) is None
+        ]
 
     def _split_by_workflows(self, module: ParsedModule) -> List[WorkflowChunk]:
         """Use LLM to intelligently map items/rules/behaviors to workflows"""
 
+        try:
+            result = self.call_llm_json(
+                self._build_split_prompt(module), max_tokens=4000,
+                accept_partial=lambda partial: self._covers_workflows(module, partial)
+            )
+            return self._build_chunks(module, result)
+        except Exception as e:
+            print(f"Warning: Workflow splitting failed for module {module.title}: {e}")
+            self.degraded.add(module.id)
+            return self._fallback_chunks(module)
+
+    def _build_split_prompt(self, module: ParsedModule) -> str:
+        """Build the prompt mapping items/rules/behaviors to workflows"""
+
         workflows_list = "\n".join([f"  {i+1}. {w}" for i, w in enumerate(module.workflows)])
         items_list = ", ".join(module.mentioned_items) if module.mentioned_items else "None"
         rules_list = "\n".join([f"  - {r}" for r in module.business_rules]) if module.business_rules else "None"
         behaviors_list = "\n".join([f"  - {b}" for b in module.expected_behaviors]) if module.expected_behaviors else "None"
 
-        prompt = f"""Analyze this module and map its elements to the appropriate workflows.
+        return f"""Analyze this module and map its elements to the appropriate workflows.
 
 Module: {module.title}
 Description: {module.raw_description}
@@ -120,42 +184,47 @@ FIELD-LEVEL GRANULARITY:
 - Include all validation rules related to individual fields
 """
 
-        try:
-            result = self.call_llm_json(prompt, max_tokens=4000)
-            chunks = []
+    @staticmethod
+    def _covers_workflows(module: ParsedModule, result: dict) -> bool:
+        """A truncated split is usable only if every workflow made it into the output"""
+        returned = {
+            str(c.get("workflow_name", "")).lower()
+            for c in result.get("workflow_chunks", []) if isinstance(c, dict)
+        }
+        return all(w.lower() in returned for w in module.workflows)
+
+    def _build_chunks(self, module: ParsedModule, result: dict) -> List[WorkflowChunk]:
+        """Build WorkflowChunks from the LLM split result"""
+        chunks = []
+
+        for i, chunk_data in enumerate(result.get("workflow_chunks", [])):
+            chunks.append(WorkflowChunk(
+                chunk_id=f"{module.id}_workflow_{i}",
+                module_id=module.id,
+                module_title=module.title,
+                workflow_name=chunk_data.get("workflow_name", f"Workflow {i+1}"),
+                workflow_description=chunk_data.get("workflow_description", ""),
+                related_items=chunk_data.get("related_items", []),
+                related_rules=chunk_data.get("related_rules", []),
+                related_behaviors=chunk_data.get("related_behaviors", [])
+            ))
 
-            for i, chunk_data in enumerate(result.get("workflow_chunks", [])):
+        # If LLM didn't return all workflows, add missing ones
+        returned_workflows = {c.workflow_name.lower() for c in chunks}
+        for i, workflow in enumerate(module.workflows):
+            if workflow.lower() not in returned_workflows:
                 chunks.append(WorkflowChunk(
-                    chunk_id=f"{module.id}_workflow_{i}",
+                    chunk_id=f"{module.id}_workflow_{len(chunks)}",
                     module_id=module.id,
                     module_title=module.title,
-                    workflow_name=chunk_data.get("workflow_name", f"Workflow {i+1}"),
-                    workflow_description=chunk_data.get("workflow_description", ""),
-                    related_items=chunk_data.get("related_items", []),
-                    related_rules=chunk_data.get("related_rules", []),
-                    related_behaviors=chunk_data.get("related_behaviors", [])
+                    workflow_name=workflow,
+                    workflow_description=f"Workflow: {workflow}",
+                    related_items=[],
+                    related_rules=[],
+                    related_behaviors=[]
                 ))
 
-            # If LLM didn't return all workflows, add missing ones
-            returned_workflows = {c.workflow_name.lower() for c in chunks}
-            for i, workflow in enumerate(module.workflows):
-                if workflow.lower() not in returned_workflows:
-                    chunks.append(WorkflowChunk(
-                        chunk_id=f"{module.id}_workflow_{len(chunks)}",
-                        module_id=module.id,
-                        module_title=module.title,
-                        workflow_name=workflow,
-                        workflow_description=f"Workflow: {workflow}",
-                        related_items=[],
-                        related_rules=[],
-                        related_behaviors=[]
-                    ))
-
-            return chunks if chunks else self._fallback_chunks(module)
-
-        except Exception as e:
-            print(f"Warning: Workflow splitting failed for module {module.title}: {e}")
-            return self._fallback_chunks(module)
+        return chunks if chunks else self._fallback_chunks(module)
 
     def _fallback_chunks(self, module: ParsedModule) -> List[WorkflowChunk]:
         """Fallback: create one chunk per workflow with all items"""
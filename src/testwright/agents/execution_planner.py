@@ -3,8 +3,10 @@ from dataclasses import dataclass, field
 
 from testwright.agents.base import BaseAgent
 from testwright.models.schemas import TestCase
+from testwright.models.serialization import register_schema
 
 
+@register_schema
 @dataclass
 class ExecutionStep:
     """A single step in an execution sequence"""
@@ -39,6 +41,7 @@ class ExecutionStep:
         return result
 
 
+@register_schema
 @dataclass
 class ExecutionSequence:
     """Represents an execution sequence for verifying a test case"""
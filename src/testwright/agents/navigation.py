@@ -145,6 +145,7 @@ Navigation Rules:
             return parsed
         except Exception as e:
             print(f"Warning: Navigation analysis failed: {e}")
+            self.degraded.update(m.id for m in modules)
             # Return default structure - all authenticated pages connect to each other
             return self._default_navigation(modules)
 
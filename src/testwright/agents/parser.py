@@ -1,6 +1,7 @@
-from typing import Dict, Any
+from typing import Any, Dict, List
 
 from testwright.agents.base import BaseAgent
+from testwright.llm.structured import BOOLEAN, STRING_LIST, object_schema
 from testwright.models.schemas import (
     ParsedModule,
     ParsedFunctionalDescription
@@ -39,39 +40,90 @@ WORKFLOW GUIDANCE:
 - Links to other pages (Register, Forgot Password) are navigation elements, not workflows
 - If a page has multiple forms, each form's submission is a separate workflow"""
 
+    @property
+    def output_schema(self) -> dict:
+        return object_schema({
+            "mentioned_items": STRING_LIST,
+            "workflows": STRING_LIST,
+            "business_rules": STRING_LIST,
+            "expected_behaviors": STRING_LIST,
+            "requires_auth": BOOLEAN,
+        })
+
     def run(self, functional_desc: Dict[str, Any]) -> ParsedFunctionalDescription:
-        """Parse the functional description JSON and extract structured data"""
+        """Parse the functional description JSON and extract structured data
 
-        # Validate basic structure
-        if not isinstance(functional_desc, dict):
-            raise ValueError("Functional description must be a dictionary")
+        Modules are extracted concurrently (bounded by configure_concurrency);
+        their order in the result matches the input.
+        """
+
+        parsed_modules = self._map_bounded(self.parse_module, self.raw_modules(functional_desc))
+
+        return self.build_description(functional_desc, parsed_modules)
+
+    async def arun(self, functional_desc: Dict[str, Any]) -> ParsedFunctionalDescription:
+        """Parse all modules concurrently; module order is preserved"""
 
-        project_name = functional_desc.get("project_name", "Unknown Project")
-        base_url = functional_desc.get("website_url", "")
-        navigation_overview = functional_desc.get("navigation_overview", "")
-        raw_modules = functional_desc.get("modules", [])
+        parsed_modules = await self._agather_bounded(
+            self.aparse_module(module) for module in self.raw_modules(functional_desc)
+        )
+
+        return self.build_description(functional_desc, parsed_modules)
 
-        parsed_modules = []
-        for module in raw_modules:
-            parsed_module = self._parse_module(module)
-            parsed_modules.append(parsed_module)
+    def raw_modules(self, functional_desc: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """The module dicts of a functional description, validated"""
+        return self._validate(functional_desc).get("modules", [])
 
+    @staticmethod
+    def _validate(functional_desc: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate basic structure of the functional description"""
+        if not isinstance(functional_desc, dict):
+            raise ValueError("Functional description must be a dictionary")
+        return functional_desc
+
+    @staticmethod
+    def build_description(
+        functional_desc: Dict[str, Any],
+        parsed_modules: list
+    ) -> ParsedFunctionalDescription:
+        """Combine project-level fields with the parsed modules"""
         return ParsedFunctionalDescription(
-            project_name=project_name,
-            base_url=base_url,
-            navigation_overview=navigation_overview,
+            project_name=functional_desc.get("project_name", "Unknown Project"),
+            base_url=functional_desc.get("website_url", ""),
+            navigation_overview=functional_desc.get("navigation_overview", ""),
             modules=parsed_modules
         )
 
-    def _parse_module(self, module: Dict[str, Any]) -> ParsedModule:
+    def parse_module(self, module: Dict[str, Any]) -> ParsedModule:
         """Parse a single module using LLM to extract details"""
 
-        module_id = module.get("id", 0)
+        try:
+            result = self.call_llm_json(self._build_extraction_prompt(module), max_tokens=4000)
+        except Exception as e:
+            self.degraded.add(module.get("id", 0))
+            return self._empty_module(module, e)
+
+        return self._build_module(module, result)
+
+    async def aparse_module(self, module: Dict[str, Any]) -> ParsedModule:
+        """Awaitable variant of parse_module"""
+
+        try:
+            result = await self.acall_llm_json(self._build_extraction_prompt(module), max_tokens=4000)
+        except Exception as e:
+            self.degraded.add(module.get("id", 0))
+            return self._empty_module(module, e)
+
+        return self._build_module(module, result)
+
+    def _build_extraction_prompt(self, module: Dict[str, Any]) -> str:
+        """Build the LLM extraction prompt for a module"""
+
         title = module.get("title", "Unknown Module")
         description = module.get("description", "")
 
         # Use LLM to extract structured information from description
-        extraction_prompt = f"""Analyze this functional description and extract information for test case generation.
+        return f"""Analyze this functional description and extract information for test case generation.
 
 Module Title: {title}
 Description: {description}
@@ -125,26 +177,29 @@ Example for a Registration page:
 }}
 """
 
-        try:
-            result = self.call_llm_json(extraction_prompt, max_tokens=4000)
-        except Exception as e:
-            print(f"Warning: LLM extraction failed for module {title}: {e}")
-            # Return module with empty extracted data
-            return ParsedModule(
-                id=module_id,
-                title=title,
-                raw_description=description,
-                mentioned_items=[],
-                workflows=[],
-                business_rules=[],
-                expected_behaviors=[],
-                requires_auth=True
-            )
-
+    @staticmethod
+    def _empty_module(module: Dict[str, Any], error: Exception) -> ParsedModule:
+        """Return module with empty extracted data after an LLM failure"""
+        title = module.get("title", "Unknown Module")
+        print(f"Warning: LLM extraction failed for module {title}: {error}")
         return ParsedModule(
-            id=module_id,
+            id=module.get("id", 0),
             title=title,
-            raw_description=description,
+            raw_description=module.get("description", ""),
+            mentioned_items=[],
+            workflows=[],
+            business_rules=[],
+            expected_behaviors=[],
+            requires_auth=True
+        )
+
+    @staticmethod
+    def _build_module(module: Dict[str, Any], result: Dict[str, Any]) -> ParsedModule:
+        """Build a ParsedModule from the LLM extraction result"""
+        return ParsedModule(
+            id=module.get("id", 0),
+            title=module.get("title", "Unknown Module"),
+            raw_description=module.get("description", ""),
             mentioned_items=result.get("mentioned_items", []),
             workflows=result.get("workflows", []),
             business_rules=result.get("business_rules", []),
@@ -5,8 +5,9 @@ Uses sentence-transformers for embedding generation and FAISS for similarity sea
 Falls back to simple keyword matching if dependencies are not available.
 """
 
-from typing import List, Dict, Tuple, Optional
+from typing import Any, List, Dict, Tuple, Optional
 import json
+import threading
 
 from testwright.models.schemas import TestCase
 
@@ -14,6 +15,12 @@ from testwright.models.schemas import TestCase
 class RAGIndexer:
     """Builds and queries a vector index of test cases for similarity matching"""
 
+    # Embedding models are loaded once per process and shared by every
+    # indexer, including those of concurrent generate_many runs.  The
+    # tokenizer is not thread-safe, so encoding goes through the lock too
+    _shared_models: Dict[str, Any] = {}
+    _model_lock = threading.Lock()
+
     def __init__(self, use_embeddings: bool = True):
         """Initialize the RAG indexer
 
@@ -34,15 +41,27 @@ class RAGIndexer:
     def _init_embedding_model(self):
         """Initialize the sentence transformer model"""
         try:
-            from sentence_transformers import SentenceTransformer
             # Use a lightweight model for speed
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.model = self._load_model('all-MiniLM-L6-v2')
             print("  - RAG: Using sentence-transformers for embeddings")
         except ImportError:
             print("  - RAG: sentence-transformers not installed, falling back to keyword matching")
             self.use_embeddings = False
             self.model = None
 
+    @classmethod
+    def _load_model(cls, name: str):
+        """Return the process-wide SentenceTransformer, loading it on first use"""
+        with cls._model_lock:
+            if name not in cls._shared_models:
+                from sentence_transformers import SentenceTransformer
+                cls._shared_models[name] = SentenceTransformer(name)
+            return cls._shared_models[name]
+
+    def _encode(self, texts: List[str], **kwargs):
+        with self._model_lock:
+            return self.model.encode(texts, **kwargs)
+
     def build_index(self, test_cases: List[TestCase]) -> None:
         """Build the vector index from test cases
 
@@ -79,7 +98,7 @@ class RAGIndexer:
             import numpy as np
 
             # Generate embeddings
-            self.embeddings = self.model.encode(
+            self.embeddings = self._encode(
                 self.test_texts,
                 convert_to_numpy=True,
                 show_progress_bar=False
@@ -133,7 +152,7 @@ class RAGIndexer:
         import numpy as np
 
         # Encode query
-        query_embedding = self.model.encode([query], convert_to_numpy=True)
+        query_embedding = self._encode([query], convert_to_numpy=True)
 
         if self.index is not None:
             # Use FAISS
@@ -1,6 +1,7 @@
 from typing import Dict, List
 
 from testwright.agents.base import BaseAgent
+from testwright.llm.structured import INTEGER, STRING, STRING_LIST, array_of, object_schema
 from testwright.models.schemas import ParsedModule, ModuleSummary
 
 
@@ -21,6 +22,18 @@ Your task is to create a 2-line summary of what each module/page does, focusing
 
 These summaries will be used to match test cases that need post-verification with pages that can verify the results."""
 
+    @property
+    def output_schema(self) -> dict:
+        return object_schema({
+            "summaries": array_of(object_schema({
+                "module_id": INTEGER,
+                "summary": STRING,
+                "verification_keywords": STRING_LIST,
+                "can_verify_states": STRING_LIST,
+                "action_states": STRING_LIST,
+            })),
+        })
+
     def run(self, modules: List[ParsedModule]) -> Dict[int, ModuleSummary]:
         """Generate summaries for all modules in a single LLM call for efficiency"""
 
@@ -138,6 +151,7 @@ Examples:
 
         except Exception as e:
             print(f"Warning: Summary generation failed: {e}")
+            self.degraded.update(module.id for module in modules)
             # Fallback: create basic summaries
             return {
                 module.id: ModuleSummary(
@@ -1,12 +1,19 @@
 from typing import List, Dict
 
 from testwright.agents.base import BaseAgent
+from testwright.llm.structured import BOOLEAN, STRING, STRING_LIST, array_of, object_schema
 from testwright.models.schemas import TestCase, ModuleSummary
 
 
 class VerificationFlagAgent(BaseAgent):
     """Agent responsible for flagging test cases that need post-verification"""
 
+    continuation_key = "flagged_tests"
+    learn_max_tokens = False
+
+    # One flagged_tests entry: id, boolean, a state name or two and a short reason
+    output_tokens_per_item = 90
+
     @property
     def name(self) -> str:
         return "Verification Flag Agent"
@@ -35,6 +42,17 @@ DOES NOT NEED POST-VERIFICATION (needs_post_verification = false):
 - Password reset requests: External verification (email), out of scope
 - Search/Filter: Just filtering displayed data, no state change"""
 
+    @property
+    def output_schema(self) -> dict:
+        return object_schema({
+            "flagged_tests": array_of(object_schema({
+                "test_id": STRING,
+                "needs_post_verification": BOOLEAN,
+                "modifies_state": STRING_LIST,
+                "reason": STRING,
+            })),
+        })
+
     # ---- Heuristic pre-filter for read-only tests -------------------------
     # Steps/results containing ONLY these words are almost certainly read-only
     # and should never be flagged as state-changing.
@@ -119,13 +137,53 @@ DOES NOT NEED POST-VERIFICATION (needs_post_verification = false):
                 "expected_result": tc.expected_result
             })
 
-        prompt = f"""Analyze these POSITIVE test cases and determine which ones need post-verification.
+        # Pack tests into as few prompts as fit the model's token limits
+        batches = self._plan_batches(
+            tests_for_analysis,
+            lambda t: self._format_tests([t]),
+            self._build_prompt([], modules_context),
+        )
+        if len(batches) > 1:
+            print(f"  - Flagging {len(tests_for_analysis)} tests in {len(batches)} batches")
+
+        flags = {}
+        failed_batches = 0
+        for batch in batches:
+            try:
+                result = self.call_llm_json(
+                    self._build_prompt(batch, modules_context),
+                    max_tokens=self._batch_max_tokens(len(batch))
+                )
+                # Create lookup for flagged tests
+                flags.update({item["test_id"]: item for item in result.get("flagged_tests", [])})
+            except Exception as e:
+                print(f"Warning: Verification flagging failed for {len(batch)} tests: {e}")
+                self.degraded.update(test["id"] for test in batch)
+                failed_batches += 1
+
+        # Nothing was flagged: hand the tests back as given
+        if failed_batches == len(batches):
+            return test_cases
+
+        # Update test cases with flags (only actionable tests were sent to LLM)
+        for tc in actionable_tests:
+            if tc.id in flags:
+                flag_data = flags[tc.id]
+                tc.needs_post_verification = flag_data.get("needs_post_verification", False)
+                tc.modifies_state = flag_data.get("modifies_state", [])
 
-AVAILABLE MODULES AND THEIR CAPABILITIES:
-{modules_context}
+        # Combine back: actionable (LLM-flagged) + read-only (pre-filtered) + other types
+        return actionable_tests + read_only_tests + other_tests
 
-TEST CASES TO ANALYZE:
-{self._format_tests(tests_for_analysis)}
+    def _build_prompt(self, tests_for_analysis: List[dict], modules_context: str) -> str:
+        """Build the flagging prompt for a batch of tests
+
+        Static instructions come first and the module context next, so every
+        batch shares the same prompt prefix for provider-side prefix caching;
+        only the trailing test list differs between batches.
+        """
+
+        return f"""Analyze the POSITIVE test cases listed at the end and determine which ones need post-verification.
 
 For each test case, determine:
 1. needs_post_verification: true/false
@@ -155,27 +213,13 @@ RULES:
 3. Read-only tests should NEVER be flagged
 4. Login/logout/registration/password-reset should NOT be flagged
 5. Include ALL test cases in the output
-6. Use state names that match those defined in the module summaries"""
-
-        try:
-            result = self.call_llm_json(prompt, max_tokens=4000)
-
-            # Create lookup for flagged tests
-            flags = {item["test_id"]: item for item in result.get("flagged_tests", [])}
+6. Use state names that match those defined in the module summaries
 
-            # Update test cases with flags (only actionable tests were sent to LLM)
-            for tc in actionable_tests:
-                if tc.id in flags:
-                    flag_data = flags[tc.id]
-                    tc.needs_post_verification = flag_data.get("needs_post_verification", False)
-                    tc.modifies_state = flag_data.get("modifies_state", [])
-
-            # Combine back: actionable (LLM-flagged) + read-only (pre-filtered) + other types
-            return actionable_tests + read_only_tests + other_tests
+AVAILABLE MODULES AND THEIR CAPABILITIES:
+{modules_context}
 
-        except Exception as e:
-            print(f"Warning: Verification flagging failed: {e}")
-            return test_cases
+TEST CASES TO ANALYZE:
+{self._format_tests(tests_for_analysis)}"""
 
     def _build_modules_context(self, module_summaries: Dict[int, ModuleSummary]) -> str:
         """Build a context string describing all modules"""
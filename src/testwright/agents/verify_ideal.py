@@ -1,12 +1,19 @@
 from typing import List, Dict
 
 from testwright.agents.base import BaseAgent
+from testwright.llm.structured import BOOLEAN, STRING, array_of, enum, object_schema
 from testwright.models.schemas import TestCase, ModuleSummary, IdealVerification
 
 
 class IdealVerificationAgent(BaseAgent):
     """Agent responsible for generating ideal verification scenarios for flagged test cases"""
 
+    continuation_key = "test_verifications"
+    learn_max_tokens = False
+
+    # Up to three verifications per test, each with ten mostly free-text fields
+    output_tokens_per_item = 700
+
     @property
     def name(self) -> str:
         return "Ideal Verification Agent"
@@ -39,6 +46,26 @@ requires_different_session=true and explain who needs to be logged in.
 
 These are IDEAL verifications — we'll later match them to actual test cases that exist."""
 
+    @property
+    def output_schema(self) -> dict:
+        return object_schema({
+            "test_verifications": array_of(object_schema({
+                "test_id": STRING,
+                "ideal_verifications": array_of(object_schema({
+                    "description": STRING,
+                    "target_module": STRING,
+                    "verification_action": STRING,
+                    "expected_change": STRING,
+                    "state_to_verify": STRING,
+                    "execution_strategy": enum("before_after", "after_only"),
+                    "before_action": STRING,
+                    "after_action": STRING,
+                    "requires_different_session": BOOLEAN,
+                    "session_note": STRING,
+                })),
+            })),
+        })
+
     def run(
         self,
         flagged_tests: List[TestCase],
@@ -50,26 +77,52 @@ These are IDEAL verifications — we'll later match them to actual test cases th
             Dict mapping test_case_id to list of IdealVerification objects
         """
 
-        # Only process tests that need verification
-        tests_needing_verification = [tc for tc in flagged_tests if tc.needs_post_verification]
-
-        if not tests_needing_verification:
-            return {}
-
         # Build verification context from module summaries
         verification_context = self._build_verification_context(module_summaries)
 
-        # Process in batches to avoid token limits
+        # Process in batches sized to the model's token limits
         all_verifications = {}
-        batch_size = 10
-
-        for i in range(0, len(tests_needing_verification), batch_size):
-            batch = tests_needing_verification[i:i+batch_size]
+        for batch in self._batches(flagged_tests, verification_context):
             batch_verifications = self._generate_verifications_for_batch(batch, verification_context)
             all_verifications.update(batch_verifications)
 
         return all_verifications
 
+    async def arun(
+        self,
+        flagged_tests: List[TestCase],
+        module_summaries: Dict[int, ModuleSummary]
+    ) -> Dict[str, List[IdealVerification]]:
+        """Awaitable variant of run; batches are requested concurrently"""
+
+        verification_context = self._build_verification_context(module_summaries)
+
+        results = await self._agather_bounded(
+            self._agenerate_verifications_for_batch(batch, verification_context)
+            for batch in self._batches(flagged_tests, verification_context)
+        )
+
+        all_verifications = {}
+        for batch_verifications in results:
+            all_verifications.update(batch_verifications)
+        return all_verifications
+
+    def _batches(
+        self,
+        flagged_tests: List[TestCase],
+        verification_context: str
+    ) -> List[List[TestCase]]:
+        """Split the tests that need verification into the fewest prompts that fit"""
+
+        # Only process tests that need verification
+        tests_needing_verification = [tc for tc in flagged_tests if tc.needs_post_verification]
+
+        return self._plan_batches(
+            tests_needing_verification,
+            self._format_test,
+            self._build_batch_prompt([], verification_context),
+        )
+
     def _build_verification_context(self, module_summaries: Dict[int, ModuleSummary]) -> str:
         """Build context about what each module can verify.
 
@@ -104,10 +157,39 @@ These are IDEAL verifications — we'll later match them to actual test cases th
     ) -> Dict[str, List[IdealVerification]]:
         """Generate ideal verifications for a batch of test cases"""
 
-        # Format test cases for prompt
-        tests_text = ""
-        for tc in test_cases:
-            tests_text += f"""
+        try:
+            result = self.call_llm_json(
+                self._build_batch_prompt(test_cases, verification_context),
+                max_tokens=self._batch_max_tokens(len(test_cases))
+            )
+            return self._parse_verifications(result)
+        except Exception as e:
+            print(f"Warning: Ideal verification generation failed: {e}")
+            self.degraded.update(tc.id for tc in test_cases)
+            return {}
+
+    async def _agenerate_verifications_for_batch(
+        self,
+        test_cases: List[TestCase],
+        verification_context: str
+    ) -> Dict[str, List[IdealVerification]]:
+        """Awaitable variant of _generate_verifications_for_batch"""
+
+        try:
+            result = await self.acall_llm_json(
+                self._build_batch_prompt(test_cases, verification_context),
+                max_tokens=self._batch_max_tokens(len(test_cases))
+            )
+            return self._parse_verifications(result)
+        except Exception as e:
+            print(f"Warning: Ideal verification generation failed: {e}")
+            self.degraded.update(tc.id for tc in test_cases)
+            return {}
+
+    @staticmethod
+    def _format_test(tc: TestCase) -> str:
+        """Format one test case for the batch prompt"""
+        return f"""
 Test ID: {tc.id}
 Title: {tc.title}
 Module: {tc.module_title}
@@ -118,17 +200,23 @@ Expected Result: {tc.expected_result}
 ---
 """
 
-        prompt = f"""Generate IDEAL verification scenarios for each test case below.
+    def _build_batch_prompt(self, test_cases: List[TestCase], verification_context: str) -> str:
+        """Build the ideal verification prompt for a batch of test cases
 
-{verification_context}
+        The long static rules and examples come first, then the module
+        context shared by every batch, and the batch's test cases last, so
+        consecutive calls reuse the provider's cached prompt prefix.
+        """
 
-TEST CASES NEEDING VERIFICATION:
-{tests_text}
+        # Format test cases for prompt
+        tests_text = "".join(self._format_test(tc) for tc in test_cases)
+
+        return f"""Generate IDEAL verification scenarios for each test case listed at the end of this prompt.
 
 For each test case, generate 1-3 ideal verifications that would confirm the test truly succeeded.
 
 CRITICAL — CROSS-MODULE VERIFICATION RULE:
-When choosing target_module, consider ALL modules in the list above — not just the module
+When choosing target_module, consider ALL modules in the module list below — not just the module
 where the action takes place. Many actions are best verified from a DIFFERENT module.
 
 Examples of cross-module verification:
@@ -292,7 +380,7 @@ Return JSON:
             "ideal_verifications": [
                 {{
                     "description": "Concrete description of what to verify",
-                    "target_module": "Module name from the context above that can display this data",
+                    "target_module": "Module name from the module list below that can display this data",
                     "verification_action": "Specific action to take on that module",
                     "expected_change": "Exact expected outcome",
                     "state_to_verify": "state_name_from_module_summaries",
@@ -308,7 +396,7 @@ Return JSON:
 }}
 
 IMPORTANT:
-- target_module should be a module that CAN verify the state (from the context above)
+- target_module should be a module that CAN verify the state (from the module list below)
 - Be specific about what to check and what the expected outcome is
 - Include ALL test cases in the output
 - Only generate verifications that are actually achievable with the available modules
@@ -318,33 +406,34 @@ IMPORTANT:
 - ALWAYS set execution_strategy — default to "before_after" for any value/quantity change,
   "after_only" for new record/entry creation
 - For before_action: describe what specific data to RECORD before the action
-- For after_action: describe exactly what COMPARISON or CHECK to perform after"""
+- For after_action: describe exactly what COMPARISON or CHECK to perform after
 
-        try:
-            result = self.call_llm_json(prompt, max_tokens=4000)
-
-            verifications = {}
-            for item in result.get("test_verifications", []):
-                test_id = item.get("test_id")
-                if test_id:
-                    ideal_list = []
-                    for v in item.get("ideal_verifications", []):
-                        ideal_list.append(IdealVerification(
-                            description=v.get("description", ""),
-                            target_module=v.get("target_module", ""),
-                            verification_action=v.get("verification_action", ""),
-                            expected_change=v.get("expected_change", ""),
-                            state_to_verify=v.get("state_to_verify", ""),
-                            execution_strategy=v.get("execution_strategy", "after_only"),
-                            before_action=v.get("before_action", ""),
-                            after_action=v.get("after_action", ""),
-                            requires_different_session=v.get("requires_different_session", False),
-                            session_note=v.get("session_note", ""),
-                        ))
-                    verifications[test_id] = ideal_list
-
-            return verifications
+{verification_context}
 
-        except Exception as e:
-            print(f"Warning: Ideal verification generation failed: {e}")
-            return {}
+TEST CASES NEEDING VERIFICATION:
+{tests_text}"""
+
+    @staticmethod
+    def _parse_verifications(result: dict) -> Dict[str, List[IdealVerification]]:
+        """Parse the LLM response into IdealVerification objects per test ID"""
+        verifications = {}
+        for item in result.get("test_verifications", []):
+            test_id = item.get("test_id")
+            if test_id:
+                ideal_list = []
+                for v in item.get("ideal_verifications", []):
+                    ideal_list.append(IdealVerification(
+                        description=v.get("description", ""),
+                        target_module=v.get("target_module", ""),
+                        verification_action=v.get("verification_action", ""),
+                        expected_change=v.get("expected_change", ""),
+                        state_to_verify=v.get("state_to_verify", ""),
+                        execution_strategy=v.get("execution_strategy", "after_only"),
+                        before_action=v.get("before_action", ""),
+                        after_action=v.get("after_action", ""),
+                        requires_different_session=v.get("requires_different_session", False),
+                        session_note=v.get("session_note", ""),
+                    ))
+                verifications[test_id] = ideal_list
+
+        return verifications
@@ -2,6 +2,7 @@ from typing import List, Dict
 
 from testwright.agents.base import BaseAgent
 from testwright.agents.rag_indexer import RAGIndexer
+from testwright.llm.structured import NULLABLE_STRING, NUMBER, STRING, enum, object_schema
 from testwright.models.schemas import TestCase, ModuleSummary, IdealVerification, VerificationMatch
 
 
@@ -40,6 +41,19 @@ Consider:
 3. For before_after: can it observe the data? (sufficient for full match)
 4. For after_only: can it confirm the expected outcome?"""
 
+    @property
+    def output_schema(self) -> dict:
+        return object_schema({
+            "best_match": object_schema({
+                "test_id": NULLABLE_STRING,
+                "status": enum("found", "partial", "not_found"),
+                "confidence": NUMBER,
+                "execution_note": STRING,
+                "reason": STRING,
+                "suggested_manual_step": STRING,
+            }),
+        })
+
     def run(
         self,
         flagged_tests: List[TestCase],
@@ -318,6 +332,7 @@ STATUS DEFINITIONS:
 
         except Exception as e:
             print(f"Warning: Candidate validation failed: {e}")
+            self.degraded.add(ideal.description)
             # Fallback: use best candidate by score
             if candidates:
                 best_tc, best_score = candidates[0]
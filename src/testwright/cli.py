@@ -4,12 +4,16 @@ TestWright CLI - AI-powered test case generation from functional specifications.
 
 Usage:
     testwright --generate --input spec.json --api-key "sk-..." --provider openai --output output/
+    testwright --batch examples/parabank examples/moodle/functional_specification_student.md --api-key "sk-..." --output output/
+    testwright --benchmark --input spec.json --provider replay --replay-file session.jsonl --replay-latency-scale 1
     testwright export-md --input output/test-cases.json --output output/test-cases.md
 """
 
 import argparse
 import json
+import os
 import sys
+import time
 from pathlib import Path
 
 import testwright
@@ -27,14 +31,102 @@ def main():
 
     # Generate command (also accessible via --generate flag for backward compat)
     parser.add_argument("--generate", action="store_true", help="Generate test cases")
+    parser.add_argument("--benchmark", action="store_true",
+                       help="Run the pipeline with sequential, parallel and pipelined stages and compare wall time")
+    parser.add_argument("--batch", nargs="+", metavar="SPEC",
+                       help="Generate several specs (directories, .md or .json files) concurrently, "
+                            "each into its own directory under --output")
     parser.add_argument("--input", "-i", help="Path to functional description directory or JSON file")
     parser.add_argument("--api-key", help="API key for LLM provider")
     parser.add_argument("--model", default="gpt-4o", help="Model to use (default: gpt-4o)")
-    parser.add_argument("--provider", default="openai", choices=["openai", "github", "openrouter"],
-                       help="LLM provider (default: openai)")
+    parser.add_argument("--provider", default="openai", choices=["openai", "github", "openrouter", "replay"],
+                       help="LLM provider; 'replay' serves --replay-file offline (default: openai)")
     parser.add_argument("--output", "-o", default="output", help="Output directory (default: output)")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
-    parser.add_argument("--debug-file", default="debug_log.txt", help="Debug log file path")
+    parser.add_argument("--debug-file", default="debug_log.jsonl", help="Debug log file path (JSONL)")
+    parser.add_argument("--debug-max-mb", type=int, default=50, metavar="MB",
+                       help="Rotate the debug log at this size (default: 50, 0 disables)")
+    parser.add_argument("--debug-backups", type=int, default=5, metavar="N",
+                       help="Rotated debug log segments to keep (default: 5)")
+    parser.add_argument("--debug-gzip", action="store_true",
+                       help="Gzip rotated debug log segments")
+    parser.add_argument("--debug-max-payload", type=int, default=None, metavar="CHARS",
+                       help="Truncate logged prompts/responses longer than this (default: keep all)")
+    parser.add_argument("--debug-sample", type=float, default=0.0, metavar="RATE",
+                       help="Fraction of calls whose long payloads are logged in full anyway (default: 0)")
+    parser.add_argument("--max-connections", type=int, default=20,
+                       help="Maximum pooled HTTP connections per provider (default: 20)")
+    parser.add_argument("--no-http2", action="store_true",
+                       help="Disable HTTP/2 even when the h2 package is installed")
+    parser.add_argument("--cache-dir", help="Directory for the persistent LLM response cache (off by default)")
+    parser.add_argument("--cache-max-mb", type=int, default=512,
+                       help="Maximum cache size in MB before LRU eviction (default: 512)")
+    parser.add_argument("--cache-ttl", type=float, default=None,
+                       help="Expire cached responses after this many seconds (default: never)")
+    parser.add_argument("--memo-dir", default=None, metavar="DIR",
+                       help="Store each stage's output and reuse it while its code and inputs are unchanged")
+    parser.add_argument("--memo-max-mb", type=int, default=1024,
+                       help="Maximum stage store size in MB before LRU eviction (default: 1024)")
+    parser.add_argument("--max-retries", type=int, default=3,
+                       help="Retries for 429/5xx/network errors with jittered backoff (default: 3)")
+    parser.add_argument("--breaker-threshold", type=int, default=5,
+                       help="Consecutive provider failures before calls are shed (default: 5)")
+    parser.add_argument("--stream", action="store_true",
+                       help="Stream test generation responses and parse test cases incrementally")
+    parser.add_argument("--no-structured-output", action="store_true",
+                       help="Disable json_schema response_format and use prompt-based JSON")
+    parser.add_argument("--fixed-max-tokens", action="store_true",
+                       help="Always request each agent's full max_tokens instead of the learned size")
+    parser.add_argument("--concurrency", type=int, default=8, metavar="N",
+                       help="Modules or chunks a stage processes at once, e.g. parallel test generation (default: 8)")
+    parser.add_argument("--pipeline", action="store_true",
+                       help="Take each module through parse, chunking and test generation independently")
+    parser.add_argument("--sequential-stages", action="store_true",
+                       help="Run navigation, chunking and summaries one after another instead of in parallel")
+    parser.add_argument("--full", action="store_true",
+                       help="Regenerate every module instead of reusing unchanged ones from the previous run")
+    parser.add_argument("--resume", default=None, metavar="RUN_ID",
+                       help="Continue an interrupted run in --output from its first incomplete stage")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                       help="Do not snapshot the pipeline state to <output>/checkpoints.sqlite")
+    parser.add_argument("--rpm", type=int, default=None,
+                       help="Provider requests-per-minute quota to pace under (default: unlimited)")
+    parser.add_argument("--tpm", type=int, default=None,
+                       help="Provider tokens-per-minute quota to pace under (default: unlimited)")
+    parser.add_argument("--metrics-jsonl", default=None, metavar="PATH",
+                       help="Write one JSON record per LLM call (tokens, latency, retries, status)")
+    parser.add_argument("--metrics-prom", default=None, metavar="PATH",
+                       help="Write per-agent LLM metrics in Prometheus text format")
+    parser.add_argument("--record", default=None, metavar="PATH",
+                       help="Capture every LLM exchange to a JSONL file for later --provider replay")
+    parser.add_argument("--replay-file", default=None, metavar="PATH",
+                       help="Recorded session (JSONL capture or debug log) for --provider replay")
+    parser.add_argument("--replay-latency", type=float, default=0.0, metavar="SECS",
+                       help="Synthetic latency per replayed call (default: 0)")
+    parser.add_argument("--replay-jitter", type=float, default=0.0, metavar="FRAC",
+                       help="Random +/- fraction applied to the replay latency (default: 0)")
+    parser.add_argument("--replay-latency-scale", type=float, default=None, metavar="X",
+                       help="Replay each call's recorded latency scaled by X instead")
+    parser.add_argument("--hedge", action="store_true",
+                       help="Duplicate slow calls to a secondary route and fail over to it on errors")
+    parser.add_argument("--hedge-provider", default=None, choices=["openai", "github", "openrouter"],
+                       help="Secondary provider for --hedge (default: same provider)")
+    parser.add_argument("--hedge-model", default=None,
+                       help="Secondary model for --hedge (default: same model)")
+    parser.add_argument("--hedge-api-key", default=None,
+                       help="Secondary API key for --hedge (default: same key)")
+    parser.add_argument("--hedge-percentile", type=float, default=95.0, metavar="P",
+                       help="Hedge calls slower than this latency percentile (default: 95)")
+    parser.add_argument("--batch-api", action="store_true",
+                       help="Submit chunking and test generation as provider batch jobs (slower, cheaper)")
+    parser.add_argument("--batch-dir", default=None, metavar="PATH",
+                       help="Directory for batch job files (default: <output>/batch)")
+    parser.add_argument("--batch-poll", type=float, default=30.0, metavar="SECS",
+                       help="Seconds between batch job status checks (default: 30)")
+    parser.add_argument("--batch-timeout", type=float, default=24 * 3600, metavar="SECS",
+                       help="Cancel a batch job and fall back to direct calls after this long (default: 86400)")
+    parser.add_argument("--batch-local", action="store_true",
+                       help="Run batch jobs on a local file-based stand-in server instead of the provider")
 
     # Export markdown subcommand
     export_parser = subparsers.add_parser("export-md", help="Export test cases JSON to Markdown")
@@ -45,8 +137,12 @@ def main():
 
     if args.command == "export-md":
         return _export_markdown(args)
+    elif args.batch:
+        return _generate_batch(args)
     elif args.generate:
         return _generate(args)
+    elif args.benchmark:
+        return _benchmark(args)
     else:
         parser.print_help()
         return 1
@@ -54,49 +150,218 @@ def main():
 
 def _generate(args):
     """Run the test case generation pipeline."""
-    if not args.input:
-        print("Error: --input is required for generation")
+    functional_desc = _load_input(args)
+    if functional_desc is None:
         return 1
+
+    if args.resume and args.no_checkpoint:
+        print("Error: --resume needs checkpoints; drop --no-checkpoint")
+        return 1
+
+    with _make_generator(args) as generator:
+        try:
+            output = generator.generate(functional_desc, output_dir=args.output, resume=args.resume)
+        except ValueError as e:
+            if not args.resume:
+                raise
+            print(f"Error: {e}")
+            return 1
+
+    print(f"\nGeneration complete!")
+    print(f"  Total tests: {output.summary.get('total_tests', 0)}")
+    print(f"  Output: {args.output}/")
+    return 0
+
+
+def _generate_batch(args):
+    """Generate several specs concurrently with one shared generator."""
+    if args.resume:
+        print("Error: --resume continues a single run; use it with --input instead of --batch")
+        return 1
+    if not _check_args(args):
+        return 1
+
+    specs = {}
+    for spec in args.batch:
+        path = Path(spec)
+        functional_desc = _load_spec(path)
+        if functional_desc is None:
+            return 1
+        name = candidate = _spec_name(path)
+        n = 2
+        while os.path.join(args.output, candidate) in specs:
+            candidate = f"{name}-{n}"
+            n += 1
+        specs[os.path.join(args.output, candidate)] = functional_desc
+
+    with _make_generator(args) as generator:
+        results = generator.generate_many(specs)
+
+    print(f"\nBatch complete: {len(results)} of {len(specs)} spec(s) generated")
+    for output_dir, output in results.items():
+        print(f"  - {output_dir}/: {output.summary.get('total_tests', 0)} tests")
+    return 0 if len(results) == len(specs) else 1
+
+
+def _benchmark(args):
+    """Time the pipeline with sequential, parallel and pipelined stages on the same input."""
+    functional_desc = _load_input(args)
+    if functional_desc is None:
+        return 1
+    if args.provider != "replay":
+        print("Note: benchmarking a live provider pays for every call twice; "
+              "record a run with --record and benchmark it with --provider replay")
+    if args.cache_dir:
+        print("Note: the second run is served from --cache-dir; drop it for a fair comparison")
+    if args.memo_dir:
+        print("Note: --memo-dir is ignored while benchmarking")
+        args.memo_dir = None
+
+    # Every mode must do the full work to be comparable
+    args.full = True
+    results = {}
+    modes = (("sequential", True, False), ("parallel", False, False), ("pipelined", False, True))
+    for label, sequential, pipeline in modes:
+        args.sequential_stages = sequential
+        args.pipeline = pipeline
+        with _make_generator(args) as generator:
+            start = time.perf_counter()
+            output = generator.generate(functional_desc, output_dir=os.path.join(args.output, f"benchmark-{label}"))
+            results[label] = (time.perf_counter() - start, len(output.test_cases))
+
+    print("\nBenchmark:")
+    for label, (seconds, tests) in results.items():
+        print(f"  - {label}: {seconds:.1f}s ({tests} test cases)")
+    baseline = results["sequential"][0]
+    for label in ("parallel", "pipelined"):
+        saved = baseline - results[label][0]
+        print(f"  - Saved by {label} run: {saved:.1f}s "
+              f"({saved / baseline * 100 if baseline else 0:.0f}%)")
+    return 0
+
+
+def _load_input(args):
+    """Validate the generation arguments and load the functional description (None on error)."""
+    if not args.input and not args.resume:
+        print("Error: --input is required for generation")
+        return None
+    if not _check_args(args):
+        return None
+    if not args.input:
+        # A resumed run reads its functional description from the checkpoint
+        return {}
+    return _load_spec(Path(args.input))
+
+
+def _check_args(args) -> bool:
+    """Validate the provider options shared by every generation mode."""
+    if args.provider == "replay":
+        if not args.replay_file:
+            print("Error: --replay-file is required with --provider replay")
+            return False
+        args.api_key = args.api_key or "replay"
     if not args.api_key:
         print("Error: --api-key is required for generation")
-        return 1
+        return False
+    if args.hedge and not (args.hedge_provider or args.hedge_model or args.hedge_api_key):
+        print("Error: --hedge needs --hedge-provider, --hedge-model or --hedge-api-key")
+        return False
+    return True
 
-    input_path = Path(args.input)
+
+def _load_spec(input_path: Path):
+    """Load a functional description from a directory, a markdown spec or JSON (None on error)."""
     if not input_path.exists():
         print(f"Error: Input path not found: {input_path}")
-        return 1
+        return None
 
     # Build functional description from input
     if input_path.is_dir():
-        functional_desc = _load_from_directory(input_path)
-    else:
-        with open(input_path, 'r') as f:
-            functional_desc = json.load(f)
+        return _load_from_directory(input_path)
+    if input_path.suffix == ".md":
+        # e.g. examples/moodle/functional_specification_student.md
+        return _load_from_directory(input_path.parent, input_path)
+    with open(input_path, 'r') as f:
+        return json.load(f)
+
 
-    generator = TestCaseGenerator(
+def _spec_name(input_path: Path) -> str:
+    """Output directory name of a spec, e.g. moodle-student for moodle/functional_specification_student.md."""
+    input_path = input_path.resolve()
+    if input_path.is_dir():
+        return input_path.name
+    stem = input_path.stem
+    if stem == "functional_specification":
+        return input_path.parent.name
+    if stem.startswith("functional_specification_"):
+        return f"{input_path.parent.name}-{stem[len('functional_specification_'):]}"
+    return stem
+
+
+def _make_generator(args) -> TestCaseGenerator:
+    """Build a TestCaseGenerator from the parsed command-line options."""
+    return TestCaseGenerator(
         api_key=args.api_key,
         model=args.model,
         provider=args.provider,
         debug=args.debug,
         debug_file=args.debug_file,
+        debug_max_mb=args.debug_max_mb,
+        debug_backups=args.debug_backups,
+        debug_compress=args.debug_gzip,
+        debug_max_payload=args.debug_max_payload,
+        debug_sample_rate=args.debug_sample,
+        max_connections=args.max_connections,
+        http2=not args.no_http2,
+        cache_dir=args.cache_dir,
+        cache_max_mb=args.cache_max_mb,
+        cache_ttl=args.cache_ttl,
+        memo_dir=args.memo_dir,
+        memo_max_mb=args.memo_max_mb,
+        max_retries=args.max_retries,
+        breaker_threshold=args.breaker_threshold,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        stream=args.stream,
+        structured_output=not args.no_structured_output,
+        adaptive_max_tokens=not args.fixed_max_tokens,
+        parallel_stages=not args.sequential_stages,
+        pipeline_modules=args.pipeline,
+        concurrency=args.concurrency,
+        checkpoint=not args.no_checkpoint,
+        incremental=not args.full,
+        metrics_jsonl=args.metrics_jsonl,
+        metrics_prometheus=args.metrics_prom,
+        replay_file=args.replay_file,
+        replay_latency=args.replay_latency,
+        replay_jitter=args.replay_jitter,
+        replay_latency_scale=args.replay_latency_scale,
+        record_file=args.record,
+        hedge=args.hedge,
+        hedge_provider=args.hedge_provider,
+        hedge_model=args.hedge_model,
+        hedge_api_key=args.hedge_api_key,
+        hedge_percentile=args.hedge_percentile,
+        batch_api=args.batch_api,
+        batch_dir=args.batch_dir,
+        batch_poll_interval=args.batch_poll,
+        batch_timeout=args.batch_timeout,
+        batch_local=args.batch_local,
     )
 
-    output = generator.generate(functional_desc, output_dir=args.output)
-
-    print(f"\nGeneration complete!")
-    print(f"  Total tests: {output.summary.get('total_tests', 0)}")
-    print(f"  Output: {args.output}/")
-    return 0
 
+def _load_from_directory(dir_path: Path, spec_file: Path = None) -> dict:
+    """Load functional description from a directory of markdown files.
 
-def _load_from_directory(dir_path: Path) -> dict:
-    """Load functional description from a directory of markdown files."""
-    spec_file = dir_path / "functional_specification.md"
+    ``spec_file`` selects a variant such as functional_specification_student.md;
+    navigation.md and mock_data.md are shared from the same directory.
+    """
+    spec_file = spec_file or dir_path / "functional_specification.md"
     nav_file = dir_path / "navigation.md"
     mock_file = dir_path / "mock_data.md"
 
     if not spec_file.exists():
-        print(f"Error: functional_specification.md not found in {dir_path}")
+        print(f"Error: {spec_file.name} not found in {dir_path}")
         sys.exit(1)
 
     # Read the specification
@@ -135,7 +400,10 @@ def _load_from_directory(dir_path: Path) -> dict:
         mock_data = mock_file.read_text(encoding='utf-8')
 
     # Build the project name from directory name
-    project_name = dir_path.name.replace('-', ' ').replace('_', ' ').title()
+    project_name = dir_path.resolve().name.replace('-', ' ').replace('_', ' ').title()
+    variant = spec_file.stem.replace("functional_specification", "", 1).strip("_- ")
+    if variant:
+        project_name += " " + variant.replace('-', ' ').replace('_', ' ').title()
 
     return {
         "project_name": project_name,
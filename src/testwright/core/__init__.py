@@ -1,7 +1,8 @@
 """Core pipeline orchestration."""
 
+from testwright.core.checkpoint import SqliteCheckpointer
 from testwright.core.generator import TestCaseGenerator
 from testwright.core.graph import build_graph
 from testwright.core.state import PipelineState
 
-__all__ = ["TestCaseGenerator", "build_graph", "PipelineState"]
+__all__ = ["TestCaseGenerator", "build_graph", "PipelineState", "SqliteCheckpointer"]
@@ -0,0 +1,386 @@
+"""
+Durable LangGraph checkpoints in a local SQLite file.
+
+``SqliteCheckpointer`` is a ``BaseCheckpointSaver`` that stores the
+snapshot LangGraph takes after every node, plus the writes of nodes that
+finished inside a superstep that later failed.  Invoking the compiled
+graph again with the same ``thread_id`` (the run id) and no input picks
+up at the first node that did not complete; everything before it --
+parse, chunking, test generation -- is loaded instead of re-requested.
+
+State values are encoded with ``SchemaSerializer``.  Channels listed in
+``transient`` (the API key) are never written to disk; their current
+value is supplied again when the checkpointer is opened for a resume.
+"""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_serializable_checkpoint_metadata,
+)
+from langgraph.constants import START
+
+from testwright.models.serialization import SchemaSerializer
+
+# Marker for a channel that has a version but no stored value
+_EMPTY = "empty"
+
+
+class SqliteCheckpointer(BaseCheckpointSaver[str]):
+    """Thread-safe LangGraph checkpoint saver backed by one SQLite file"""
+
+    def __init__(self, path: str, transient: Optional[Dict[str, Any]] = None):
+        """Open (or create) the checkpoint file
+
+        Args:
+            path: SQLite file path; parent directories are created
+            transient: Channel name -> value for state that must not be
+                persisted; the value is restored on load instead
+        """
+        super().__init__(serde=SchemaSerializer())
+        self.path = path
+        self.transient = dict(transient or {})
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                blob BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT NOT NULL,
+                blob BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );"""
+        )
+        self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # BaseCheckpointSaver API
+    # ------------------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """The checkpoint named by ``config``, or the thread's latest one"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: Tuple[Any, ...] = (thread_id, checkpoint_ns)
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        if row is None:
+            return None
+        return self._tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Checkpoints matching the criteria, newest first"""
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        clauses: List[str] = []
+        params: List[Any] = []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before is not None and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                return
+            result = self._tuple(thread_id, checkpoint_ns, tuple(row))
+            if filter and not all(result.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield result
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint and the channel values that changed with it"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values: Dict[str, Any] = stored.pop("channel_values")  # type: ignore[misc]
+
+        blob_rows = []
+        for channel, version in new_versions.items():
+            if channel in values and channel not in self.transient:
+                type_, blob = self.serde.dumps_typed(self._strip(channel, values[channel]))
+            else:
+                type_, blob = _EMPTY, None
+            blob_rows.append((thread_id, checkpoint_ns, channel, str(version), type_, blob))
+        type_, payload = self.serde.dumps_typed(stored)
+        metadata_type, metadata_payload = self.serde.dumps_typed(
+            get_serializable_checkpoint_metadata(config, metadata)
+        )
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blob_rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_, payload, metadata_type, metadata_payload, time.time(),
+                ),
+            )
+            self._conn.commit()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store the writes of a task that finished before the next checkpoint"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            if channel in self.transient:
+                type_, blob = _EMPTY, None
+            else:
+                type_, blob = self.serde.dumps_typed(self._strip(channel, value))
+            rows.append((
+                thread_id, checkpoint_ns, checkpoint_id, task_id,
+                WRITES_IDX_MAP.get(channel, idx), channel, type_, blob, task_path,
+            ))
+        # Special writes (errors, interrupts; negative idx) replace earlier
+        # ones, regular writes of a task are stored once
+        special = [row for row in rows if row[4] < 0]
+        regular = [row for row in rows if row[4] >= 0]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", special)
+            self._conn.executemany("INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", regular)
+            self._conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint and write of one run"""
+        with self._lock:
+            for table in ("checkpoints", "blobs", "writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        """Zero-padded, so versions sort correctly as text"""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # ------------------------------------------------------------------
+    # Run bookkeeping
+    # ------------------------------------------------------------------
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """Checkpointed runs, newest first: run id, last checkpoint time and step"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id, MAX(created), COUNT(*) FROM checkpoints "
+                "GROUP BY thread_id ORDER BY MAX(created) DESC"
+            ).fetchall()
+        return [{"run_id": r[0], "updated": r[1], "checkpoints": r[2]} for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Private helpers
+    # ------------------------------------------------------------------
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row: Tuple[Any, ...]) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, payload, metadata_type, metadata_payload = row
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, payload))
+        checkpoint = {
+            **checkpoint,
+            "channel_values": self._load_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+        }
+
+        with self._lock:
+            writes = self._conn.execute(
+                "SELECT task_id, channel, type, blob, task_path, idx FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+                "ORDER BY task_path, task_id, idx",  # writes_sort_key order
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchall()
+
+        def parent_config(checkpoint_id: Optional[str]) -> Optional[RunnableConfig]:
+            if not checkpoint_id:
+                return None
+            return {"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id,
+            }}
+
+        return CheckpointTuple(
+            config=parent_config(checkpoint_id),  # type: ignore[arg-type]
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((metadata_type, metadata_payload)),
+            parent_config=parent_config(parent_id),
+            pending_writes=[
+                (task_id, channel, self._load_value(channel, type_, blob))
+                for task_id, channel, type_, blob, _, _ in writes
+            ],
+        )
+
+    def _strip(self, channel: str, value: Any) -> Any:
+        # The graph input carries every state key, transient ones included
+        if channel == START and isinstance(value, dict):
+            return {k: v for k, v in value.items() if k not in self.transient}
+        return value
+
+    def _load_value(self, channel: str, type_: str, blob: Optional[bytes]) -> Any:
+        if channel in self.transient:
+            return self.transient[channel]
+        value = self.serde.loads_typed((type_, blob))
+        if channel == START and isinstance(value, dict):
+            return {**value, **self.transient}
+        return value
+
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        if not versions:
+            return {}
+        keys = [(channel, str(version)) for channel, version in versions.items()]
+        placeholders = " OR ".join(["(channel = ? AND version = ?)"] * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT channel, type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                f"AND ({placeholders})",
+                [thread_id, checkpoint_ns] + [part for key in keys for part in key],
+            ).fetchall()
+
+        values: Dict[str, Any] = {}
+        for channel, type_, blob in rows:
+            if channel in self.transient:
+                values[channel] = self.transient[channel]
+            elif type_ != _EMPTY:
+                values[channel] = self._load_value(channel, type_, blob)
+        return values
@@ -8,11 +8,32 @@ existing callers keep working.
 
 import json
 import os
-from typing import Any, Dict
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import httpx
+from typing import Any, Dict, Optional, Sequence, Tuple
 
 from testwright.agents.base import BaseAgent
-from testwright.core.graph import build_graph
+from testwright.core.checkpoint import SqliteCheckpointer
+from testwright.core.graph import PARALLEL_STAGES, PIPELINED_STAGES, build_graph
+from testwright.core.manifest import load_manifest, reusable_modules
+from testwright.core.memo import ArtifactStore
 from testwright.core.state import PipelineState
+from testwright.llm.batch import BatchRunner, LocalBatchTransport
+from testwright.llm.cache import ResponseCache
+from testwright.llm.continuation import OutputBudget
+from testwright.llm.debuglog import DebugLogger
+from testwright.llm.hedging import HedgePolicy, Route
+from testwright.llm.metrics import CallMetrics
+from testwright.llm.pool import HTTPPool
+from testwright.llm.ratelimit import RateLimiter
+from testwright.llm.replay import ReplayTransport, SessionRecorder
+from testwright.llm.retry import RetryPolicy
+from testwright.llm.singleflight import SingleFlight
+from testwright.llm.structured import StructuredOutputStats
 from testwright.models.schemas import TestSuiteOutput
 
 
@@ -29,21 +50,200 @@ class TestCaseGenerator:
         model: str = "gpt-4o",
         provider: str = "openai",
         debug: bool = False,
-        debug_file: str = "debug_log.txt",
+        debug_file: str = "debug_log.jsonl",
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        http2: bool = True,
+        cache_dir: Optional[str] = None,
+        cache_max_mb: int = 512,
+        cache_ttl: Optional[float] = None,
+        memo_dir: Optional[str] = None,
+        memo_max_mb: int = 1024,
+        max_retries: int = 3,
+        retry_max_delay: float = 60.0,
+        breaker_threshold: int = 5,
+        breaker_timeout: float = 30.0,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        stream: bool = False,
+        structured_output: bool = True,
+        parallel_stages: bool = True,
+        pipeline_modules: bool = False,
+        concurrency: int = 8,
+        checkpoint: bool = True,
+        incremental: bool = True,
+        adaptive_max_tokens: bool = True,
+        metrics_jsonl: Optional[str] = None,
+        metrics_prometheus: Optional[str] = None,
+        replay_file: Optional[str] = None,
+        replay_latency: float = 0.0,
+        replay_jitter: float = 0.0,
+        replay_latency_scale: Optional[float] = None,
+        record_file: Optional[str] = None,
+        hedge: bool = False,
+        hedge_provider: Optional[str] = None,
+        hedge_model: Optional[str] = None,
+        hedge_api_key: Optional[str] = None,
+        hedge_percentile: float = 95.0,
+        batch_api: bool = False,
+        batch_dir: Optional[str] = None,
+        batch_poll_interval: float = 30.0,
+        batch_timeout: float = 24 * 3600,
+        batch_local: bool = False,
+        debug_max_mb: int = 50,
+        debug_backups: int = 5,
+        debug_compress: bool = False,
+        debug_max_payload: Optional[int] = None,
+        debug_sample_rate: float = 0.0,
     ):
         self.api_key = api_key
         self.model = model
         self.provider = provider
         self.debug = debug
         self.debug_file = debug_file
+        self.stream = stream
 
-        # Initialize debug session once
+        # Initialize debug session once; records are written off-thread as JSONL
+        self.debug_logger: Optional[DebugLogger] = None
         if debug:
+            self.debug_logger = DebugLogger(
+                debug_file,
+                max_bytes=debug_max_mb * 1024 * 1024,
+                backups=debug_backups,
+                compress=debug_compress,
+                max_payload=debug_max_payload,
+                sample_rate=debug_sample_rate,
+            )
+            BaseAgent.configure_debug_log(self.debug_logger)
             BaseAgent.reset_debug_state()
             BaseAgent.init_debug_session(debug_file, model)
 
+        # One connection pool shared by every agent built during this
+        # generator's lifetime
+        self.pool = HTTPPool(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            http2=http2,
+        )
+        BaseAgent.configure_pool(self.pool)
+
+        # Offline provider: serve a recorded session instead of the network
+        self.replay: Optional[ReplayTransport] = None
+        if provider == "replay":
+            if not replay_file:
+                raise ValueError("provider 'replay' needs replay_file (a JSONL capture or debug log)")
+            self.replay = ReplayTransport.from_file(
+                replay_file,
+                latency=replay_latency,
+                jitter=replay_jitter,
+                latency_scale=replay_latency_scale,
+            )
+            self.pool.mount("replay", self.replay)
+        elif record_file:
+            self.pool.set_recorder(SessionRecorder(record_file))
+
+        # Optional on-disk response cache so unchanged re-runs are free
+        self.cache: Optional[ResponseCache] = None
+        if cache_dir:
+            self.cache = ResponseCache(
+                os.path.join(cache_dir, "llm_cache.sqlite"),
+                max_bytes=cache_max_mb * 1024 * 1024,
+                ttl=cache_ttl,
+            )
+        BaseAgent.configure_cache(self.cache)
+
+        # Retry 429/5xx with jittered backoff; shed load while a provider is down
+        self.retry_policy = RetryPolicy(max_retries=max_retries, max_delay=retry_max_delay)
+        BaseAgent.configure_retry(
+            self.retry_policy,
+            failure_threshold=breaker_threshold,
+            recovery_timeout=breaker_timeout,
+        )
+
+        # Pace requests under the provider's RPM/TPM quota instead of hitting 429s
+        self.rate_limiter: Optional[RateLimiter] = None
+        if requests_per_minute or tokens_per_minute:
+            self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        BaseAgent.configure_rate_limit(self.rate_limiter)
+
+        # Provider-enforced JSON schemas replace the parse-and-re-ask loop
+        self.structured_stats = StructuredOutputStats()
+        BaseAgent.configure_structured_output(self.structured_stats, enabled=structured_output)
+
+        # Size max_tokens to what each agent actually emits; truncated
+        # answers are continued instead of re-asked
+        self.output_budget: Optional[OutputBudget] = OutputBudget() if adaptive_max_tokens else None
+        BaseAgent.configure_output_budget(self.output_budget)
+
+        # Per-call tokens, latency and cost, rolled up per agent in the summary
+        self.metrics = CallMetrics()
+        self.metrics_jsonl = metrics_jsonl
+        self.metrics_prometheus = metrics_prometheus
+        BaseAgent.configure_metrics(self.metrics)
+
+        # Concurrent identical requests wait on a single network call
+        self.single_flight = SingleFlight()
+        BaseAgent.configure_single_flight(self.single_flight)
+
+        # Race slow or failing calls against a secondary provider/model/key
+        self.hedge_policy: Optional[HedgePolicy] = None
+        if hedge:
+            route = Route(provider=hedge_provider, model=hedge_model, api_key=hedge_api_key)
+            if route == Route():
+                raise ValueError("hedging needs a secondary route (hedge_provider, hedge_model or hedge_api_key)")
+            self.hedge_policy = HedgePolicy([route], percentile=hedge_percentile)
+        BaseAgent.configure_hedging(self.hedge_policy)
+
+        # Submit whole stages as discounted batch jobs instead of live calls
+        self.batch_dir = batch_dir
+        self.batch_runner: Optional[BatchRunner] = None
+        self.batch_server: Optional[LocalBatchTransport] = None
+        if batch_api:
+            if batch_local or provider == "replay":
+                # File-based stand-in that answers each job through the replay
+                # session or, for real providers, one live call per request
+                backend = self.replay if self.replay is not None else httpx.HTTPTransport()
+                self.batch_server = LocalBatchTransport(os.path.join(batch_dir or "batch", "server"), backend)
+            self.batch_runner = BatchRunner(
+                batch_dir or "batch",
+                poll_interval=batch_poll_interval,
+                timeout=batch_timeout,
+                transport=self.batch_server,
+            )
+            if stream:
+                print("Note: batch-API mode ignores --stream")
+                self.stream = False
+            if pipeline_modules:
+                # Batch jobs need a whole stage's requests up front
+                print("Note: batch-API mode ignores --pipeline")
+                pipeline_modules = False
+        BaseAgent.configure_batch(self.batch_runner)
+
+        # Per-item fan-out inside a stage (modules while parsing, chunks while
+        # generating tests), or the whole worker pool when pipelining modules
+        self.concurrency = concurrency
+        BaseAgent.configure_concurrency(concurrency)
+
+        # Optional store of node outputs, keyed by each node's code and inputs
+        self.memo: Optional[ArtifactStore] = None
+        if memo_dir:
+            self.memo = ArtifactStore(
+                os.path.join(memo_dir, "artifacts.sqlite"),
+                max_bytes=memo_max_mb * 1024 * 1024,
+            )
+
         # Compile the LangGraph pipeline once
-        self.graph = build_graph()
+        self.parallel_stages = parallel_stages
+        self.pipeline_modules = pipeline_modules
+        self.graph = build_graph(parallel=parallel_stages, pipelined=pipeline_modules, memo=self.memo)
+        # Snapshot the state after every node into <output_dir>/checkpoints.sqlite
+        self.checkpoint = checkpoint
+        # Reuse unchanged modules' tests from the previous run's manifest.json
+        self.incremental = incremental
+        self.run_id: Optional[str] = None
+        self.spec_errors: Dict[str, Exception] = {}
+        self._print_lock = threading.Lock()
+        self.stage_timings: Dict[str, Tuple[float, float]] = {}
 
     # ------------------------------------------------------------------
     # Public API
@@ -51,20 +251,97 @@ class TestCaseGenerator:
 
     def generate(
         self,
-        functional_desc: str | Dict[str, Any],
+        functional_desc: Optional[str | Dict[str, Any]],
         output_dir: str = "output",
+        resume: Optional[str] = None,
     ) -> TestSuiteOutput:
         """
         Generate test cases from a functional description.
 
         Args:
             functional_desc: Path to functional_desc.json **or** an
-                already-loaded dict.
+                already-loaded dict (ignored when resuming).
             output_dir: Directory to save output files
+            resume: Run id of an earlier, interrupted run in the same
+                output directory; restarts at its first incomplete node
 
         Returns:
             TestSuiteOutput with navigation graph and test cases
         """
+        output = self._run(functional_desc, output_dir, resume)
+        self._print_run_stats()
+        return output
+
+    def generate_many(
+        self,
+        specs: Dict[str, str | Dict[str, Any]],
+        max_parallel: Optional[int] = None,
+    ) -> Dict[str, TestSuiteOutput]:
+        """
+        Generate test cases for several functional descriptions at once.
+
+        The specs run concurrently inside this generator, so they share its
+        HTTP pool, response cache, rate limiter, stage store and embedding
+        model, and LLM requests in flight across all of them are capped at
+        ``concurrency``.
+
+        Args:
+            specs: Output directory -> functional description (path to
+                functional_desc.json or an already-loaded dict)
+            max_parallel: Specs running at once (default: all of them)
+
+        Returns:
+            Output directory -> TestSuiteOutput for every spec that
+            completed, in the order of ``specs``; the errors of the others
+            are kept in ``spec_errors``
+        """
+        if len({os.path.normpath(output_dir) for output_dir in specs}) < len(specs):
+            raise ValueError("Every spec needs its own output directory")
+
+        workers = min(max_parallel or len(specs), len(specs))
+        if self.batch_runner is not None and self.batch_dir is None and workers > 1:
+            # Batch files default to each run's output dir, one run at a time
+            print("Note: batch-API mode generates the specs one at a time")
+            workers = 1
+
+        print(f"Generating {len(specs)} spec(s), {workers} at a time, "
+              f"up to {self.concurrency} LLM calls in flight")
+        results: Dict[str, TestSuiteOutput] = {}
+        self.spec_errors = {}
+        BaseAgent.configure_call_slots(self.concurrency)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="spec") as executor:
+                futures = {
+                    executor.submit(self._run, functional_desc, output_dir): output_dir
+                    for output_dir, functional_desc in specs.items()
+                }
+                for future in as_completed(futures):
+                    output_dir = futures[future]
+                    try:
+                        results[output_dir] = future.result()
+                    except Exception as e:
+                        self.spec_errors[output_dir] = e
+                        print(f"\nError: generation for {output_dir} failed: {e}")
+        finally:
+            BaseAgent.configure_call_slots(None)
+
+        print("\nBatch:")
+        for output_dir in specs:
+            if output_dir in results:
+                print(f"  - {output_dir}: {len(results[output_dir].test_cases)} test cases")
+            else:
+                print(f"  - {output_dir}: FAILED ({self.spec_errors[output_dir]})")
+        self._print_run_stats()
+
+        return {output_dir: results[output_dir] for output_dir in specs if output_dir in results}
+
+    def _run(
+        self,
+        functional_desc: Optional[str | Dict[str, Any]],
+        output_dir: str,
+        resume: Optional[str] = None,
+    ) -> TestSuiteOutput:
+        """Run the pipeline for one spec and print its summary"""
 
         print("=" * 60)
         print("TESTWRIGHT  (LangGraph Pipeline)")
@@ -74,6 +351,30 @@ class TestCaseGenerator:
 
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
+        if self.batch_runner is not None and self.batch_dir is None:
+            # Batch files default to living next to the run's output
+            self.batch_runner.workdir = os.path.join(output_dir, "batch")
+            if self.batch_server is not None:
+                self.batch_server.root = os.path.join(output_dir, "batch", "server")
+
+        # A resume continues its run; call metrics are tagged with the id
+        run_id = resume or f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+        # Config is re-supplied on every run and never written to checkpoints,
+        # so the API key stays off disk and a resume may change it
+        config_state: Dict[str, Any] = {
+            "api_key": self.api_key,
+            "model": self.model,
+            "provider": self.provider,
+            "debug": self.debug,
+            "debug_file": self.debug_file,
+            "stream": self.stream,
+            "output_dir": output_dir,
+            "run_id": run_id,
+        }
+        if resume is not None:
+            final_state = self._resume(resume, output_dir, config_state)
+            return self._finish(final_state)
 
         # Load inputs -- accept a path string or a pre-loaded dict
         if isinstance(functional_desc, dict):
@@ -83,30 +384,149 @@ class TestCaseGenerator:
             functional_desc = self._load_json(functional_desc)
             print(f"  - Loaded: {functional_desc}")
 
+        reused: Dict[int, Dict[str, Any]] = {}
+        if self.incremental:
+            reused, reason = reusable_modules(functional_desc, load_manifest(output_dir), self.model)
+            total = len(functional_desc.get("modules", []))
+            if reused:
+                print(f"  - Incremental: {len(reused)} of {total} module(s) unchanged since the previous run")
+            else:
+                print(f"  - Incremental: regenerating all {total} module(s) ({reason})")
+
         # Build the initial state for the graph
         initial_state: PipelineState = {
             # Inputs
             "functional_desc": functional_desc,
+            "reused_modules": reused,
             # Config
-            "api_key": self.api_key,
-            "model": self.model,
-            "provider": self.provider,
-            "debug": self.debug,
-            "debug_file": self.debug_file,
-            "output_dir": output_dir,
+            **config_state,
         }
 
         # Run the graph
-        final_state = self.graph.invoke(initial_state)
+        if not self.checkpoint:
+            return self._finish(self.graph.invoke(initial_state))
+
+        self.run_id = run_id
+        print(f"\nRun ID: {run_id} (resume with --resume {run_id})")
+        checkpointer = self._open_checkpointer(output_dir, config_state)
+        try:
+            graph = self._checkpointed_graph(checkpointer)
+            final_state = self._invoke(graph, initial_state, run_id)
+        finally:
+            checkpointer.close()
+        return self._finish(final_state)
 
+    def _finish(self, final_state: PipelineState) -> TestSuiteOutput:
+        """Print the run's summary and stage timings and return its output"""
         # Extract the final output
         output: TestSuiteOutput = final_state["output"]
+        timings = self.stage_timings = final_state.get("stage_timings", {})
 
-        # Print summary
-        self._print_summary(output)
+        # Print summary; concurrent runs print theirs one at a time
+        if self.pipeline_modules:
+            branches: Sequence[str] = PIPELINED_STAGES
+        else:
+            branches = PARALLEL_STAGES if self.parallel_stages else ()
+        with self._print_lock:
+            self._print_summary(output)
+            self._print_stage_timings(timings, branches)
 
         return output
 
+    def _print_run_stats(self):
+        """Print the statistics of the shared transport, caches and stores"""
+        self._print_memo_stats(self.memo)
+        self._print_pool_stats(self.pool)
+        self._print_cache_stats(self.cache)
+        self._print_retry_stats(self.retry_policy)
+        self._print_rate_limit_stats(self.rate_limiter)
+        self._print_structured_stats(self.structured_stats)
+        self._print_output_budget_stats(self.output_budget)
+        self._print_single_flight_stats(self.single_flight)
+        self._print_replay_stats(self.replay)
+        self._print_hedge_stats(self.hedge_policy)
+        self._print_batch_stats(self.batch_runner)
+        self._print_debug_log_stats(self.debug_logger)
+        self._export_metrics()
+
+    # ------------------------------------------------------------------
+    # Checkpointing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _open_checkpointer(output_dir: str, config_state: Dict[str, Any]) -> SqliteCheckpointer:
+        return SqliteCheckpointer(os.path.join(output_dir, "checkpoints.sqlite"), transient=config_state)
+
+    def _checkpointed_graph(self, checkpointer: SqliteCheckpointer):
+        return build_graph(
+            parallel=self.parallel_stages,
+            pipelined=self.pipeline_modules,
+            checkpointer=checkpointer,
+            memo=self.memo,
+        )
+
+    def _invoke(self, graph, graph_input: Optional[PipelineState], run_id: str) -> PipelineState:
+        """Run the checkpointed graph, pointing at --resume if it fails"""
+        config = {"configurable": {"thread_id": run_id}}
+        try:
+            return graph.invoke(graph_input, config)
+        except (Exception, KeyboardInterrupt):
+            print(f"\nRun {run_id} stopped; completed stages are checkpointed.")
+            print(f"Resume with: --resume {run_id}")
+            raise
+
+    def _resume(self, run_id: str, output_dir: str, config_state: Dict[str, Any]) -> PipelineState:
+        """Continue an interrupted run from its last checkpoint"""
+        checkpointer = self._open_checkpointer(output_dir, config_state)
+        try:
+            graph = self._checkpointed_graph(checkpointer)
+            self.run_id = run_id
+            snapshot = graph.get_state({"configurable": {"thread_id": run_id}})
+            if not snapshot.values:
+                known = ", ".join(run["run_id"] for run in checkpointer.runs()[:5]) or "none"
+                raise ValueError(f"No checkpoints for run {run_id} in {output_dir} (recent runs: {known})")
+            if not snapshot.next:
+                print(f"\nRun {run_id} already completed; reusing its final state")
+                return snapshot.values
+            print(f"\nResuming run {run_id} at: {', '.join(snapshot.next)}")
+            return self._invoke(graph, None, run_id)
+        finally:
+            checkpointer.close()
+
+    def close(self):
+        """Close the shared HTTP pool and response cache"""
+        self.pool.close()
+        if BaseAgent._pool is self.pool:
+            BaseAgent.configure_pool(None)
+        if BaseAgent._rate_limiter is self.rate_limiter:
+            BaseAgent.configure_rate_limit(None)
+        if BaseAgent._metrics is self.metrics:
+            BaseAgent.configure_metrics(None)
+        if BaseAgent._output_budget is self.output_budget:
+            BaseAgent.configure_output_budget(None)
+        if self.debug_logger is not None:
+            if BaseAgent._debug_logger is self.debug_logger:
+                BaseAgent.configure_debug_log(None)
+            self.debug_logger.close()
+        if BaseAgent._batch_runner is self.batch_runner:
+            BaseAgent.configure_batch(None)
+        if self.hedge_policy is not None:
+            if BaseAgent._hedge_policy is self.hedge_policy:
+                BaseAgent.configure_hedging(None)
+            self.hedge_policy.close()
+        if self.cache is not None:
+            if BaseAgent._cache is self.cache:
+                BaseAgent.configure_cache(None)
+            self.cache.close()
+        if self.memo is not None:
+            self.memo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
     # ------------------------------------------------------------------
     # Private helpers
     # ------------------------------------------------------------------
@@ -117,6 +537,15 @@ class TestCaseGenerator:
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
 
+    def _export_metrics(self):
+        """Write per-call records as JSONL and/or Prometheus text if requested."""
+        if self.metrics_jsonl:
+            self.metrics.export_jsonl(self.metrics_jsonl)
+            print(f"\nLLM call records saved to: {self.metrics_jsonl}")
+        if self.metrics_prometheus:
+            self.metrics.export_prometheus(self.metrics_prometheus)
+            print(f"LLM metrics (Prometheus) saved to: {self.metrics_prometheus}")
+
     @staticmethod
     def _print_summary(output: TestSuiteOutput):
         """Print summary statistics."""
@@ -163,6 +592,32 @@ class TestCaseGenerator:
             print(f"  - Manual steps: {exec_plans.get('total_manual_steps', 0)}")
             print(f"  - Automation rate: {exec_plans.get('automation_rate', 0)}%")
 
+        # LLM usage per agent
+        llm_usage = summary.get("llm_usage", {})
+        if llm_usage:
+            total = llm_usage["total"]
+            print("\nLLM Usage by Agent:")
+            for agent, u in sorted(llm_usage["by_agent"].items(),
+                                   key=lambda item: item[1]["latency_total_s"], reverse=True):
+                print(f"  - {agent}: {u['calls']} calls, "
+                      f"{u['prompt_tokens']}+{u['completion_tokens']} tokens "
+                      f"({u['cached_tokens']} cached), ${u['cost_usd']:.4f}, "
+                      f"{u['latency_total_s']}s "
+                      f"(p50 {u['latency_p50_s']}s / p95 {u['latency_p95_s']}s / p99 {u['latency_p99_s']}s)")
+                if u["cached_tokens"]:
+                    print(f"      prefix cache: {u['prefix_cache_ratio']:.0%} of prompt tokens, "
+                          f"saved ${u['prefix_cache_savings_usd']:.4f}, "
+                          f"p50 {u['latency_p50_prefix_hit_s']}s on hits vs "
+                          f"{u['latency_p50_prefix_miss_s']}s on misses")
+            print(f"  - Total: {total['calls']} calls ({total['errors']} errors, "
+                  f"{total['cache_hits']} cache hits, {total['coalesced']} coalesced, "
+                  f"{total['batched']} from batch jobs, "
+                  f"{total['retries']} retries), "
+                  f"{total['prompt_tokens'] + total['completion_tokens']} tokens, "
+                  f"${total['cost_usd']:.4f}")
+            if total["unpriced_calls"]:
+                print(f"  - Cost excludes {total['unpriced_calls']} calls to models without a known price")
+
         print(f"\nNavigation Graph:")
         print(f"  - Total nodes: {len(output.navigation_graph.nodes)}")
         if output.navigation_graph.graph_image_path:
@@ -170,3 +625,176 @@ class TestCaseGenerator:
         for node in output.navigation_graph.nodes.values():
             tc_count = len(node.test_case_ids)
             print(f"  - {node.title}: {tc_count} test cases, connects to {len(node.connected_to)} pages")
+
+    @staticmethod
+    def _print_pool_stats(pool: HTTPPool):
+        """Print HTTP connection reuse per provider."""
+        stats = pool.stats()
+        if not stats:
+            return
+        print(f"\nHTTP Pool ({'HTTP/2' if pool.http2 else 'HTTP/1.1'}):")
+        for provider, s in stats.items():
+            print(f"  - {provider}: {s['requests']} requests, "
+                  f"{s['connections_opened']} connections opened, "
+                  f"{s['connections_reused']} reused")
+
+    @staticmethod
+    def _print_cache_stats(cache: Optional[ResponseCache]):
+        """Print LLM response cache effectiveness."""
+        if cache is None:
+            return
+        stats = cache.stats()
+        print("\nLLM Cache:")
+        print(f"  - Hits: {stats['hits']}, Misses: {stats['misses']} ({stats['hit_rate']}% hit rate)")
+        print(f"  - Entries: {stats['entries']} ({stats['bytes'] / (1024 * 1024):.1f} MB), "
+              f"evicted: {stats['evictions']}")
+
+    @staticmethod
+    def _print_memo_stats(memo: Optional[ArtifactStore]):
+        """Print per-stage memoization hits, misses and time saved."""
+        if memo is None:
+            return
+        stages = memo.stats.to_dict()
+        if not stages:
+            return
+        print("\nStage Memoization:")
+        for stage, s in stages.items():
+            if s["hits"]:
+                result = f"hit, saved {s['saved']:.1f}s"
+            elif s["unstored"]:
+                result = "miss, not stored (LLM fallback)"
+            else:
+                result = "miss, stored"
+            print(f"  - {stage}: {result}")
+        hits = sum(1 for s in stages.values() if s["hits"])
+        saved = sum(s["saved"] for s in stages.values())
+        print(f"  - {hits} of {len(stages)} stages reused, {saved:.1f}s saved")
+
+    @staticmethod
+    def _print_retry_stats(policy: RetryPolicy):
+        """Print time lost to retries and circuit breaker activity."""
+        stats = policy.stats.to_dict()
+        if not any(stats.values()):
+            return
+        print("\nLLM Retries:")
+        print(f"  - Retries: {stats['retries']} ({stats['backoff_seconds']}s spent in backoff)")
+        print(f"  - Gave up: {stats['gave_up']}")
+        print(f"  - Circuit breaker: {stats['circuit_trips']} trips, "
+              f"{stats['circuit_rejections']} calls shed")
+
+    @staticmethod
+    def _print_rate_limit_stats(limiter: Optional[RateLimiter]):
+        """Print how often requests were paced by the client-side limiter."""
+        if limiter is None:
+            return
+        stats = limiter.stats()
+        print("\nRate Limiter:")
+        print(f"  - Requests: {stats['requests']}, throttled: {stats['throttled']} "
+              f"({stats['wait_seconds']}s waiting for quota)")
+
+    @staticmethod
+    def _print_structured_stats(stats: StructuredOutputStats):
+        """Print structured-output usage and JSON re-asks."""
+        s = stats.to_dict()
+        if not s["structured_calls"] and not s["legacy_calls"]:
+            return
+        print("\nStructured Output:")
+        print(f"  - Schema-constrained calls: {s['structured_calls']} "
+              f"({s['structured_first_try']} parsed first try, no re-ask needed)")
+        if s["structured_fallbacks"] or s["unsupported_fallbacks"]:
+            print(f"  - Fell back to prompt-based JSON: {s['structured_fallbacks']} parse failures, "
+                  f"{s['unsupported_fallbacks']} unsupported provider/model")
+        print(f"  - Prompt-based JSON calls: {s['legacy_calls']} ({s['legacy_reasks']} re-asks)")
+        if s["repaired_locally"] or s["partial_rejected"]:
+            print(f"  - Repaired locally without re-asking: {s['repaired_locally']} "
+                  f"({s['partial_accepted']} truncated responses salvaged, "
+                  f"{s['partial_rejected']} too incomplete to use)")
+        if s["continued"]:
+            print(f"  - Continued {s['continued']} responses cut off by max_tokens "
+                  f"({s['continuation_calls']} continuation calls)")
+
+    @staticmethod
+    def _print_output_budget_stats(budget: Optional[OutputBudget]):
+        """Print the max_tokens learned per agent from observed completion sizes."""
+        if budget is None:
+            return
+        learned = {agent: s for agent, s in budget.summary().items() if s["max_tokens"] is not None}
+        if not learned:
+            return
+        print("\nLearned max_tokens:")
+        for agent, s in sorted(learned.items()):
+            print(f"  - {agent}: {s['max_tokens']} (from {s['samples']} completions, "
+                  f"{s['capped_calls']} calls capped)")
+
+    @staticmethod
+    def _print_stage_timings(timings: Dict[str, Tuple[float, float]], parallel: Sequence[str]):
+        """Print per-stage wall time and the time saved by the parallel stages."""
+        if not timings:
+            return
+        print("\nStage Timings:")
+        for stage, (start, end) in sorted(timings.items(), key=lambda item: item[1][0]):
+            print(f"  - {stage}: {end - start:.1f}s")
+        branches = [timings[stage] for stage in parallel if stage in timings]
+        if len(branches) > 1:
+            work = sum(end - start for start, end in branches)
+            wall = max(end for _, end in branches) - min(start for start, _ in branches)
+            print(f"  - {', '.join(parallel)}: {work:.1f}s of work in {wall:.1f}s wall "
+                  f"({max(work - wall, 0.0):.1f}s saved by running them in parallel)")
+        total = max(end for _, end in timings.values()) - min(start for start, _ in timings.values())
+        print(f"  - Pipeline wall time: {total:.1f}s")
+
+    @staticmethod
+    def _print_single_flight_stats(single_flight: SingleFlight):
+        """Print how many identical in-flight requests were coalesced."""
+        stats = single_flight.stats()
+        if not stats["coalesced"]:
+            return
+        print("\nSingle-Flight:")
+        print(f"  - Coalesced {stats['coalesced']} identical in-flight requests "
+              f"onto {stats['leaders']} network calls")
+
+    @staticmethod
+    def _print_replay_stats(replay: Optional[ReplayTransport]):
+        """Print how replayed requests were matched to the recording."""
+        if replay is None:
+            return
+        stats = replay.stats.to_dict()
+        print("\nReplay:")
+        print(f"  - Exact prompt matches: {stats['exact']}, "
+              f"same-agent fallbacks: {stats['fallback']}, missing: {stats['missed']}")
+
+    @staticmethod
+    def _print_hedge_stats(policy: Optional[HedgePolicy]):
+        """Print how often calls were hedged or failed over, and the tail latency removed."""
+        if policy is None:
+            return
+        s = policy.stats.to_dict()
+        print("\nHedging:")
+        print(f"  - Hedged {s['hedged']} of {s['calls']} calls after the "
+              f"p{policy.percentile:g} latency; the secondary route won {s['hedge_wins']}")
+        print(f"  - Failovers after provider errors: {s['failovers']}")
+        print(f"  - Estimated tail latency removed: {s['saved_seconds']:.1f}s")
+
+    @staticmethod
+    def _print_debug_log_stats(logger: Optional[DebugLogger]):
+        """Print what the background debug logger wrote, dropped or truncated."""
+        if logger is None:
+            return
+        logger.flush()
+        s = logger.stats.to_dict()
+        print("\nDebug Log:")
+        print(f"  - {s['written']} records written to {logger.path} "
+              f"({s['rotations']} rotations, {s['truncated']} payloads truncated)")
+        if s["dropped"]:
+            print(f"  - Dropped {s['dropped']} records (queue full or write error)")
+
+    @staticmethod
+    def _print_batch_stats(runner: Optional[BatchRunner]):
+        """Print batch jobs submitted and how many calls they answered."""
+        if runner is None:
+            return
+        s = runner.stats.to_dict()
+        print("\nBatch API:")
+        print(f"  - Jobs: {s['jobs']} ({s['requests']} requests, {s['completed']} answered, "
+              f"{s['failed']} left to direct calls)")
+        print(f"  - Calls served from batch results: {s['served']}, time waiting on jobs: {s['wait_seconds']}s")
@@ -3,39 +3,94 @@ LangGraph Pipeline Definition
 
 Builds and compiles the StateGraph that orchestrates all agents.
 
+Graph topology (parallel, default)
+==================================
+
+                 +-> navigation -+
+  parse ---------+-> chunker ----+--> test_generation -> assembler
+                 +-> summary ----+
+    -> verification_flag -> ideal_verification
+    -> verification_matcher -> execution_plan -> finalize -> END
+
+Navigation, chunker and summary each read only ``parsed_desc``, so they
+run concurrently in one superstep.  They join on test_generation through
+a single multi-source edge, which waits for all three branches and runs
+the node exactly once; a plain edge from each branch would trigger it
+once per branch.  Every branch writes disjoint state fields, and the
+``stage_timings`` they share is merged by a dict reducer.
+
 Graph topology (sequential)
 ===========================
 
   parse -> navigation -> chunker -> summary -> test_generation
-    -> assembler -> verification_flag -> ideal_verification
-    -> verification_matcher -> execution_plan -> finalize -> END
+    -> assembler -> ...
+
+Kept for comparison and for providers that cannot take the extra
+concurrent requests.
+
+Graph topology (pipelined)
+==========================
 
-All steps run sequentially to avoid LangGraph fan-in state-merge
-issues that cause duplicate node executions in parallel branches.
+  module_pipeline -+-> navigation -+
+                   +-> summary ----+--> assembler -> ...
+
+module_pipeline takes each module through parse -> chunk -> generate
+independently on one bounded worker pool, so a slow module only delays
+its own tests.  Navigation and summary need every parsed module; they
+follow as parallel branches, and the assembler is the first barrier
+over all modules.
 """
 
+from typing import Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, StateGraph
 
+from testwright.core.memo import ArtifactStore, memoize
 from testwright.core.nodes import (
     assembler_node,
     chunker_node,
     execution_plan_node,
     finalize_node,
     ideal_verification_node,
+    module_pipeline_node,
     navigation_node,
     parse_node,
     summary_node,
     test_generation_node,
+    timed,
     verification_flag_node,
     verification_matcher_node,
 )
 from testwright.core.state import PipelineState
 
+# Stages that depend only on parse_node and run side by side
+PARALLEL_STAGES = ("navigation", "chunker", "summary")
+
+# Global stages that follow module_pipeline side by side
+PIPELINED_STAGES = ("navigation", "summary")
 
-def build_graph() -> StateGraph:
+
+def build_graph(
+    parallel: bool = True,
+    pipelined: bool = False,
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    memo: Optional[ArtifactStore] = None,
+) -> StateGraph:
     """
     Construct and compile the LangGraph pipeline.
 
+    Args:
+        parallel: Run navigation, chunker and summary concurrently
+            (False restores the fully sequential pipeline)
+        pipelined: Replace parse, chunker and test_generation with the
+            per-module module_pipeline node (takes precedence over
+            ``parallel``)
+        checkpointer: Persist the state after every node (e.g. a
+            ``SqliteCheckpointer``) so a failed run can be resumed
+        memo: Serve ``@memoizable`` nodes from this store when their
+            code and declared inputs are unchanged
+
     Returns a compiled graph that can be invoked with
     ``graph.invoke(initial_state)``.
     """
@@ -43,27 +98,44 @@ def build_graph() -> StateGraph:
     graph = StateGraph(PipelineState)
 
     # -- Register nodes -------------------------------------------------------
-    graph.add_node("parse", parse_node)
-    graph.add_node("navigation", navigation_node)
-    graph.add_node("chunker", chunker_node)
-    graph.add_node("summary", summary_node)
-    graph.add_node("test_generation", test_generation_node)
-    graph.add_node("assembler", assembler_node)
-    graph.add_node("verification_flag", verification_flag_node)
-    graph.add_node("ideal_verification", ideal_verification_node)
-    graph.add_node("verification_matcher", verification_matcher_node)
-    graph.add_node("execution_plan", execution_plan_node)
-    graph.add_node("finalize", finalize_node)
+    def add(name: str, node):
+        graph.add_node(name, timed(name, memoize(name, node, memo)))
+
+    if pipelined:
+        add("module_pipeline", module_pipeline_node)
+    else:
+        add("parse", parse_node)
+        add("chunker", chunker_node)
+        add("test_generation", test_generation_node)
+    add("navigation", navigation_node)
+    add("summary", summary_node)
+    add("assembler", assembler_node)
+    add("verification_flag", verification_flag_node)
+    add("ideal_verification", ideal_verification_node)
+    add("verification_matcher", verification_matcher_node)
+    add("execution_plan", execution_plan_node)
+    add("finalize", finalize_node)
 
     # -- Entry point ----------------------------------------------------------
-    graph.set_entry_point("parse")
-
-    # -- Sequential pipeline --------------------------------------------------
-    graph.add_edge("parse", "navigation")
-    graph.add_edge("navigation", "chunker")
-    graph.add_edge("chunker", "summary")
-    graph.add_edge("summary", "test_generation")
-    graph.add_edge("test_generation", "assembler")
+    graph.set_entry_point("module_pipeline" if pipelined else "parse")
+
+    # -- Parsed description -> test generation --------------------------------
+    if pipelined:
+        for stage in PIPELINED_STAGES:
+            graph.add_edge("module_pipeline", stage)
+        graph.add_edge(list(PIPELINED_STAGES), "assembler")
+    elif parallel:
+        for stage in PARALLEL_STAGES:
+            graph.add_edge("parse", stage)
+        # Multi-source edge: a join that fires once all branches are done
+        graph.add_edge(list(PARALLEL_STAGES), "test_generation")
+        graph.add_edge("test_generation", "assembler")
+    else:
+        graph.add_edge("parse", "navigation")
+        graph.add_edge("navigation", "chunker")
+        graph.add_edge("chunker", "summary")
+        graph.add_edge("summary", "test_generation")
+        graph.add_edge("test_generation", "assembler")
 
     # -- Sequential verification pipeline -------------------------------------
     graph.add_edge("assembler", "verification_flag")
@@ -75,4 +147,4 @@ def build_graph() -> StateGraph:
     # -- End ------------------------------------------------------------------
     graph.add_edge("finalize", END)
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
@@ -0,0 +1,151 @@
+"""
+Per-module spec fingerprints for incremental regeneration.
+
+Every run leaves ``manifest.json`` in its output directory.  For each
+module it records a fingerprint of the module's normalized title and
+description together with what the per-module stages made of it: the
+parsed module, its workflow chunks and the test cases generated for them
+(as generated, before the assembler assigns IDs).
+
+The next run in the same directory fingerprints its modules again.
+Modules whose fingerprint matches are restored from the manifest instead
+of being parsed, chunked and sent to test generation; everything from
+navigation onwards still runs over the whole spec, so cross-module
+results (IDs, verification matching, execution plans) stay consistent.
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from testwright.models.schemas import ParsedFunctionalDescription, ParsedModule, TestCase, WorkflowChunk
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def _normalize(text: Any) -> str:
+    """Unicode-normalized text with runs of whitespace collapsed"""
+    return " ".join(unicodedata.normalize("NFKC", str(text or "")).split())
+
+
+def module_fingerprint(module: Dict[str, Any]) -> str:
+    """Fingerprint of a raw spec module: its id, normalized title and description"""
+    key = json.dumps(
+        [module.get("id", 0), _normalize(module.get("title")), _normalize(module.get("description"))],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def load_manifest(output_dir: str) -> Optional[Dict[str, Any]]:
+    """The previous run's manifest, or None if missing or unreadable"""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def write_manifest(output_dir: str, manifest: Dict[str, Any]) -> str:
+    """Write the manifest next to the run's output"""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def reusable_modules(
+    functional_desc: Dict[str, Any],
+    manifest: Optional[Dict[str, Any]],
+    model: str,
+) -> Tuple[Dict[int, Dict[str, Any]], str]:
+    """Manifest entries of the modules that did not change, by module id
+
+    Returns the entries and a one-line reason when nothing can be reused.
+    """
+    if manifest is None:
+        return {}, "no previous manifest"
+    if manifest.get("model") != model:
+        return {}, f"previous run used model {manifest.get('model')}"
+
+    modules = functional_desc.get("modules", []) if isinstance(functional_desc, dict) else []
+    ids = Counter(module.get("id", 0) for module in modules)
+    if any(count > 1 for count in ids.values()):
+        # Entries are matched to chunks and tests by module id
+        return {}, "module ids are not unique"
+
+    previous = {entry["fingerprint"]: entry for entry in manifest.get("modules", [])}
+    reused = {}
+    for module in modules:
+        entry = previous.get(module_fingerprint(module))
+        if entry is not None:
+            reused[module.get("id", 0)] = entry
+    return reused, "" if reused else "every module changed"
+
+
+def build_manifest(
+    functional_desc: Dict[str, Any],
+    parsed_desc: ParsedFunctionalDescription,
+    all_chunks: List[WorkflowChunk],
+    all_tests: List[TestCase],
+    model: str,
+    failed_modules: Set[int],
+) -> Dict[str, Any]:
+    """Snapshot the per-module stage results of a run
+
+    Modules in ``failed_modules`` (a chunk failed to generate, or parsing
+    or splitting fell back after an LLM failure) and modules that produced
+    no test cases are left out, so the next run retries them instead of
+    reusing an incomplete result.
+    """
+    fingerprints = {
+        module.get("id", 0): module_fingerprint(module) for module in functional_desc.get("modules", [])
+    }
+    chunks: Dict[int, List[Dict[str, Any]]] = {}
+    for chunk in all_chunks:
+        chunks.setdefault(chunk.module_id, []).append(dataclasses.asdict(chunk))
+    tests: Dict[int, List[Dict[str, Any]]] = {}
+    for test in all_tests:
+        tests.setdefault(test.module_id, []).append(dataclasses.asdict(test))
+
+    entries = []
+    for module in parsed_desc.modules:
+        if module.id in failed_modules or not tests.get(module.id) or module.id not in fingerprints:
+            continue
+        entries.append({
+            "id": module.id,
+            "title": module.title,
+            "fingerprint": fingerprints[module.id],
+            "parsed": dataclasses.asdict(module),
+            "chunks": chunks.get(module.id, []),
+            "tests": tests[module.id],
+        })
+
+    return {
+        "version": MANIFEST_VERSION,
+        "generated_at": datetime.now().isoformat(),
+        "model": model,
+        "modules": entries,
+    }
+
+
+def restore_module(entry: Dict[str, Any]) -> ParsedModule:
+    return ParsedModule(**entry["parsed"])
+
+
+def restore_chunks(entry: Dict[str, Any]) -> List[WorkflowChunk]:
+    return [WorkflowChunk(**chunk) for chunk in entry["chunks"]]
+
+
+def restore_tests(entry: Dict[str, Any]) -> List[TestCase]:
+    return [TestCase(**test) for test in entry["tests"]]
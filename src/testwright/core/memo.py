@@ -0,0 +1,257 @@
+"""
+Stage-level memoization of graph node outputs.
+
+A node opts in with ``@memoizable(...)``, naming the state fields it
+reads and the agents whose code shapes its result.  When the graph is
+built with an ``ArtifactStore``, the node's update is looked up by a
+SHA-256 hash of:
+
+- the stage name, model, provider and streaming mode;
+- the agent settings that change what the LLM returns (structured
+  output, learned max_tokens);
+- the source of the node and of those agents' modules, so that editing
+  e.g. ``ExecutionPlanAgent`` invalidates only the stages that use it,
+  plus the code every agent shares (``agents/base.py``, ``testwright.llm``
+  and the schemas), whose edits invalidate every stage;
+- the serialized values of the declared inputs.
+
+On a hit the stored update is returned without running the node; on a
+miss the node runs on copies of its inputs, so a node that mutates what
+it reads cannot change the state later stages are keyed on, and its
+update is stored along with how long it took, which is reported as the
+time saved by later hits.  An update that records LLM failures answered
+with fallbacks (``degraded_modules``, ``degraded_stages``) is not stored,
+so a transient provider error is not replayed by every later run.  Nodes
+with side effects (``finalize``) are not declared and always run.
+"""
+
+import copy
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from functools import lru_cache, wraps
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import testwright
+from testwright.agents.base import BaseAgent
+from testwright.models.serialization import SchemaSerializer
+
+# State fields every memoized stage depends on besides its declared inputs
+CONFIG_INPUTS = ("model", "provider", "stream")
+
+# Source shared by every agent, relative to the testwright package: the
+# LLM call path (prompt wrappers, repair, structured output, continuation)
+# and the schemas results are built from
+SHARED_SOURCES = ("agents/base.py", "llm", "models/schemas.py")
+
+Node = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+def memoizable(*inputs: str, agents: Sequence[type] = ()) -> Callable[[Node], Node]:
+    """Declare the state fields and agents a node's output depends on"""
+
+    def declare(node: Node) -> Node:
+        node.memo_inputs = tuple(inputs)  # type: ignore[attr-defined]
+        node.memo_agents = tuple(agents)  # type: ignore[attr-defined]
+        return node
+
+    return declare
+
+
+@lru_cache(maxsize=None)
+def shared_fingerprint() -> str:
+    """Hash of the source files listed in SHARED_SOURCES"""
+    root = os.path.dirname(testwright.__file__)
+    digest = hashlib.sha256()
+    for entry in SHARED_SOURCES:
+        path = os.path.join(root, entry)
+        files = [path] if os.path.isfile(path) else sorted(
+            os.path.join(path, name) for name in os.listdir(path) if name.endswith(".py")
+        )
+        for file in files:
+            digest.update(os.path.relpath(file, root).encode("utf-8") + b"\0")
+            with open(file, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint(node: Node) -> str:
+    """Hash of the node's source, the modules of its declared agents and the shared code"""
+    digest = hashlib.sha256(inspect.getsource(node).encode("utf-8"))
+    for module_name in sorted({agent.__module__ for agent in getattr(node, "memo_agents", ())}):
+        digest.update(inspect.getsource(sys.modules[module_name]).encode("utf-8"))
+    digest.update(shared_fingerprint().encode("utf-8"))
+    return digest.hexdigest()
+
+
+def agent_settings() -> Dict[str, Any]:
+    """Process-wide agent configuration that changes what a stage produces"""
+    return {
+        "structured_output": BaseAgent._structured_output,
+        "learned_max_tokens": BaseAgent._output_budget is not None,
+    }
+
+
+def storable(update: Dict[str, Any]) -> bool:
+    """Whether a node's update is complete, i.e. no LLM failure fell back to a default"""
+    return not update.get("degraded_modules") and not update.get("degraded_stages")
+
+
+class MemoStats:
+    """Thread-safe per-stage hit/miss/unstored counts and seconds saved"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, stage: str, field: str, amount: float = 1):
+        with self._lock:
+            counters = self.stages.setdefault(stage, {"hits": 0, "misses": 0, "unstored": 0, "saved": 0.0})
+            counters[field] += amount
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {stage: dict(counters) for stage, counters in self.stages.items()}
+
+
+class ArtifactStore:
+    """Size-bounded LRU store of node outputs backed by SQLite"""
+
+    def __init__(self, path: str, max_bytes: int = 1024 * 1024 * 1024):
+        """Open (or create) the store
+
+        Args:
+            path: SQLite file path; parent directories are created
+            max_bytes: Total size of stored outputs before LRU eviction
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = MemoStats()
+        self.serde = SchemaSerializer()
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS artifacts (
+                key TEXT PRIMARY KEY,
+                stage TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                seconds REAL NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_artifacts_accessed ON artifacts(accessed)"
+        )
+        self._conn.commit()
+
+    def key(self, stage: str, node: Node, state: Dict[str, Any]) -> str:
+        """Content hash of a stage's code and its declared inputs in ``state``"""
+        digest = hashlib.sha256(f"{stage}\0{code_fingerprint(node)}".encode("utf-8"))
+        digest.update(json.dumps(agent_settings(), sort_keys=True).encode("utf-8"))
+        for name in CONFIG_INPUTS + node.memo_inputs:  # type: ignore[attr-defined]
+            digest.update(f"\0{name}\0".encode("utf-8"))
+            if name in state:
+                type_, payload = self.serde.dumps_typed(state[name])
+                digest.update(type_.encode("utf-8") + b"\0" + payload)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return a stored update and the seconds it took to compute, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT type, value, seconds FROM artifacts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE artifacts SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        return self.serde.loads_typed((row[0], row[1])), row[2]
+
+    def put(self, key: str, stage: str, update: Dict[str, Any], seconds: float):
+        """Store a node's update and evict least-recently-used entries over budget"""
+        type_, value = self.serde.dumps_typed(update)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifacts "
+                "(key, stage, type, value, size, seconds, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, stage, type_, value, len(value), seconds, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop oldest-accessed entries until the total size fits (lock held)"""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM artifacts"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM artifacts ORDER BY accessed ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        """Remove every stored output"""
+        with self._lock:
+            self._conn.execute("DELETE FROM artifacts")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def memoize(stage: str, node: Node, store: Optional[ArtifactStore]) -> Node:
+    """Wrap a ``@memoizable`` node so its output is served from ``store``"""
+    if store is None or not hasattr(node, "memo_inputs"):
+        return node
+
+    @wraps(node)
+    def run(state: Dict[str, Any]) -> Dict[str, Any]:
+        key = store.key(stage, node, state)
+        stored = store.get(key)
+        if stored is not None:
+            update, seconds = stored
+            store.stats.record(stage, "hits")
+            store.stats.record(stage, "saved", seconds)
+            print(f"\n[memo] {stage}: reusing stored output (saved {seconds:.1f}s)")
+            return update
+
+        store.stats.record(stage, "misses")
+        start = time.perf_counter()
+        names = node.memo_inputs  # type: ignore[attr-defined]
+        update = node({**state, **{name: copy.deepcopy(state[name]) for name in names if name in state}})
+        if storable(update):
+            store.put(key, stage, update, time.perf_counter() - start)
+        else:
+            store.stats.record(stage, "unstored")
+            print(f"\n[memo] {stage}: not stored, it fell back after an LLM failure")
+        return update
+
+    return run
@@ -8,7 +8,11 @@ Each function is a LangGraph node that:
   4. Returns a partial state dict with the fields it produced
 """
 
-from typing import Any, Dict, List
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, TypeVar
 
 from testwright.agents import (
     AssemblerAgent,
@@ -17,13 +21,26 @@ from testwright.agents import (
     IdealVerificationAgent,
     NavigationAgent,
     ParserAgent,
+    RAGIndexer,
     SummaryAgent,
     TestGenerationAgent,
     VerificationFlagAgent,
     VerificationMatcherAgent,
 )
 from testwright.agents.base import BaseAgent
+from testwright.core.manifest import (
+    build_manifest,
+    restore_chunks,
+    restore_module,
+    restore_tests,
+    write_manifest,
+)
+from testwright.core.memo import memoizable
+from testwright.core.progress import ProgressMeter
 from testwright.core.state import PipelineState
+from testwright.models.schemas import TestCase, WorkflowChunk
+
+R = TypeVar("R")
 
 
 # ---------------------------------------------------------------------------
@@ -38,32 +55,92 @@ def _agent_kwargs(state: PipelineState) -> dict:
         provider=state["provider"],
         debug=state["debug"],
         debug_file=state["debug_file"],
+        stream=state.get("stream", False),
+        run_id=state.get("run_id"),
     )
 
 
+def timed(stage: str, node: Callable[[PipelineState], Dict[str, Any]]) -> Callable[[PipelineState], Dict[str, Any]]:
+    """Wrap a node so its update also records when the stage started and ended."""
+
+    @wraps(node)
+    def run(state: PipelineState) -> Dict[str, Any]:
+        # Wall-clock times, so stages resumed in a later process still line up
+        start = time.time()
+        update = node(state)
+        return {**update, "stage_timings": {stage: (start, time.time())}}
+
+    return run
+
+
+def _degraded(stage: str, agent: BaseAgent) -> Dict[str, Any]:
+    """State update counting the items a stage answered with LLM-failure fallbacks."""
+    return {"degraded_stages": {stage: len(agent.degraded)}} if agent.degraded else {}
+
+
+def _run_async(aw: Awaitable[R]) -> R:
+    """Run a stage's fan-out on an event loop of its own.
+
+    Nodes are called synchronously (possibly on parallel worker threads),
+    so each gets a fresh loop; the pooled async clients bound to it are
+    closed before it goes away.
+    """
+
+    async def main() -> R:
+        try:
+            return await aw
+        finally:
+            await BaseAgent.get_pool().aclose()
+
+    return asyncio.run(main())
+
+
+def _prefetch_batch(agent: BaseAgent, stage: str, requests: List) -> None:
+    """In batch-API mode, answer a stage's requests with one batch job up front."""
+    if BaseAgent._batch_runner is None or not requests:
+        return
+    print(f"  - Submitting {len(requests)} request(s) as a batch job...")
+    answered = agent.prefetch_batch(stage, requests)
+    print(f"  - Batch job answered {answered} of {len(requests)} request(s)")
+
+
 # ===========================================================================
 # Node 1 -- Parse functional description
 # ===========================================================================
 
+@memoizable("functional_desc", "reused_modules", agents=(ParserAgent,))
 def parse_node(state: PipelineState) -> Dict[str, Any]:
     """Parse the raw functional description JSON into structured data."""
     print("\n[1/11] Parsing functional description...")
+    reused = state.get("reused_modules") or {}
 
     agent = ParserAgent(**_agent_kwargs(state))
-    parsed_desc = agent.run(state["functional_desc"])
+    raw_modules = agent.raw_modules(state["functional_desc"])
+    fresh = [module for module in raw_modules if module.get("id", 0) not in reused]
+    if reused:
+        print(f"  - Reusing {len(raw_modules) - len(fresh)} unchanged module(s) from the previous run")
+    if len(fresh) > 1 and BaseAgent._concurrency > 1:
+        print(f"  - Extracting {len(fresh)} modules, up to {BaseAgent._concurrency} at a time")
+
+    parsed = iter(_run_async(agent._agather_bounded(agent.aparse_module(module) for module in fresh)))
+    parsed_desc = agent.build_description(state["functional_desc"], [
+        restore_module(reused[module.get("id", 0)]) if module.get("id", 0) in reused else next(parsed)
+        for module in raw_modules
+    ])
 
     print(f"  - Project: {parsed_desc.project_name}")
     print(f"  - Modules found: {len(parsed_desc.modules)}")
     for m in parsed_desc.modules:
         print(f"    * {m.title}: {len(m.workflows)} workflows, {len(m.mentioned_items)} items")
 
-    return {"parsed_desc": parsed_desc}
+    return {"parsed_desc": parsed_desc, "degraded_modules": dict.fromkeys(agent.degraded, "parse")}
 
 
 # ===========================================================================
 # Node 2 -- Build navigation graph
 # ===========================================================================
 
+@memoizable("parsed_desc", agents=(NavigationAgent,))
 def navigation_node(state: PipelineState) -> Dict[str, Any]:
     """Build the navigation graph from the parsed description."""
     print("\n[2/11] Building navigation graph...")
@@ -74,34 +151,48 @@ def navigation_node(state: PipelineState) -> Dict[str, Any]:
     print(f"  - Login module ID: {nav_graph.login_module_id}")
     print(f"  - Page nodes: {len(nav_graph.nodes)}")
 
-    return {"nav_graph": nav_graph}
+    return {"nav_graph": nav_graph, **_degraded("navigation", agent)}
 
 
 # ===========================================================================
 # Node 3 -- Chunk modules into workflows
 # ===========================================================================
 
+@memoizable("parsed_desc", "reused_modules", agents=(ChunkerAgent,))
 def chunker_node(state: PipelineState) -> Dict[str, Any]:
     """Split each module into workflow-based chunks."""
     print("\n[3/11] Splitting modules into workflow chunks...")
 
+    reused = state.get("reused_modules") or {}
+    modules = state["parsed_desc"].modules
+
     agent = ChunkerAgent(**_agent_kwargs(state))
+    fresh = [module for module in modules if module.id not in reused]
+    _prefetch_batch(agent, "chunker", agent.batch_requests(fresh))
+    # Modules are split concurrently; the chunks keep module order
+    split = iter(_run_async(agent._agather_bounded(agent.arun(module) for module in fresh)))
     all_chunks = []
 
-    for module in state["parsed_desc"].modules:
-        chunks = agent.run(module)
+    for module in modules:
+        if module.id in reused:
+            chunks = restore_chunks(reused[module.id])
+            all_chunks.extend(chunks)
+            print(f"  - {module.title}: {len(chunks)} chunk(s), unchanged")
+            continue
+        chunks = next(split)
         all_chunks.extend(chunks)
         print(f"  - {module.title}: {len(chunks)} chunk(s)")
         for chunk in chunks:
             print(f"    * {chunk.workflow_name}")
 
-    return {"all_chunks": all_chunks}
+    return {"all_chunks": all_chunks, "degraded_modules": dict.fromkeys(agent.degraded, "chunking")}
 
 
 # ===========================================================================
 # Node 4 -- Generate module summaries
 # ===========================================================================
 
+@memoizable("parsed_desc", agents=(SummaryAgent,))
 def summary_node(state: PipelineState) -> Dict[str, Any]:
     """Generate concise module summaries for verification matching."""
     print("\n[4/11] Generating module summaries...")
@@ -115,33 +206,186 @@ def summary_node(state: PipelineState) -> Dict[str, Any]:
         action_str = f", modifies: {', '.join(ms.action_states)}" if ms.action_states else ""
         print(f"    * {ms.module_title}{verify_str}{action_str}")
 
-    return {"module_summaries": module_summaries}
+    return {"module_summaries": module_summaries, **_degraded("summary", agent)}
 
 
 # ===========================================================================
 # Node 5 -- Generate test cases for each chunk
 # ===========================================================================
 
+@memoizable("functional_desc", "parsed_desc", "all_chunks", "reused_modules", "degraded_modules",
+            agents=(TestGenerationAgent,))
 def test_generation_node(state: PipelineState) -> Dict[str, Any]:
     """Generate test cases for every workflow chunk."""
     print("\n[5/11] Generating test cases...")
 
-    agent = TestGenerationAgent(**_agent_kwargs(state))
-    all_tests = []
+    reused = state.get("reused_modules") or {}
+    if reused:
+        print(f"  - Reusing the test cases of {len(reused)} unchanged module(s)")
 
+    agent = TestGenerationAgent(**_agent_kwargs(state))
+    chunks = [chunk for chunk in state["all_chunks"] if chunk.module_id not in reused]
+    _prefetch_batch(agent, "test_generation", agent.batch_requests(chunks))
+
+    print(f"  - {len(chunks)} chunk(s), up to {min(BaseAgent._concurrency, len(chunks))} at a time")
+    progress = ProgressMeter(len(chunks), unit="chunks")
+    failed = set()
+
+    async def generate(chunk: WorkflowChunk) -> List[TestCase]:
+        # A failing chunk yields no tests instead of aborting the stage,
+        # and keeps its module out of the manifest
+        try:
+            tests = await agent.arun(chunk)
+        except Exception as e:
+            failed.add(id(chunk))
+            print(f"Warning: Test generation failed for {chunk.workflow_name}: {e}")
+            tests = []
+        status = "FAILED" if id(chunk) in failed else f"{len(tests)} test cases"
+        progress.advance(f"{chunk.module_title} / {chunk.workflow_name}: {status}",
+                         failed=id(chunk) in failed)
+        return tests
+
+    # Results come back in chunk order whatever order they finish in
+    results = _run_async(agent._agather_bounded(generate(chunk) for chunk in chunks))
+    generated = {id(chunk): tests for chunk, tests in zip(chunks, results)}
+    print(f"  - Generated {sum(map(len, results))} test cases: {progress.finish()}")
+
+    # Splice reused modules' tests back in at their place in chunk order
+    all_tests: List[TestCase] = []
+    spliced = set()
     for chunk in state["all_chunks"]:
-        print(f"  - Generating tests for: {chunk.module_title} / {chunk.workflow_name}")
-        tests = agent.run(chunk)
-        print(f"    * Generated {len(tests)} test cases")
-        all_tests.extend(tests)
+        if chunk.module_id not in reused:
+            all_tests.extend(generated[id(chunk)])
+        elif chunk.module_id not in spliced:
+            spliced.add(chunk.module_id)
+            all_tests.extend(restore_tests(reused[chunk.module_id]))
+
+    degraded = {chunk.module_id: "generation" for chunk in chunks if id(chunk) in failed}
+    degraded.update(dict.fromkeys(agent.degraded, "generation"))
+    manifest = build_manifest(
+        state["functional_desc"], state["parsed_desc"], state["all_chunks"], all_tests,
+        state["model"], set(degraded) | set(state.get("degraded_modules") or {}),
+    )
+    return {"all_tests": all_tests, "manifest": manifest, "degraded_modules": degraded}
 
-    return {"all_tests": all_tests}
+
+# ===========================================================================
+# Nodes 1, 3 and 5 pipelined -- parse, chunk and generate module by module
+# ===========================================================================
+
+@memoizable("functional_desc", "reused_modules",
+            agents=(ParserAgent, ChunkerAgent, TestGenerationAgent))
+def module_pipeline_node(state: PipelineState) -> Dict[str, Any]:
+    """Take every module through parse -> chunk -> generate on its own.
+
+    One bounded worker pool runs all three steps: as soon as a module is
+    parsed and chunked, its chunks are queued for test generation, so no
+    module waits for the slowest one before its tests are generated.
+    Results are put back in spec order, exactly as the staged nodes
+    would produce them.
+    """
+    print("\n[1-5/11] Parsing, chunking and generating tests module by module...")
+
+    kwargs = _agent_kwargs(state)
+    parser = ParserAgent(**kwargs)
+    chunker = ChunkerAgent(**kwargs)
+    generator = TestGenerationAgent(**kwargs)
+    raw_modules = parser.raw_modules(state["functional_desc"])
+    print(f"  - {len(raw_modules)} module(s), up to {BaseAgent._concurrency} LLM calls at a time")
+
+    progress = ProgressMeter(0, unit="chunks")
+    parsed: Dict[int, Any] = {}
+    chunks_by_module: Dict[int, List[WorkflowChunk]] = {}
+    tests_by_chunk: Dict[Tuple[int, int], List[TestCase]] = {}
+    reused_tests: Dict[int, List[TestCase]] = {}
+    degraded: Dict[int, str] = {}
+
+    # Unchanged modules are restored up front and never reach the pool
+    reused = state.get("reused_modules") or {}
+    for i, raw_module in enumerate(raw_modules):
+        entry = reused.get(raw_module.get("id", 0))
+        if entry is not None:
+            parsed[i] = restore_module(entry)
+            chunks_by_module[i] = restore_chunks(entry)
+            reused_tests[i] = restore_tests(entry)
+            print(f"  - {parsed[i].title}: unchanged, {len(reused_tests[i])} test cases reused")
+
+    def prepare(raw_module: Dict[str, Any]):
+        module = parser.parse_module(raw_module)
+        try:
+            return module, chunker.run(module)
+        except Exception as e:
+            print(f"Warning: Workflow splitting failed for module {module.title}: {e}")
+            degraded[module.id] = "chunking"
+            return module, []
+
+    def generate(chunk: WorkflowChunk) -> Tuple[List[TestCase], bool]:
+        try:
+            return generator.run(chunk), False
+        except Exception as e:
+            print(f"Warning: Test generation failed for {chunk.workflow_name}: {e}")
+            return [], True
+
+    with ThreadPoolExecutor(max_workers=BaseAgent._concurrency, thread_name_prefix="module-pipeline") as executor:
+        pending: Dict[Future, Tuple[int, int]] = {
+            executor.submit(prepare, raw_module): (i, -1)
+            for i, raw_module in enumerate(raw_modules) if i not in parsed
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, j = pending.pop(future)
+                if j < 0:
+                    module, chunks = future.result()
+                    parsed[i] = module
+                    chunks_by_module[i] = chunks
+                    progress.expand(len(chunks))
+                    print(f"  - {module.title}: parsed, {len(chunks)} chunk(s) queued")
+                    for j, chunk in enumerate(chunks):
+                        pending[executor.submit(generate, chunk)] = (i, j)
+                else:
+                    tests, failed = future.result()
+                    tests_by_chunk[(i, j)] = tests
+                    chunk = chunks_by_module[i][j]
+                    if failed:
+                        degraded.setdefault(chunk.module_id, "generation")
+                    status = "FAILED" if failed else f"{len(tests)} test cases"
+                    progress.advance(f"{chunk.module_title} / {chunk.workflow_name}: {status}", failed=failed)
+
+    # Modules whose parse, split or generation fell back are regenerated next time
+    degraded.update(dict.fromkeys(generator.degraded, "generation"))
+    degraded.update(dict.fromkeys(chunker.degraded, "chunking"))
+    degraded.update(dict.fromkeys(parser.degraded, "parse"))
+
+    order = range(len(raw_modules))
+    parsed_desc = parser.build_description(state["functional_desc"], [parsed[i] for i in order])
+    all_chunks = [chunk for i in order for chunk in chunks_by_module[i]]
+    all_tests: List[TestCase] = []
+    for i in order:
+        if i in reused_tests:
+            all_tests.extend(reused_tests[i])
+            continue
+        for j in range(len(chunks_by_module[i])):
+            all_tests.extend(tests_by_chunk[(i, j)])
+    print(f"  - Generated {len(all_tests)} test cases: {progress.finish()}")
+
+    manifest = build_manifest(
+        state["functional_desc"], parsed_desc, all_chunks, all_tests, state["model"], set(degraded),
+    )
+    return {
+        "parsed_desc": parsed_desc,
+        "all_chunks": all_chunks,
+        "all_tests": all_tests,
+        "manifest": manifest,
+        "degraded_modules": degraded,
+    }
 
 
 # ===========================================================================
 # Node 6 -- Assemble, deduplicate, assign IDs
 # ===========================================================================
 
+@memoizable("all_tests", "nav_graph", "parsed_desc", "module_summaries", agents=(AssemblerAgent,))
 def assembler_node(state: PipelineState) -> Dict[str, Any]:
     """Assemble test cases -- deduplicate, sort, assign IDs, link to nav graph."""
     print("\n[6/11] Assembling test cases...")
@@ -165,6 +409,7 @@ def assembler_node(state: PipelineState) -> Dict[str, Any]:
 # Node 7 -- Flag tests needing post-verification
 # ===========================================================================
 
+@memoizable("output", "module_summaries", agents=(VerificationFlagAgent,))
 def verification_flag_node(state: PipelineState) -> Dict[str, Any]:
     """Flag positive tests that need post-verification."""
     print("\n[7/11] Flagging positive tests for post-verification...")
@@ -177,32 +422,35 @@ def verification_flag_node(state: PipelineState) -> Dict[str, Any]:
     flagged_count = sum(1 for tc in flagged_tests if tc.needs_post_verification)
     print(f"  - Flagged {flagged_count} positive tests as needing post-verification")
 
-    return {"flagged_tests": flagged_tests}
+    return {"flagged_tests": flagged_tests, **_degraded("verification_flag", agent)}
 
 
 # ===========================================================================
 # Node 8 -- Generate ideal verification scenarios
 # ===========================================================================
 
+@memoizable("flagged_tests", "module_summaries", agents=(IdealVerificationAgent,))
 def ideal_verification_node(state: PipelineState) -> Dict[str, Any]:
     """Generate ideal verification scenarios for flagged tests."""
     print("\n[8/11] Generating ideal verification scenarios...")
 
     agent = IdealVerificationAgent(**_agent_kwargs(state))
-    ideal_verifications = agent.run(
+    ideal_verifications = _run_async(agent.arun(
         state["flagged_tests"],
         state["module_summaries"],
-    )
+    ))
     total_ideals = sum(len(v) for v in ideal_verifications.values())
     print(f"  - Generated {total_ideals} ideal verification scenarios for {len(ideal_verifications)} tests")
 
-    return {"ideal_verifications": ideal_verifications}
+    return {"ideal_verifications": ideal_verifications, **_degraded("ideal_verification", agent)}
 
 
 # ===========================================================================
 # Node 9 -- Match verifications to actual test cases via RAG
 # ===========================================================================
 
+@memoizable("flagged_tests", "ideal_verifications", "output", "module_summaries",
+            agents=(VerificationMatcherAgent, RAGIndexer))
 def verification_matcher_node(state: PipelineState) -> Dict[str, Any]:
     """Match ideal verifications to existing test cases using RAG search."""
     print("\n[9/11] Matching verifications with RAG...")
@@ -216,13 +464,14 @@ def verification_matcher_node(state: PipelineState) -> Dict[str, Any]:
         use_embeddings=True,
     )
 
-    return {"final_tests": final_tests}
+    return {"final_tests": final_tests, **_degraded("verification_matcher", agent)}
 
 
 # ===========================================================================
 # Node 10 -- Generate execution plans
 # ===========================================================================
 
+@memoizable("output", "final_tests", agents=(ExecutionPlanAgent,))
 def execution_plan_node(state: PipelineState) -> Dict[str, Any]:
     """Compile final execution plans for all verified test cases."""
     print("\n[10/11] Generating execution plans...")
@@ -268,6 +517,14 @@ def finalize_node(state: PipelineState) -> Dict[str, Any]:
     # -- Enhanced summary -----------------------------------------------------
     summary = _generate_enhanced_summary(output.test_cases, module_summaries)
     summary["execution_plans"] = plan_summary
+    degraded = _degraded_summary(state)
+    if degraded:
+        summary["degraded"] = degraded
+    if BaseAgent._metrics is not None:
+        # Only this run's calls: other specs may share the collector
+        llm_usage = BaseAgent._metrics.summary(state.get("run_id"))
+        if llm_usage:
+            summary["llm_usage"] = llm_usage
     output.summary = summary
 
     # -- Navigation graph image -----------------------------------------------
@@ -293,11 +550,23 @@ def finalize_node(state: PipelineState) -> Dict[str, Any]:
         for issue in issues[:5]:
             print(f"    ! {issue}")
 
+    # -- LLM failures answered with fallbacks ---------------------------------
+    if degraded:
+        print("  - Some results are fallbacks after LLM failures (rerun to regenerate them):")
+        for stage, count in degraded.get("stages", {}).items():
+            print(f"    ! {stage}: {count} item(s)")
+        for module_id, stage in degraded.get("modules", {}).items():
+            print(f"    ! module {module_id}: {stage}")
+
     # -- Export JSON -----------------------------------------------------------
     json_path = os.path.join(output_dir, "test-cases.json")
     export_json(output, json_path)
     print(f"\n  Output saved to: {json_path}")
 
+    # -- Module manifest for the next incremental run -------------------------
+    if state.get("manifest"):
+        write_manifest(output_dir, state["manifest"])
+
     return {"output": output}
 
 
@@ -305,6 +574,16 @@ def finalize_node(state: PipelineState) -> Dict[str, Any]:
 # Helper used by finalize_node
 # ---------------------------------------------------------------------------
 
+def _degraded_summary(state: PipelineState) -> Dict[str, Any]:
+    """Stages and modules that fell back after LLM failures, for the summary."""
+    degraded: Dict[str, Any] = {}
+    if state.get("degraded_stages"):
+        degraded["stages"] = dict(state["degraded_stages"])
+    if state.get("degraded_modules"):
+        degraded["modules"] = {str(k): v for k, v in sorted(state["degraded_modules"].items())}
+    return degraded
+
+
 def _generate_enhanced_summary(test_cases, module_summaries) -> dict:
     """Generate enhanced summary with verification coverage."""
     summary: Dict[str, Any] = {
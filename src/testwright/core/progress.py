@@ -0,0 +1,62 @@
+"""
+Console progress for stages that process items concurrently.
+
+Items finish out of order when a stage fans out over a worker pool, so
+``ProgressMeter`` counts completions under a lock and reports each one
+with the running throughput and an ETA for the rest of the stage.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class ProgressMeter:
+    """Thread-safe completion counter with throughput and ETA"""
+
+    def __init__(self, total: int, unit: str = "items"):
+        """Initialize the meter
+
+        Args:
+            total: Items the stage will process
+            unit: Plural noun used in the rate, e.g. "chunks"
+        """
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.failed = 0
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def expand(self, count: int):
+        """Add items discovered while the stage is already running"""
+        with self._lock:
+            self.total += count
+
+    def rate(self) -> float:
+        """Items completed per second so far"""
+        elapsed = time.perf_counter() - self._start
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def eta(self) -> Optional[float]:
+        """Seconds until the remaining items are done at the current rate"""
+        rate = self.rate()
+        return (self.total - self.done) / rate if rate > 0 else None
+
+    def advance(self, message: str, failed: bool = False):
+        """Count one finished item and print ``message`` with the progress suffix"""
+        with self._lock:
+            self.done += 1
+            if failed:
+                self.failed += 1
+            eta = self.eta()
+            eta_str = f"ETA {eta:.0f}s" if eta is not None else "ETA --"
+            print(f"  - [{self.done}/{self.total}] {message} "
+                  f"({self.rate():.2f} {self.unit}/s, {eta_str})")
+
+    def finish(self) -> str:
+        """One-line summary of the whole stage"""
+        elapsed = time.perf_counter() - self._start
+        failed = f", {self.failed} failed" if self.failed else ""
+        return (f"{self.done} {self.unit} in {elapsed:.1f}s "
+                f"({self.rate():.2f} {self.unit}/s{failed})")
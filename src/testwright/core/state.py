@@ -5,11 +5,11 @@ Defines the typed state that flows through the entire pipeline graph.
 Each node reads from and writes to this shared state.
 
 Reducer annotations are required for LangGraph >= 1.0 so that
-fan-in from parallel branches (navigation, test_generation, summary
--> assembler) correctly merges all state fields.
+fan-in from the parallel branches (navigation, chunker, summary ->
+test_generation) correctly merges all state fields.
 """
 
-from typing import Annotated, Any, Dict, List, Optional, TypedDict
+from typing import Annotated, Any, Dict, List, Optional, Tuple, TypedDict
 
 from testwright.models.schemas import (
     IdealVerification,
@@ -32,6 +32,15 @@ def _last_value(old, new):
     return new if new is not None else old
 
 
+def _merge_dicts(old, new):
+    """Reducer: union of the dicts written by each branch."""
+    if not old:
+        return new
+    if not new:
+        return old
+    return {**old, **new}
+
+
 class PipelineState(TypedDict, total=False):
     """
     Shared state flowing through the LangGraph pipeline.
@@ -46,6 +55,8 @@ class PipelineState(TypedDict, total=False):
 
     # -- Inputs ---------------------------------------------------------------
     functional_desc: Annotated[Dict[str, Any], _last_value]
+    # Module id -> previous manifest entry, for modules whose spec is unchanged
+    reused_modules: Annotated[Dict[int, Dict[str, Any]], _last_value]
 
     # -- Config ---------------------------------------------------------------
     api_key: Annotated[str, _last_value]
@@ -53,7 +64,9 @@ class PipelineState(TypedDict, total=False):
     provider: Annotated[str, _last_value]
     debug: Annotated[bool, _last_value]
     debug_file: Annotated[str, _last_value]
+    stream: Annotated[bool, _last_value]
     output_dir: Annotated[str, _last_value]
+    run_id: Annotated[str, _last_value]
 
     # -- Step 1: Parser -------------------------------------------------------
     parsed_desc: Annotated[ParsedFunctionalDescription, _last_value]
@@ -61,14 +74,19 @@ class PipelineState(TypedDict, total=False):
     # -- Step 2: Navigation (parallel branch A) -------------------------------
     nav_graph: Annotated[NavigationGraph, _last_value]
 
-    # -- Step 3: Chunker ------------------------------------------------------
+    # -- Step 3: Chunker (parallel branch B) ----------------------------------
     all_chunks: Annotated[List[WorkflowChunk], _last_value]
+    # Module id -> stage ("parse", "chunking", "generation") that fell back
+    # after an LLM failure; such modules are kept out of the manifest
+    degraded_modules: Annotated[Dict[int, str], _merge_dicts]
 
     # -- Step 4: Summary (parallel branch C) ----------------------------------
     module_summaries: Annotated[Dict[int, ModuleSummary], _last_value]
 
     # -- Step 5: Test Generation ----------------------------------------------
     all_tests: Annotated[List[TestCase], _last_value]
+    # Per-module results as generated, written to manifest.json by finalize
+    manifest: Annotated[Dict[str, Any], _last_value]
 
     # -- Step 6: Assembler ----------------------------------------------------
     output: Annotated[TestSuiteOutput, _last_value]
@@ -85,3 +103,10 @@ class PipelineState(TypedDict, total=False):
     # -- Step 10: Execution Plan ----------------------------------------------
     execution_plans: Annotated[Dict[str, Any], _last_value]
     plan_summary: Annotated[Dict[str, Any], _last_value]
+
+    # -- Instrumentation ------------------------------------------------------
+    # Node name -> (start, end) epoch seconds, written by every node
+    stage_timings: Annotated[Dict[str, Tuple[float, float]], _merge_dicts]
+    # Node name -> items it answered with a fallback after an LLM failure;
+    # such outputs are reported by finalize and not memoized
+    degraded_stages: Annotated[Dict[str, int], _merge_dicts]
@@ -0,0 +1,76 @@
+"""Shared LLM transport infrastructure used by all agents."""
+
+from testwright.llm.batch import BatchRunner, BatchStats, LocalBatchTransport
+from testwright.llm.batching import TokenBatcher, count_tokens, get_batcher
+from testwright.llm.cache import ResponseCache, cache_key
+from testwright.llm.continuation import OutputBudget, continuation_prompt, merge_continuation
+from testwright.llm.debuglog import DebugLogger, DebugLogStats
+from testwright.llm.hedging import HedgePolicy, HedgeStats, Route
+from testwright.llm.metrics import CallMetrics, CallRecord, estimate_cost
+from testwright.llm.pool import HTTPPool, PoolStats
+from testwright.llm.ratelimit import RateLimiter, TokenBucket, estimate_tokens
+from testwright.llm.repair import RepairedJSON, repair_json
+from testwright.llm.retry import (
+    BreakerRegistry,
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMAPIError,
+    RetryPolicy,
+    RetryStats,
+)
+from testwright.llm.singleflight import FlightAbandoned, SingleFlight
+from testwright.llm.slots import CallSlots, release_on_close
+from testwright.llm.streaming import (
+    JSONArrayStreamParser,
+    aiter_sse_events,
+    event_delta,
+    event_finish_reason,
+    iter_sse_events,
+)
+from testwright.llm.structured import StructuredOutputStats, json_schema_format
+
+__all__ = [
+    "BatchRunner",
+    "BatchStats",
+    "LocalBatchTransport",
+    "TokenBatcher",
+    "count_tokens",
+    "get_batcher",
+    "HTTPPool",
+    "PoolStats",
+    "ResponseCache",
+    "cache_key",
+    "OutputBudget",
+    "continuation_prompt",
+    "merge_continuation",
+    "DebugLogger",
+    "DebugLogStats",
+    "HedgePolicy",
+    "HedgeStats",
+    "Route",
+    "CallMetrics",
+    "CallRecord",
+    "estimate_cost",
+    "RateLimiter",
+    "TokenBucket",
+    "estimate_tokens",
+    "RepairedJSON",
+    "repair_json",
+    "RetryPolicy",
+    "RetryStats",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "LLMAPIError",
+    "BreakerRegistry",
+    "SingleFlight",
+    "FlightAbandoned",
+    "CallSlots",
+    "release_on_close",
+    "JSONArrayStreamParser",
+    "iter_sse_events",
+    "aiter_sse_events",
+    "event_delta",
+    "event_finish_reason",
+    "StructuredOutputStats",
+    "json_schema_format",
+]
@@ -0,0 +1,362 @@
+"""
+Provider batch-API mode for bulk, latency-insensitive runs.
+
+Instead of one request per item, a stage's requests (e.g. every
+``TestGenerationAgent`` chunk prompt) are written to a JSONL file in the
+OpenAI batch input format, uploaded, and submitted as a single batch
+job.  ``BatchRunner`` polls the job, ingests its output and keeps the
+answers by request key; agents then serve those requests from the batch
+results, so the stage itself runs unchanged.  Requests the job did not
+answer simply go to the network as usual.
+
+``LocalBatchTransport`` is a file-based stand-in for the provider's
+``/files`` and ``/batches`` endpoints.  Uploads, jobs and outputs live
+under a directory, and a job is completed by sending each request
+through another transport (a ``ReplayTransport``, a mock, or a real
+``httpx.HTTPTransport`` for providers without a batch API).
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+
+# Job states after which polling stops
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# (content, finish_reason, usage) of one answered request
+BatchResult = Tuple[str, Optional[str], Dict[str, Any]]
+
+
+class BatchStats:
+    """Thread-safe counters for submitted jobs and ingested results"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.requests = 0
+        self.completed = 0
+        self.failed = 0
+        self.served = 0
+        self.wait_seconds = 0.0
+
+    def record(self, field: str, amount: float = 1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def to_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "jobs": self.jobs,
+                "requests": self.requests,
+                "completed": self.completed,
+                "failed": self.failed,
+                "served": self.served,
+                "wait_seconds": round(self.wait_seconds, 1),
+            }
+
+
+class BatchRunner:
+    """Submit stage requests as batch jobs and hold their results"""
+
+    def __init__(
+        self,
+        workdir: str,
+        poll_interval: float = 30.0,
+        timeout: float = 24 * 3600,
+        completion_window: str = "24h",
+        transport: Optional[httpx.BaseTransport] = None,
+    ):
+        """Initialize the runner
+
+        Args:
+            workdir: Directory for the batch input/output JSONL files
+            poll_interval: Seconds between job status checks
+            timeout: Give up (and cancel the job) after this many seconds
+            completion_window: Completion window requested from the provider
+            transport: Transport for the batch endpoints, e.g. a
+                LocalBatchTransport; None uses the provider's API
+        """
+        self.workdir = workdir
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.completion_window = completion_window
+        self.transport = transport
+        self.stats = BatchStats()
+        self._lock = threading.Lock()
+        self._results: Dict[str, BatchResult] = {}
+
+    def result(self, key: str) -> Optional[BatchResult]:
+        """Batch answer for a request key, or None if the job did not produce one"""
+        with self._lock:
+            result = self._results.get(key)
+        if result is not None:
+            self.stats.record("served")
+        return result
+
+    def run(self, agent: Any, stage: str, requests: List[Tuple[str, Dict[str, Any]]]) -> int:
+        """Submit ``(key, payload)`` requests as one job and wait for it
+
+        ``agent`` supplies the provider base URL and API key.  Returns the
+        number of requests answered by the job; failures are reported and
+        left to the normal per-request path.
+        """
+        with self._lock:
+            pending = {key: payload for key, payload in requests if key not in self._results}
+        if not pending:
+            return 0
+
+        os.makedirs(self.workdir, exist_ok=True)
+        # The suffix keeps concurrent runs of one stage from sharing files
+        prefix = f"{stage}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        input_path = os.path.join(self.workdir, f"{prefix}-input.jsonl")
+        with open(input_path, "w", encoding="utf-8") as f:
+            for key, payload in pending.items():
+                f.write(json.dumps({
+                    "custom_id": key,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": payload,
+                }) + "\n")
+
+        self.stats.record("jobs")
+        self.stats.record("requests", len(pending))
+        start = time.perf_counter()
+        try:
+            with self._client(agent) as client:
+                output = self._submit_and_wait(client, stage, input_path)
+        except (httpx.HTTPError, RuntimeError) as e:
+            print(f"  Warning: batch job for {stage} failed ({e}); falling back to direct calls")
+            self.stats.record("failed", len(pending))
+            return 0
+        finally:
+            self.stats.record("wait_seconds", time.perf_counter() - start)
+
+        output_path = os.path.join(self.workdir, f"{prefix}-output.jsonl")
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(output)
+
+        answered = self._ingest(output, pending)
+        self.stats.record("completed", answered)
+        self.stats.record("failed", len(pending) - answered)
+        return answered
+
+    def _client(self, agent: Any) -> httpx.Client:
+        return httpx.Client(
+            base_url=agent.base_url,
+            headers={"Authorization": f"Bearer {agent.api_key}"},
+            transport=self.transport,
+            timeout=httpx.Timeout(120.0, connect=10.0),
+        )
+
+    def _submit_and_wait(self, client: httpx.Client, stage: str, input_path: str) -> str:
+        """Upload the input file, create the job, poll it and return its output JSONL"""
+        with open(input_path, "rb") as f:
+            upload = client.post(
+                "/files",
+                data={"purpose": "batch"},
+                files={"file": (os.path.basename(input_path), f, "application/jsonl")},
+            )
+        upload.raise_for_status()
+
+        created = client.post("/batches", json={
+            "input_file_id": upload.json()["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": self.completion_window,
+            "metadata": {"stage": stage},
+        })
+        created.raise_for_status()
+        job = created.json()
+        print(f"  - Batch job {job['id']} submitted for {stage}; polling every {self.poll_interval:g}s")
+
+        deadline = time.monotonic() + self.timeout
+        while job["status"] not in FINAL_STATUSES:
+            if time.monotonic() >= deadline:
+                client.post(f"/batches/{job['id']}/cancel")
+                raise RuntimeError(f"timed out after {self.timeout:g}s")
+            time.sleep(self.poll_interval)
+            polled = client.get(f"/batches/{job['id']}")
+            polled.raise_for_status()
+            job = polled.json()
+
+        # Expired and cancelled jobs still return the requests that finished
+        if not job.get("output_file_id"):
+            raise RuntimeError(f"job {job['status']} without output")
+        content = client.get(f"/files/{job['output_file_id']}/content")
+        content.raise_for_status()
+        return content.text
+
+    def _ingest(self, output: str, pending: Dict[str, Dict[str, Any]]) -> int:
+        """Keep every successful answer from a job's output JSONL"""
+        answered = 0
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            key = entry.get("custom_id")
+            response = entry.get("response") or {}
+            if key not in pending or response.get("status_code") != 200:
+                continue
+            body = response.get("body") or {}
+            try:
+                choice = body["choices"][0]
+                result = (choice["message"]["content"], choice.get("finish_reason"), body.get("usage") or {})
+            except (KeyError, IndexError, TypeError):
+                continue
+            with self._lock:
+                self._results[key] = result
+            answered += 1
+        return answered
+
+
+class LocalBatchTransport(httpx.BaseTransport):
+    """File-based stand-in for the provider's ``/files`` and ``/batches`` endpoints"""
+
+    def __init__(self, root: str, backend: httpx.BaseTransport, process_after: float = 0.0):
+        """Initialize the stand-in
+
+        Args:
+            root: Directory holding uploaded files and job state
+            backend: Transport that answers each chat completion in a job
+            process_after: Seconds a job stays ``in_progress`` before it is run
+        """
+        self.root = root
+        self.backend = backend
+        self.process_after = process_after
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        parts = path.rstrip("/").split("/")
+        with self._lock:
+            os.makedirs(os.path.join(self.root, "files"), exist_ok=True)
+            os.makedirs(os.path.join(self.root, "batches"), exist_ok=True)
+            if request.method == "POST" and parts[-1] == "files":
+                return self._upload(request)
+            if request.method == "GET" and parts[-3:-2] == ["files"] and parts[-1] == "content":
+                return self._download(parts[-2])
+            if request.method == "POST" and parts[-1] == "batches":
+                return self._create(request)
+            if request.method == "GET" and parts[-2:-1] == ["batches"]:
+                return self._poll(parts[-1], request)
+            if request.method == "POST" and parts[-1] == "cancel":
+                return self._cancel(parts[-2])
+        return httpx.Response(404, json={"error": {"message": f"no route for {request.method} {path}"}})
+
+    def _file_path(self, file_id: str) -> str:
+        return os.path.join(self.root, "files", f"{file_id}.jsonl")
+
+    def _job_path(self, batch_id: str) -> str:
+        return os.path.join(self.root, "batches", f"{batch_id}.json")
+
+    def _load_job(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._job_path(batch_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _save_job(self, job: Dict[str, Any]):
+        with open(self._job_path(job["id"]), "w", encoding="utf-8") as f:
+            json.dump(job, f, indent=2)
+
+    def _write_file(self, content: bytes) -> str:
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        with open(self._file_path(file_id), "wb") as f:
+            f.write(content)
+        return file_id
+
+    def _upload(self, request: httpx.Request) -> httpx.Response:
+        header = f"Content-Type: {request.headers['content-type']}\r\n\r\n".encode()
+        message = BytesParser(policy=HTTP).parsebytes(header + request.read())
+        for part in message.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                file_id = self._write_file(part.get_payload(decode=True))
+                return httpx.Response(200, json={"id": file_id, "object": "file", "purpose": "batch"})
+        return httpx.Response(400, json={"error": {"message": "missing file part"}})
+
+    def _download(self, file_id: str) -> httpx.Response:
+        try:
+            with open(self._file_path(file_id), "rb") as f:
+                return httpx.Response(200, content=f.read())
+        except FileNotFoundError:
+            return httpx.Response(404, json={"error": {"message": f"no file {file_id}"}})
+
+    def _create(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.read())
+        if not os.path.exists(self._file_path(body.get("input_file_id", ""))):
+            return httpx.Response(400, json={"error": {"message": "unknown input_file_id"}})
+        job = {
+            "id": f"batch_{uuid.uuid4().hex[:24]}",
+            "object": "batch",
+            "endpoint": body.get("endpoint"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window"),
+            "status": "in_progress",
+            "created_at": time.time(),
+            "output_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            "metadata": body.get("metadata") or {},
+        }
+        self._save_job(job)
+        return httpx.Response(200, json=job)
+
+    def _poll(self, batch_id: str, request: httpx.Request) -> httpx.Response:
+        job = self._load_job(batch_id)
+        if job is None:
+            return httpx.Response(404, json={"error": {"message": f"no batch {batch_id}"}})
+        if job["status"] == "in_progress" and time.time() - job["created_at"] >= self.process_after:
+            self._process(job, request)
+        return httpx.Response(200, json=job)
+
+    def _cancel(self, batch_id: str) -> httpx.Response:
+        job = self._load_job(batch_id)
+        if job is None:
+            return httpx.Response(404, json={"error": {"message": f"no batch {batch_id}"}})
+        if job["status"] not in FINAL_STATUSES:
+            job["status"] = "cancelled"
+            self._save_job(job)
+        return httpx.Response(200, json=job)
+
+    def _process(self, job: Dict[str, Any], request: httpx.Request):
+        """Answer every request of a job through the backend and write its output file"""
+        # Chat completions live next to /batches under the same base URL
+        base = str(request.url).split("/batches/")[0]
+        auth = request.headers.get("authorization", "")
+        with open(self._file_path(job["input_file_id"]), encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+
+        out = []
+        counts = {"total": len(lines), "completed": 0, "failed": 0}
+        for line in lines:
+            upstream = httpx.Request(
+                "POST", f"{base}/chat/completions",
+                headers={"Authorization": auth, "Content-Type": "application/json"},
+                content=json.dumps(line["body"]).encode(),
+            )
+            try:
+                response = self.backend.handle_request(upstream)
+                response.read()
+                body = response.json()
+                status = response.status_code
+            except (httpx.HTTPError, ValueError) as e:
+                body, status = {"error": {"message": str(e)}}, 500
+            counts["completed" if status == 200 else "failed"] += 1
+            out.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex[:24]}",
+                "custom_id": line["custom_id"],
+                "response": {"status_code": status, "body": body},
+                "error": None,
+            }))
+
+        job["output_file_id"] = self._write_file(("\n".join(out) + "\n").encode())
+        job["request_counts"] = counts
+        job["status"] = "completed"
+        self._save_job(job)
@@ -0,0 +1,144 @@
+"""
+Token-budget-aware batching for multi-item prompts.
+
+Agents that put many items (test cases, modules) into one prompt declare
+how many completion tokens each item costs.  ``TokenBatcher`` counts
+prompt tokens with a local tokenizer (``tiktoken`` when installed, a
+character estimate otherwise) and packs items, in order, into the fewest
+batches whose prompt fits the model's context window and whose expected
+completion fits its output limit.  Batches are then evened out so the
+last call is not a tiny remainder.
+"""
+
+import functools
+import importlib.util
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from testwright.llm.ratelimit import estimate_tokens
+
+
+# Exact token counts need the optional ``tiktoken`` package
+TIKTOKEN_AVAILABLE = importlib.util.find_spec("tiktoken") is not None
+
+# (context window, max completion tokens) per model family
+MODEL_LIMITS: Dict[str, Tuple[int, int]] = {
+    "gpt-4o-mini": (128_000, 16_384),
+    "gpt-4o": (128_000, 16_384),
+    "gpt-4.1": (1_047_576, 32_768),
+    "gpt-4-turbo": (128_000, 4_096),
+    "gpt-4": (8_192, 4_096),
+    "gpt-3.5-turbo": (16_385, 4_096),
+}
+DEFAULT_LIMITS: Tuple[int, int] = (32_000, 4_096)
+
+T = TypeVar("T")
+
+
+def model_limits(model: str) -> Tuple[int, int]:
+    """Return (context window, max output tokens), matching the longest known prefix"""
+    name = model.split("/")[-1]
+    for prefix in sorted(MODEL_LIMITS, key=len, reverse=True):
+        if name.startswith(prefix):
+            return MODEL_LIMITS[prefix]
+    return DEFAULT_LIMITS
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model: str):
+    import tiktoken  # type: ignore
+    try:
+        return tiktoken.encoding_for_model(model.split("/")[-1])
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Token count of ``text`` for ``model`` (estimated without tiktoken)"""
+    if not TIKTOKEN_AVAILABLE:
+        return estimate_tokens(text)
+    return len(_encoding(model).encode(text, disallowed_special=()))
+
+
+class TokenBatcher:
+    """Pack prompt items into the fewest calls that will not truncate"""
+
+    def __init__(
+        self,
+        model: str,
+        context_window: Optional[int] = None,
+        max_output_tokens: Optional[int] = None,
+        headroom: float = 0.9
+    ):
+        default_context, default_output = model_limits(model)
+        self.model = model
+        self.context_window = context_window or default_context
+        self.max_output_tokens = max_output_tokens or default_output
+        self.headroom = headroom
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self.model)
+
+    def output_budget(self, n_items: int, per_item: int, overhead: int = 0) -> int:
+        """Expected completion tokens for ``n_items`` items"""
+        return overhead + n_items * per_item
+
+    def max_tokens_for(self, n_items: int, per_item: int, overhead: int = 0) -> int:
+        """``max_tokens`` to request for a batch: expected output plus slack, capped"""
+        expected = self.output_budget(n_items, per_item, overhead)
+        return min(self.max_output_tokens, math.ceil(expected / self.headroom))
+
+    def plan(
+        self,
+        items: Sequence[T],
+        render: Callable[[T], str],
+        fixed_prompt: str,
+        per_item: int,
+        overhead: int = 0
+    ) -> List[List[T]]:
+        """Split ``items`` into ordered batches that fit both token limits
+
+        ``fixed_prompt`` is everything sent regardless of the batch (system
+        prompt, instructions, shared context); ``render`` gives the text one
+        item adds to the prompt.  An item too large for any batch is sent
+        on its own.
+        """
+        if not items:
+            return []
+
+        prompt_budget = int(self.context_window * self.headroom)
+        output_budget = int(self.max_output_tokens * self.headroom)
+        fixed = self.count(fixed_prompt)
+        costs = [self.count(render(item)) for item in items]
+
+        def fits(start: int, end: int) -> bool:
+            n = end - start
+            prompt = fixed + sum(costs[start:end])
+            # Leave room in the context window for the completion as well
+            output = self.output_budget(n, per_item, overhead)
+            return n == 1 or (output <= output_budget and prompt + output <= prompt_budget)
+
+        # Greedy in-order packing gives the fewest contiguous batches
+        bounds: List[Tuple[int, int]] = []
+        start = 0
+        while start < len(items):
+            end = start + 1
+            while end < len(items) and fits(start, end + 1):
+                end += 1
+            bounds.append((start, end))
+            start = end
+
+        # Even out batch sizes when that needs no extra calls
+        n_batches = len(bounds)
+        size = math.ceil(len(items) / n_batches)
+        even = [(i, min(i + size, len(items))) for i in range(0, len(items), size)]
+        if len(even) == n_batches and all(fits(s, e) for s, e in even):
+            bounds = even
+
+        return [list(items[s:e]) for s, e in bounds]
+
+
+@functools.lru_cache(maxsize=None)
+def get_batcher(model: str) -> TokenBatcher:
+    """Shared batcher for ``model`` with its default limits"""
+    return TokenBatcher(model)
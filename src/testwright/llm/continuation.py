@@ -0,0 +1,118 @@
+"""
+Truncation-aware continuation and learned completion budgets.
+
+A JSON response cut off by ``max_tokens`` (``finish_reason == "length"``)
+does not have to be thrown away or re-asked from scratch.  The complete
+items of its main array are kept, and a continuation request asks for the
+remaining items only.  The continuation repeats the original prompt
+verbatim, so it shares the provider's cached prefix, and it lists the
+items already received so the model resumes after them.
+
+``OutputBudget`` learns how many completion tokens each agent actually
+uses and caps ``max_tokens`` accordingly.  Short jobs no longer reserve
+the full 4000-token completion against rate limits; the rare response
+that outgrows the learned cap is continued rather than lost.
+"""
+
+import json
+import math
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from testwright.llm.metrics import percentile
+
+
+def continuation_prompt(user_prompt: str, key: str, received: List[Any]) -> str:
+    """Original prompt plus the items already received and a request for the rest"""
+    return f"""{user_prompt}
+
+YOUR PREVIOUS ANSWER WAS CUT OFF BY THE OUTPUT LIMIT.
+It already contained these {len(received)} complete "{key}" entries:
+{json.dumps(received, ensure_ascii=False)}
+
+Continue from there: return the same JSON structure, with "{key}" holding ONLY the
+entries that come after the ones above. Do not repeat any of them.
+If nothing is left, return an empty "{key}" array."""
+
+
+def merge_continuation(received: List[Any], more: Dict[str, Any], key: str) -> List[Any]:
+    """New items of a continuation, skipping exact repeats of received ones"""
+    seen = {json.dumps(item, sort_keys=True) for item in received}
+    fresh = []
+    for item in more.get(key) or []:
+        marker = json.dumps(item, sort_keys=True)
+        if marker not in seen:
+            seen.add(marker)
+            fresh.append(item)
+    return fresh
+
+
+class OutputBudget:
+    """Per-agent max_tokens learned from observed completion sizes"""
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        headroom: float = 1.25,
+        min_samples: int = 5,
+        floor: int = 512,
+        step: int = 512,
+        window: int = 200,
+    ):
+        """Initialize the budget
+
+        Args:
+            percentile: Size the cap to this percentile of observed completions
+            headroom: Multiplier applied on top of that percentile
+            min_samples: Completions needed before an agent's cap is learned
+            floor: Never cap below this many tokens
+            step: Round caps up to a multiple of this, so the cap stays
+                stable as samples arrive (requests are cached under the
+                max_tokens asked for, not the cap)
+            window: Recent completion sizes remembered per agent
+        """
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.floor = floor
+        self.step = step
+        self.window = window
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, Deque[int]] = {}
+        self._capped: Dict[str, int] = {}
+
+    def observe(self, agent: str, completion_tokens: int):
+        """Remember the size of one completion"""
+        if completion_tokens <= 0:
+            return
+        with self._lock:
+            self._sizes.setdefault(agent, deque(maxlen=self.window)).append(completion_tokens)
+
+    def learned(self, agent: str) -> Optional[int]:
+        """The agent's learned cap, or None until enough completions were seen"""
+        with self._lock:
+            sizes = list(self._sizes.get(agent, ()))
+        if len(sizes) < self.min_samples:
+            return None
+        cap = math.ceil(percentile(sizes, self.percentile) * self.headroom / self.step) * self.step
+        return max(cap, self.floor)
+
+    def max_tokens(self, agent: str, requested: int) -> int:
+        """``requested`` lowered to the agent's learned cap, if one is known"""
+        cap = self.learned(agent)
+        if cap is None or cap >= requested:
+            return requested
+        with self._lock:
+            self._capped[agent] = self._capped.get(agent, 0) + 1
+        return cap
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Learned cap, samples and capped-call count per agent"""
+        with self._lock:
+            agents = {agent: len(sizes) for agent, sizes in self._sizes.items()}
+            capped = dict(self._capped)
+        return {
+            agent: {"samples": samples, "max_tokens": self.learned(agent), "capped_calls": capped.get(agent, 0)}
+            for agent, samples in agents.items()
+        }
@@ -0,0 +1,206 @@
+"""
+Non-blocking structured debug logging.
+
+``DebugLogger`` replaces the open/append/close of a text file on every
+``BaseAgent._log_debug`` call.  Agents put records on a bounded queue and
+return immediately; one background thread writes them as JSONL::
+
+    {"ts": "...", "agent": "Test Generation Agent", "label": "USER PROMPT",
+     "call_id": "3f2a...", "duration": null, "content": "..."}
+
+The file is rotated by size (``debug_log.jsonl`` -> ``debug_log.jsonl.1``
+...), rotated segments can be gzip-compressed, and payloads above a size
+limit can be truncated for all but a sampled fraction of calls.  Records
+of one call share its ``call_id``, so prompts and responses can be paired
+again by ``testwright.llm.replay.load_recordings``.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+class DebugLogStats:
+    """Thread-safe counters for written, dropped and truncated records"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.truncated = 0
+        self.rotations = 0
+
+    def record(self, field: str, amount: int = 1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def to_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "written": self.written,
+                "dropped": self.dropped,
+                "truncated": self.truncated,
+                "rotations": self.rotations,
+            }
+
+
+class DebugLogger:
+    """Queue-fed background writer of JSONL debug records"""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 50 * 1024 * 1024,
+        backups: int = 5,
+        compress: bool = False,
+        max_payload: Optional[int] = None,
+        sample_rate: float = 0.0,
+        queue_size: int = 10000,
+    ):
+        """Initialize the logger and start its writer thread
+
+        Args:
+            path: JSONL file to write; truncated at start like a new session
+            max_bytes: Rotate once the file grows past this size (0 disables)
+            backups: Rotated segments to keep
+            compress: Gzip rotated segments
+            max_payload: Truncate payloads longer than this many characters
+                (None keeps everything)
+            sample_rate: Fraction of calls whose large payloads are kept
+                in full anyway, chosen per call id
+            queue_size: Records buffered before new ones are dropped
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.compress = compress
+        self.max_payload = max_payload
+        self.sample_rate = sample_rate
+        self.stats = DebugLogStats()
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="debug-log", daemon=True)
+        self._thread.start()
+
+    def log(
+        self,
+        agent: str,
+        label: str,
+        content: Any,
+        call_id: Optional[str] = None,
+        duration: Optional[float] = None,
+        **extra: Any
+    ):
+        """Queue one record; never blocks the calling agent"""
+        content = str(content)
+        record: Dict[str, Any] = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "agent": agent,
+            "label": label,
+            "call_id": call_id,
+            "duration": round(duration, 3) if duration is not None else None,
+        }
+        record.update(extra)
+        if self.max_payload is not None and len(content) > self.max_payload and not self._sampled(call_id):
+            half = self.max_payload // 2
+            record["truncated"] = True
+            record["length"] = len(content)
+            content = f"{content[:half]}\n...[{len(content) - 2 * half} chars omitted]...\n{content[-half:]}"
+            self.stats.record("truncated")
+        record["content"] = content
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.stats.record("dropped")
+
+    def _sampled(self, call_id: Optional[str]) -> bool:
+        """Deterministic per-call choice so a prompt and its response are kept together"""
+        if self.sample_rate <= 0 or call_id is None:
+            return False
+        bucket = int(hashlib.sha1(call_id.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return bucket < self.sample_rate
+
+    def flush(self):
+        """Block until every queued record has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Drain the queue, stop the writer and close the file"""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            try:
+                if record is None:
+                    self._file.close()
+                    return
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.stats.record("written")
+                if self._queue.empty():
+                    self._file.flush()
+                if self.max_bytes and self._file.tell() >= self.max_bytes:
+                    self._rotate()
+            except (OSError, TypeError, ValueError):
+                # Logging must never take the pipeline down
+                self.stats.record("dropped")
+            finally:
+                self._queue.task_done()
+
+    def _segment(self, n: int) -> str:
+        return f"{self.path}.{n}.gz" if self.compress else f"{self.path}.{n}"
+
+    def _rotate(self):
+        """Shift path.N -> path.N+1, move the live file to path.1 and reopen"""
+        self._file.close()
+        if self.backups > 0:
+            oldest = self._segment(self.backups)
+            if os.path.exists(oldest):
+                os.remove(oldest)
+            for n in range(self.backups - 1, 0, -1):
+                if os.path.exists(self._segment(n)):
+                    os.replace(self._segment(n), self._segment(n + 1))
+            if self.compress:
+                with open(self.path, "rb") as src, gzip.open(self._segment(1), "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            else:
+                os.replace(self.path, self._segment(1))
+        self._file = open(self.path, "w", encoding="utf-8")
+        self.stats.record("rotations")
+
+
+def debug_log_segments(path: str) -> List[str]:
+    """Existing segments of a rotated debug log, oldest first"""
+    rotated = []
+    n = 1
+    while True:
+        for candidate in (f"{path}.{n}", f"{path}.{n}.gz"):
+            if os.path.exists(candidate):
+                rotated.append(candidate)
+                break
+        else:
+            break
+        n += 1
+    return list(reversed(rotated)) + ([path] if os.path.exists(path) else [])
+
+
+def read_text(path: str) -> str:
+    """Read a plain or gzip-compressed text file"""
+    if path.endswith(".gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
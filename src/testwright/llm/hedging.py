@@ -0,0 +1,123 @@
+"""
+Hedged requests and multi-provider failover.
+
+A ``HedgePolicy`` learns each agent's recent call latencies.  When a
+request runs longer than the configured percentile of that history, the
+same request is also sent to the next ``Route`` (another provider, model
+or API key); the first successful answer wins and the other is
+cancelled.  A route that fails outright triggers the next route at once,
+so failover uses the same race.
+
+Time saved by a hedge is measured when the abandoned original still
+completes (synchronous calls).  A cancelled original (async calls) never
+reports back, so the saving is estimated from the learned history as the
+mean latency of past calls slower than the winner, minus the winner's time.
+"""
+
+import statistics
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+from testwright.llm.metrics import percentile
+
+
+@dataclass(frozen=True)
+class Route:
+    """Alternative destination for a request; unset fields keep the agent's own"""
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    api_key: Optional[str] = None
+
+
+class HedgeStats:
+    """Thread-safe counters for hedges, failovers and estimated time saved"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self.saved_seconds = 0.0
+
+    def record(self, field: str, amount: float = 1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def to_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "failovers": self.failovers,
+                "saved_seconds": round(self.saved_seconds, 2),
+            }
+
+
+class HedgePolicy:
+    """When to send a duplicate request, and where"""
+
+    def __init__(
+        self,
+        routes: List[Route],
+        percentile: float = 95.0,
+        min_samples: int = 10,
+        initial_delay: float = 30.0,
+        min_delay: float = 1.0,
+        window: int = 200,
+        max_workers: int = 32,
+    ):
+        """Initialize the policy
+
+        Args:
+            routes: Secondary destinations, tried in order after the agent's own
+            percentile: Hedge once a call is slower than this percentile of
+                the agent's recent latencies
+            min_samples: Latencies needed before the percentile is trusted
+            initial_delay: Hedge delay used until then
+            min_delay: Never hedge sooner than this
+            window: Recent latencies remembered per agent
+            max_workers: Threads available to synchronous hedged calls
+        """
+        self.routes = list(routes)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.window = window
+        self.stats = HedgeStats()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    def observe(self, agent: str, latency: float):
+        """Remember the latency of a completed call"""
+        with self._lock:
+            self._latencies.setdefault(agent, deque(maxlen=self.window)).append(latency)
+
+    def delay(self, agent: str) -> float:
+        """Seconds to wait on a call before hedging it"""
+        with self._lock:
+            history = list(self._latencies.get(agent, ()))
+        if len(history) < self.min_samples:
+            return self.initial_delay
+        return max(percentile(history, self.percentile), self.min_delay)
+
+    def estimate_saved(self, agent: str, won_at: float) -> float:
+        """Estimated seconds a winning hedge saved over waiting for the original
+
+        The original was still running after ``won_at`` seconds, so its
+        expected latency is the mean of past calls slower than that.
+        """
+        with self._lock:
+            tail = [t for t in self._latencies.get(agent, ()) if t > won_at]
+        if not tail:
+            return 0.0
+        return statistics.fmean(tail) - won_at
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
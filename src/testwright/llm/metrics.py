@@ -0,0 +1,238 @@
+"""
+Per-call token, latency and cost accounting.
+
+Every completion made through ``BaseAgent`` is recorded as a
+``CallRecord`` (agent, tokens, wall latency, retries, status).
+``CallMetrics`` rolls the records up per agent with latency percentiles
+and an estimated cost, and exports them as JSONL or Prometheus text.
+"""
+
+import json
+import math
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# USD per 1M tokens: (prompt, cached prompt, completion)
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+}
+
+# Batch-API jobs are billed at a fraction of the synchronous price
+BATCH_DISCOUNT = 0.5
+
+
+@dataclass
+class CallRecord:
+    """One LLM completion request as seen by an agent"""
+    agent: str
+    provider: str
+    model: str
+    status: str  # "ok", "cached", "coalesced", "batched" or "error"
+    latency: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    retries: int = 0
+    http_status: Optional[int] = None
+    finish_reason: Optional[str] = None
+    streamed: bool = False
+    run_id: Optional[str] = None  # Pipeline run the call belongs to
+    timestamp: float = field(default_factory=time.time)
+    call_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+
+
+def usage_counts(usage: Optional[Dict[str, Any]]) -> Tuple[int, int, int]:
+    """Return (prompt, completion, cached) tokens from a provider usage block"""
+    if not usage:
+        return 0, 0, 0
+    details = usage.get("prompt_tokens_details") or {}
+    return (
+        usage.get("prompt_tokens") or 0,
+        usage.get("completion_tokens") or 0,
+        details.get("cached_tokens") or 0,
+    )
+
+
+def estimate_cost(
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int = 0,
+    prices: Optional[Dict[str, Tuple[float, float, float]]] = None
+) -> Optional[float]:
+    """Estimated USD cost of a call, or None if the model has no known price"""
+    prices = prices if prices is not None else MODEL_PRICES
+    price = prices.get(model) or prices.get(model.split("/")[-1])
+    if price is None:
+        return None
+    prompt_price, cached_price, completion_price = price
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (uncached * prompt_price + cached_tokens * cached_price
+            + completion_tokens * completion_price) / 1_000_000
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class CallMetrics:
+    """Thread-safe collector of CallRecords with per-agent rollups"""
+
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float, float]]] = None):
+        self._lock = threading.Lock()
+        self._records: List[CallRecord] = []
+        self.prices = prices if prices is not None else MODEL_PRICES
+
+    def record(self, record: CallRecord):
+        with self._lock:
+            self._records.append(record)
+
+    def records(self) -> List[CallRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def _rollup(self, records: List[CallRecord]) -> Dict[str, Any]:
+        # Only calls that went to the network count towards latency percentiles
+        latencies = [r.latency for r in records if r.status in ("ok", "error")]
+        costs = [
+            estimate_cost(r.model, r.prompt_tokens, r.completion_tokens, r.cached_tokens, self.prices)
+            for r in records
+        ]
+        costs = [
+            c * BATCH_DISCOUNT if c is not None and r.status == "batched" else c
+            for r, c in zip(records, costs)
+        ]
+        # What the same calls would have cost without provider prefix caching
+        uncached_costs = [
+            estimate_cost(r.model, r.prompt_tokens, r.completion_tokens, 0, self.prices)
+            for r in records if r.cached_tokens
+        ]
+        prompt_tokens = sum(r.prompt_tokens for r in records)
+        cached_tokens = sum(r.cached_tokens for r in records)
+        # Latency of network calls that did / did not reuse a cached prefix
+        prefix_hits = [r.latency for r in records if r.status == "ok" and r.cached_tokens]
+        prefix_misses = [r.latency for r in records if r.status == "ok" and not r.cached_tokens]
+        return {
+            "calls": len(records),
+            "errors": sum(1 for r in records if r.status == "error"),
+            "cache_hits": sum(1 for r in records if r.status == "cached"),
+            "coalesced": sum(1 for r in records if r.status == "coalesced"),
+            "batched": sum(1 for r in records if r.status == "batched"),
+            "retries": sum(r.retries for r in records),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": sum(r.completion_tokens for r in records),
+            "cached_tokens": cached_tokens,
+            "prefix_cache_ratio": round(cached_tokens / prompt_tokens, 3) if prompt_tokens else 0.0,
+            "cost_usd": round(sum(c for c in costs if c is not None), 4),
+            "prefix_cache_savings_usd": round(
+                sum(u for u in uncached_costs if u is not None)
+                - sum(c for r, c in zip(records, costs) if r.cached_tokens and c is not None), 4),
+            "unpriced_calls": sum(1 for r, c in zip(records, costs) if c is None and r.status in ("ok", "batched")),
+            "latency_total_s": round(sum(latencies), 3),
+            "latency_p50_s": round(percentile(latencies, 50), 3),
+            "latency_p95_s": round(percentile(latencies, 95), 3),
+            "latency_p99_s": round(percentile(latencies, 99), 3),
+            "latency_p50_prefix_hit_s": round(percentile(prefix_hits, 50), 3),
+            "latency_p50_prefix_miss_s": round(percentile(prefix_misses, 50), 3),
+        }
+
+    def summary(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Per-agent rollup plus a ``total`` entry; empty if nothing was recorded
+
+        With ``run_id`` only the calls of that pipeline run are rolled up.
+        """
+        records = self.records()
+        if run_id is not None:
+            records = [r for r in records if r.run_id == run_id]
+        if not records:
+            return {}
+        by_agent: Dict[str, List[CallRecord]] = {}
+        for r in records:
+            by_agent.setdefault(r.agent, []).append(r)
+        return {
+            "by_agent": {agent: self._rollup(rs) for agent, rs in by_agent.items()},
+            "total": self._rollup(records),
+        }
+
+    def export_jsonl(self, path: str) -> str:
+        """Write one JSON object per call"""
+        with open(path, "w", encoding="utf-8") as f:
+            for r in self.records():
+                f.write(json.dumps(asdict(r)) + "\n")
+        return path
+
+    def to_prometheus(self) -> str:
+        """Render the per-agent rollup in Prometheus text exposition format"""
+        by_agent = self.summary().get("by_agent", {})
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[Tuple[str, float]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{{{labels}}} {value}")
+
+        def label(agent: str, **extra: str) -> str:
+            pairs = {"agent": agent, **extra}
+            return ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs.items())
+
+        calls: List[Tuple[str, float]] = []
+        for a, s in by_agent.items():
+            ok = s["calls"] - s["cache_hits"] - s["coalesced"] - s["batched"] - s["errors"]
+            calls.append((label(a, status="ok"), ok))
+            calls.append((label(a, status="cached"), s["cache_hits"]))
+            calls.append((label(a, status="coalesced"), s["coalesced"]))
+            calls.append((label(a, status="batched"), s["batched"]))
+            calls.append((label(a, status="error"), s["errors"]))
+        metric("testwright_llm_calls_total", "counter", "LLM calls by agent and status", calls)
+        metric("testwright_llm_tokens_total", "counter", "Tokens by agent and kind", [
+            (label(a, kind=kind), s[f"{kind}_tokens"])
+            for a, s in by_agent.items()
+            for kind in ("prompt", "completion", "cached")
+        ])
+        metric("testwright_llm_retries_total", "counter", "Retried LLM requests by agent", [
+            (label(a), s["retries"]) for a, s in by_agent.items()
+        ])
+        metric("testwright_llm_cost_usd_total", "counter", "Estimated LLM spend in USD by agent", [
+            (label(a), s["cost_usd"]) for a, s in by_agent.items()
+        ])
+        metric("testwright_llm_prefix_cache_ratio", "gauge", "Share of prompt tokens served from the provider prefix cache", [
+            (label(a), s["prefix_cache_ratio"]) for a, s in by_agent.items()
+        ])
+
+        lines.append("# HELP testwright_llm_latency_seconds Wall latency of uncached LLM calls")
+        lines.append("# TYPE testwright_llm_latency_seconds summary")
+        for a, s in by_agent.items():
+            for q, key in (("0.5", "latency_p50_s"), ("0.95", "latency_p95_s"), ("0.99", "latency_p99_s")):
+                lines.append(f"testwright_llm_latency_seconds{{{label(a, quantile=q)}}} {s[key]}")
+            lines.append(f"testwright_llm_latency_seconds_sum{{{label(a)}}} {s['latency_total_s']}")
+            lines.append(f"testwright_llm_latency_seconds_count{{{label(a)}}} {s['calls'] - s['cache_hits'] - s['coalesced'] - s['batched']}")
+
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path: str) -> str:
+        """Write the Prometheus text rendering to ``path``"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        return path
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,209 @@
+"""
+Shared HTTP connection pool for LLM providers.
+
+One ``httpx.Client`` per provider is shared by every agent for the life
+of a ``TestCaseGenerator`` so keep-alive connections and TLS sessions
+survive across nodes.  Async clients are bound to the event loop they
+were created on, so they are kept per (loop, provider).
+"""
+
+import asyncio
+import importlib.util
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx  # type: ignore
+
+
+# HTTP/2 needs the optional ``h2`` package (``pip install httpx[http2]``)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class PoolStats:
+    """Thread-safe counters for requests and TCP connections per provider"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    @property
+    def connections_reused(self) -> int:
+        """Requests that were served over an already-open connection"""
+        return max(self.requests - self.connections_opened, 0)
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+        }
+
+
+class HTTPPool:
+    """Process-wide pool of provider clients with keep-alive limits"""
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 120.0,
+        http2: bool = True,
+    ):
+        """Initialize the pool
+
+        Args:
+            max_connections: Maximum concurrent connections per provider
+            max_keepalive_connections: Idle connections kept open per provider
+            keepalive_expiry: Seconds an idle connection is kept alive
+            timeout: Request timeout in seconds
+            http2: Negotiate HTTP/2 when the ``h2`` package is installed
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+
+        self._lock = threading.Lock()
+        self._clients: Dict[str, httpx.Client] = {}
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._stats: Dict[str, PoolStats] = {}
+        self._transports: Dict[str, Any] = {}
+        self.recorder: Optional[Any] = None
+
+    # ------------------------------------------------------------------
+    # Client access
+    # ------------------------------------------------------------------
+
+    def mount(self, provider: str, transport: Any):
+        """Serve a provider from a custom transport (e.g. offline replay)
+
+        ``transport`` must implement both the sync and async httpx
+        transport interfaces.  Affects clients created after this call.
+        """
+        with self._lock:
+            self._transports[provider] = transport
+
+    def set_recorder(self, recorder: Optional[Any]):
+        """Capture real provider traffic through ``recorder.wrap``/``wrap_async``"""
+        self.recorder = recorder
+
+    def _sync_transport(self, provider: str) -> Optional[httpx.BaseTransport]:
+        transport = self._transports.get(provider)
+        if transport is None and self.recorder is not None:
+            transport = self.recorder.wrap(httpx.HTTPTransport(limits=self.limits, http2=self.http2))
+        return transport
+
+    def _async_transport(self, provider: str) -> Optional[httpx.AsyncBaseTransport]:
+        transport = self._transports.get(provider)
+        if transport is None and self.recorder is not None:
+            transport = self.recorder.wrap_async(
+                httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+            )
+        return transport
+
+    def client(self, provider: str) -> httpx.Client:
+        """Return the shared sync client for a provider"""
+        with self._lock:
+            client = self._clients.get(provider)
+            if client is None:
+                stats = self._stats_for(provider)
+                client = httpx.Client(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    http2=self.http2,
+                    transport=self._sync_transport(provider),
+                    event_hooks={"request": [self._sync_hook(stats)]},
+                )
+                self._clients[provider] = client
+            return client
+
+    def async_client(self, provider: str) -> httpx.AsyncClient:
+        """Return the shared async client for a provider on the running loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, {})
+            client = clients.get(provider)
+            if client is None:
+                stats = self._stats_for(provider)
+                client = httpx.AsyncClient(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    http2=self.http2,
+                    transport=self._async_transport(provider),
+                    event_hooks={"request": [self._async_hook(stats)]},
+                )
+                clients[provider] = client
+            return client
+
+    def stats(self) -> Dict[str, dict]:
+        """Return request/connection counters keyed by provider"""
+        with self._lock:
+            return {provider: s.to_dict() for provider, s in self._stats.items()}
+
+    def close(self):
+        """Close all sync clients"""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients = {}
+        for client in clients:
+            client.close()
+
+    async def aclose(self):
+        """Close the async clients that belong to the running loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.pop(loop, {})
+        for client in clients.values():
+            await client.aclose()
+
+    # ------------------------------------------------------------------
+    # Connection tracing
+    # ------------------------------------------------------------------
+
+    def _stats_for(self, provider: str) -> PoolStats:
+        """Return the stats object for a provider (caller holds the lock)"""
+        if provider not in self._stats:
+            self._stats[provider] = PoolStats()
+        return self._stats[provider]
+
+    @staticmethod
+    def _sync_hook(stats: PoolStats):
+        """Request hook counting requests and new TCP connections"""
+        def trace(event_name: str, info: dict):
+            if event_name == "connection.connect_tcp.complete":
+                stats.record_connection()
+
+        def hook(request: httpx.Request):
+            stats.record_request()
+            request.extensions["trace"] = trace
+
+        return hook
+
+    @staticmethod
+    def _async_hook(stats: PoolStats):
+        """Async request hook counting requests and new TCP connections"""
+        async def trace(event_name: str, info: dict):
+            if event_name == "connection.connect_tcp.complete":
+                stats.record_connection()
+
+        async def hook(request: httpx.Request):
+            stats.record_request()
+            request.extensions["trace"] = trace
+
+        return hook
@@ -0,0 +1,136 @@
+"""
+Client-side rate limiting for provider RPM / TPM quotas.
+
+Each (provider, model) pair gets two token buckets: one for requests per
+minute and one for tokens per minute.  Callers *reserve* capacity before
+sending; the reservation is taken immediately under a lock (the bucket
+may go into debt) and the caller then sleeps for the returned delay
+outside the lock.  That makes the limiter safe to share between threads
+and event loops alike.  After the response arrives the token bucket is
+corrected with the provider-reported usage.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap prompt-size estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Continuously refilling bucket that hands out wait times"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self._tokens = per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` now and return how long the caller must wait"""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def adjust(self, delta: float):
+        """Refund (positive) or charge (negative) tokens after the fact"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens + delta)
+
+
+class RateLimiter:
+    """Paces requests to stay just under per-minute request and token quotas"""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        headroom: float = 0.95,
+    ):
+        """Initialize the limiter
+
+        Args:
+            requests_per_minute: Provider RPM quota (None = unlimited)
+            tokens_per_minute: Provider TPM quota (None = unlimited)
+            headroom: Fraction of the quota to target so bursts stay below it
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.headroom = headroom
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str], Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+
+        self.requests = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    def _buckets_for(self, provider: str, model: str) -> Tuple[Optional[TokenBucket], Optional[TokenBucket]]:
+        key = (provider, model)
+        with self._lock:
+            if key not in self._buckets:
+                rpm = self.requests_per_minute
+                tpm = self.tokens_per_minute
+                self._buckets[key] = (
+                    TokenBucket(rpm * self.headroom) if rpm else None,
+                    TokenBucket(tpm * self.headroom) if tpm else None,
+                )
+            return self._buckets[key]
+
+    def _reserve(self, provider: str, model: str, tokens: int) -> float:
+        """Reserve one request plus ``tokens`` and return the wait"""
+        request_bucket, token_bucket = self._buckets_for(provider, model)
+        wait = 0.0
+        if request_bucket:
+            wait = max(wait, request_bucket.reserve(1))
+        if token_bucket:
+            wait = max(wait, token_bucket.reserve(tokens))
+
+        with self._lock:
+            self.requests += 1
+            if wait > 0:
+                self.throttled += 1
+                self.wait_seconds += wait
+        return wait
+
+    def acquire(self, provider: str, model: str, tokens: int) -> float:
+        """Block until the request fits the quota; returns seconds waited"""
+        wait = self._reserve(provider, model, tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, provider: str, model: str, tokens: int) -> float:
+        """Awaitable variant of acquire"""
+        wait = self._reserve(provider, model, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def reconcile(self, provider: str, model: str, estimated: int, actual: int):
+        """Correct the token bucket once the real usage is known"""
+        _, token_bucket = self._buckets_for(provider, model)
+        if token_bucket:
+            token_bucket.adjust(estimated - actual)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "wait_seconds": round(self.wait_seconds, 2),
+            }
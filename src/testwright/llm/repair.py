@@ -0,0 +1,112 @@
+"""
+Tolerant local JSON repair.
+
+``BaseAgent.call_llm_json`` runs ``repair_json`` on a response that fails
+``json.loads`` before paying for another LLM call.  It strips prose and
+code fences around the JSON, drops trailing commas, and, when the output
+was cut off (usually at ``max_tokens``), discards the element that was
+still being written and closes every open array and object.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+@dataclass
+class RepairedJSON:
+    """A salvaged JSON value and what had to be done to get it"""
+    value: Any
+    truncated: bool = False
+    changes: List[str] = field(default_factory=list)
+
+
+def _scan(text: str) -> Tuple[List[str], List[str], List[Tuple[int, int]], List[str]]:
+    """Copy the first JSON value in ``text``, stopping when it closes
+
+    Returns the copied characters, the brackets still open at the end, the
+    safe cut points as ``(length of copy, open depth)`` pairs, and notes.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, int]] = []
+    notes: List[str] = []
+    in_string = False
+    escaped = False
+
+    for ch in text:
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch in _CLOSERS:
+            stack.append(ch)
+            out.append(ch)
+            cuts.append((len(out), len(stack)))
+        elif ch in "}]":
+            if not stack:
+                break
+            # Trailing comma before the closer
+            end = len(out)
+            while end and out[end - 1].isspace():
+                end -= 1
+            if end and out[end - 1] == ",":
+                del out[end - 1]
+                if "removed trailing comma" not in notes:
+                    notes.append("removed trailing comma")
+            out.append(_CLOSERS[stack.pop()])
+            if not stack:
+                break
+            cuts.append((len(out), len(stack)))
+        elif ch == ",":
+            cuts.append((len(out), len(stack)))
+            out.append(ch)
+        else:
+            out.append(ch)
+
+    return out, stack, cuts, notes
+
+
+def repair_json(text: str) -> Optional[RepairedJSON]:
+    """Best-effort parse of a malformed or truncated JSON object/array
+
+    Returns None if nothing parseable can be recovered.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None
+    start = min(starts)
+
+    out, stack, cuts, changes = _scan(text[start:])
+    candidate = "".join(out)
+    if text[:start].strip() or text[start + len(candidate):].strip():
+        changes.insert(0, "stripped surrounding text")
+
+    truncated = bool(stack)
+    if truncated:
+        # Drop the element in progress in the outermost open array (or the
+        # innermost member if only objects are open), then close the rest.
+        depth = stack.index("[") + 1 if "[" in stack else len(stack)
+        position = next((pos for pos, d in reversed(cuts) if d == depth), None)
+        if position is None:
+            return None
+        candidate = "".join(out[:position]).rstrip()
+        candidate += "".join(_CLOSERS[b] for b in reversed(stack[:depth]))
+        changes.append(f"dropped incomplete element and closed {depth} bracket(s)")
+
+    try:
+        value = json.loads(candidate)
+    except json.JSONDecodeError:
+        return None
+    return RepairedJSON(value=value, truncated=truncated, changes=changes)
@@ -0,0 +1,377 @@
+"""
+Offline record/replay of LLM provider traffic.
+
+``SessionRecorder`` wraps the real HTTP transports and appends every
+chat completion (prompts, content, finish_reason, usage, latency) to a
+JSONL file.  ``ReplayTransport`` serves those recordings -- or the
+prompt/response pairs of a ``--debug`` log, JSONL (including rotated,
+gzipped segments) or the older text format -- back to the ``replay``
+provider with configurable synthetic latency, so the whole pipeline
+(retries, rate limiting, streaming, metrics) runs deterministically
+without keys or network.
+
+Requests are matched on (system prompt, user prompt); failing that on
+the user prompt alone, and finally on the next unused recording for the
+same system prompt (i.e. the same agent), in recorded order.
+"""
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import httpx  # type: ignore
+
+from testwright.llm.debuglog import debug_log_segments, read_text
+from testwright.llm.streaming import event_delta, event_finish_reason, iter_sse_events
+
+
+_DEBUG_HEADER = re.compile(
+    r"\n-{60}\n\[(\d{2}):(\d{2}):(\d{2})\] (.+?) - ([^\n]+)\n-{60}\n"
+)
+
+
+def _messages(body: Dict[str, Any]) -> Tuple[Optional[str], str]:
+    """Return (system prompt, user prompt) from a chat completion body"""
+    system, user = None, ""
+    for message in body.get("messages", []):
+        if message.get("role") == "system":
+            system = message.get("content")
+        elif message.get("role") == "user":
+            user = message.get("content", "")
+    return system, user
+
+
+def load_recordings(path: str) -> List[Dict[str, Any]]:
+    """Load a JSONL capture, or the prompt/response pairs of a debug log"""
+    text = read_text(path)
+    if not text.lstrip().startswith("{"):
+        return _parse_debug_log(text)
+    entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if entries and "label" in entries[0]:
+        # Structured debug log: older rotated segments come first
+        segments = debug_log_segments(path)
+        if len(segments) > 1:
+            entries = [
+                json.loads(line)
+                for segment in segments
+                for line in read_text(segment).splitlines() if line.strip()
+            ]
+        return _parse_debug_records(entries)
+    return entries
+
+
+def _parse_debug_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pair USER PROMPT and LLM RESPONSE records of a JSONL debug log by call id"""
+    recordings = []
+    system_prompts: Dict[str, str] = {}
+    prompts: Dict[str, Dict[str, Any]] = {}
+
+    for record in records:
+        label, agent, call_id = record.get("label", ""), record.get("agent"), record.get("call_id")
+        if label == "SYSTEM PROMPT" and not record.get("truncated"):
+            system_prompts[agent] = record["content"]
+        elif label == "USER PROMPT" and call_id:
+            prompts[call_id] = record
+        elif label.startswith("LLM RESPONSE") and call_id in prompts:
+            prompt = prompts.pop(call_id)
+            # Sampled-out payloads were cut short and cannot be replayed
+            if prompt.get("truncated") or record.get("truncated"):
+                continue
+            recordings.append({
+                "agent": agent,
+                "system": system_prompts.get(agent),
+                "user": prompt["content"],
+                "content": record["content"],
+                "finish_reason": "stop",
+                "usage": None,
+                "latency": record.get("duration") or 0.0,
+            })
+    return recordings
+
+
+def _parse_debug_log(text: str) -> List[Dict[str, Any]]:
+    """Pair each agent's USER PROMPT with the LLM RESPONSE that follows it"""
+    recordings = []
+    system_prompts: Dict[str, str] = {}
+    pending: Dict[str, Tuple[str, int]] = {}
+
+    headers = list(_DEBUG_HEADER.finditer(text))
+    for i, match in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        content = text[match.end():end]
+        if content.endswith("\n"):
+            content = content[:-1]
+        hours, minutes, seconds, agent, label = match.groups()
+        stamp = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+        if label == "SYSTEM PROMPT":
+            system_prompts[agent] = content
+        elif label == "USER PROMPT":
+            pending[agent] = (content, stamp)
+        elif label.startswith("LLM RESPONSE") and agent in pending:
+            user, started = pending.pop(agent)
+            recordings.append({
+                "agent": agent,
+                "system": system_prompts.get(agent),
+                "user": user,
+                "content": content,
+                "finish_reason": "stop",
+                "usage": None,
+                "latency": float((stamp - started) % 86400),
+            })
+    return recordings
+
+
+class ReplayStats:
+    """Thread-safe counters for how replayed requests were matched"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.exact = 0
+        self.fallback = 0
+        self.missed = 0
+
+    def record(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def to_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {"exact": self.exact, "fallback": self.fallback, "missed": self.missed}
+
+
+class ReplayTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """httpx transport that answers chat completions from a recorded session"""
+
+    def __init__(
+        self,
+        recordings: List[Dict[str, Any]],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        latency_scale: Optional[float] = None,
+        seed: int = 0,
+    ):
+        """Initialize the transport
+
+        Args:
+            recordings: Entries from ``load_recordings``
+            latency: Fixed synthetic delay per request in seconds
+            jitter: Random +/- fraction applied to the delay
+            latency_scale: If set, replay each recording's own latency
+                multiplied by this factor instead of ``latency``
+            seed: Seed for the jitter so runs are repeatable
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.latency_scale = latency_scale
+        self.stats = ReplayStats()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._used: Set[int] = set()
+        self._exact: Dict[Tuple[Optional[str], str], Deque[Dict[str, Any]]] = {}
+        self._by_user: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._by_system: Dict[Optional[str], Deque[Dict[str, Any]]] = {}
+        for entry in recordings:
+            self._exact.setdefault((entry.get("system"), entry["user"]), deque()).append(entry)
+            self._by_user.setdefault(entry["user"], deque()).append(entry)
+            self._by_system.setdefault(entry.get("system"), deque()).append(entry)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "ReplayTransport":
+        return cls(load_recordings(path), **kwargs)
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    def _take(self, queue: Optional[Deque[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Pop the next unused entry, keeping the last one so repeats still resolve"""
+        if not queue:
+            return None
+        while len(queue) > 1 and id(queue[0]) in self._used:
+            queue.popleft()
+        entry = queue.popleft() if len(queue) > 1 else queue[0]
+        self._used.add(id(entry))
+        return entry
+
+    def _lookup(self, system: Optional[str], user: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._take(self._exact.get((system, user))) or self._take(self._by_user.get(user))
+            if entry is not None:
+                self.stats.record("exact")
+                return entry
+            entry = self._take(self._by_system.get(system))
+        self.stats.record("fallback" if entry is not None else "missed")
+        return entry
+
+    def _delay(self, entry: Optional[Dict[str, Any]]) -> float:
+        if self.latency_scale is not None and entry is not None:
+            base = (entry.get("latency") or 0.0) * self.latency_scale
+        else:
+            base = self.latency
+        if not base:
+            return 0.0
+        with self._lock:
+            spread = self._random.uniform(-self.jitter, self.jitter)
+        return max(base * (1 + spread), 0.0)
+
+    # ------------------------------------------------------------------
+    # Responses
+    # ------------------------------------------------------------------
+
+    def _prepare(self, request: httpx.Request) -> Tuple[httpx.Response, float]:
+        body = json.loads(request.content or b"{}")
+        entry = self._lookup(*_messages(body))
+        if entry is None:
+            response = httpx.Response(
+                404, json={"error": {"message": "No recorded response for this request"}}
+            )
+            return response, 0.0
+        if body.get("stream"):
+            response = httpx.Response(
+                200,
+                content=self._sse_body(entry),
+                headers={"content-type": "text/event-stream"},
+            )
+        else:
+            response = httpx.Response(200, json={
+                "object": "chat.completion",
+                "model": body.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": entry["content"]},
+                    "finish_reason": entry.get("finish_reason") or "stop",
+                }],
+                "usage": entry.get("usage"),
+            })
+        return response, self._delay(entry)
+
+    @staticmethod
+    def _sse_body(entry: Dict[str, Any], chunk_size: int = 64) -> bytes:
+        content = entry["content"]
+        events = [
+            {"choices": [{"index": 0, "delta": {"content": content[i:i + chunk_size]}}]}
+            for i in range(0, len(content), chunk_size)
+        ]
+        events.append({"choices": [{
+            "index": 0, "delta": {}, "finish_reason": entry.get("finish_reason") or "stop"
+        }]})
+        if entry.get("usage"):
+            events.append({"choices": [], "usage": entry["usage"]})
+        lines = [f"data: {json.dumps(e)}\n\n" for e in events] + ["data: [DONE]\n\n"]
+        return "".join(lines).encode("utf-8")
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response, delay = self._prepare(request)
+        if delay:
+            time.sleep(delay)
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response, delay = self._prepare(request)
+        if delay:
+            await asyncio.sleep(delay)
+        return response
+
+
+class SessionRecorder:
+    """Append every successful chat completion to a JSONL capture file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Start a fresh capture for this session
+        open(path, "w", encoding="utf-8").close()
+
+    def wrap(self, transport: httpx.BaseTransport) -> httpx.BaseTransport:
+        return _RecordingTransport(transport, self)
+
+    def wrap_async(self, transport: httpx.AsyncBaseTransport) -> httpx.AsyncBaseTransport:
+        return _AsyncRecordingTransport(transport, self)
+
+    def write(self, request: httpx.Request, status_code: int, body: bytes, latency: float):
+        """Normalize a completed exchange (plain or SSE) and append it"""
+        if status_code != 200 or not request.url.path.endswith("/chat/completions"):
+            return
+        payload = json.loads(request.content or b"{}")
+        system, user = _messages(payload)
+        text = body.decode("utf-8")
+
+        if payload.get("stream"):
+            parts, finish_reason, usage = [], None, None
+            for event in iter_sse_events(text.splitlines()):
+                parts.append(event_delta(event))
+                finish_reason = event_finish_reason(event) or finish_reason
+                usage = event.get("usage") or usage
+            content = "".join(parts)
+        else:
+            result = json.loads(text)
+            choice = result["choices"][0]
+            content = choice["message"]["content"]
+            finish_reason = choice.get("finish_reason")
+            usage = result.get("usage")
+
+        record = {
+            "model": payload.get("model"),
+            "system": system,
+            "user": user,
+            "content": content,
+            "finish_reason": finish_reason,
+            "usage": usage,
+            "latency": round(latency, 3),
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _buffered(response: httpx.Response, body: bytes) -> httpx.Response:
+    """Rebuild a fully-read response; ``body`` is already decoded"""
+    headers = [
+        (k, v) for k, v in response.headers.items()
+        if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+    ]
+    return httpx.Response(response.status_code, headers=headers, content=body)
+
+
+class _RecordingTransport(httpx.BaseTransport):
+    """Reads each response fully (so streams arrive at once while recording)"""
+
+    def __init__(self, inner: httpx.BaseTransport, recorder: SessionRecorder):
+        self._inner = inner
+        self._recorder = recorder
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = self._inner.handle_request(request)
+        body = response.read()
+        response.close()
+        self._recorder.write(request, response.status_code, body, time.perf_counter() - start)
+        return _buffered(response, body)
+
+    def close(self):
+        self._inner.close()
+
+
+class _AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    """Awaitable variant of _RecordingTransport"""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, recorder: SessionRecorder):
+        self._inner = inner
+        self._recorder = recorder
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self._inner.handle_async_request(request)
+        body = await response.aread()
+        await response.aclose()
+        self._recorder.write(request, response.status_code, body, time.perf_counter() - start)
+        return _buffered(response, body)
+
+    async def aclose(self):
+        await self._inner.aclose()
@@ -0,0 +1,232 @@
+"""
+Retry policy and circuit breaker for LLM provider calls.
+
+``RetryPolicy`` decides whether a failed request is worth repeating and
+how long to back off (full-jitter exponential, never shorter than the
+provider's ``Retry-After``).  ``CircuitBreaker`` tracks consecutive
+failures per provider and rejects calls outright while the provider is
+unhealthy, letting a single probe through after a cool-down.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx  # type: ignore
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker is shedding load"""
+
+
+class LLMAPIError(Exception):
+    """Non-success response from a provider, carrying its status and body"""
+
+    def __init__(self, message: str, status_code: int, body: str = ""):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+class RetryStats:
+    """Thread-safe counters describing time lost to retries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.backoff_seconds = 0.0
+        self.gave_up = 0
+        self.circuit_rejections = 0
+        self.circuit_trips = 0
+
+    def record_retry(self, delay: float):
+        with self._lock:
+            self.retries += 1
+            self.backoff_seconds += delay
+
+    def record_give_up(self):
+        with self._lock:
+            self.gave_up += 1
+
+    def record_rejection(self):
+        with self._lock:
+            self.circuit_rejections += 1
+
+    def record_trip(self):
+        with self._lock:
+            self.circuit_trips += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "retries": self.retries,
+            "backoff_seconds": round(self.backoff_seconds, 2),
+            "gave_up": self.gave_up,
+            "circuit_trips": self.circuit_trips,
+            "circuit_rejections": self.circuit_rejections,
+        }
+
+
+class RetryPolicy:
+    """Jittered exponential backoff that honours Retry-After"""
+
+    RETRY_STATUSES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        jitter: bool = True,
+    ):
+        """Initialize the policy
+
+        Args:
+            max_retries: Extra attempts after the first request
+            base_delay: Backoff for the first retry in seconds
+            max_delay: Upper bound on any single backoff
+            jitter: Use full jitter (uniform in [0, backoff]) to avoid herds
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.stats = RetryStats()
+
+    def is_retryable(self, status_code: int) -> bool:
+        return status_code in self.RETRY_STATUSES
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Return seconds to wait before retry number ``attempt + 1``"""
+        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    @staticmethod
+    def retry_after(response: httpx.Response) -> Optional[float]:
+        """Parse ``retry-after-ms`` / ``Retry-After`` (seconds or HTTP date)"""
+        value = response.headers.get("retry-after-ms")
+        if value:
+            try:
+                return float(value) / 1000.0
+            except ValueError:
+                pass
+
+        value = response.headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+class CircuitBreaker:
+    """Per-provider breaker: closed -> open after N failures -> half-open probe"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        stats: Optional[RetryStats] = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.stats = stats
+
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call should be shed"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    self._reject()
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            # Half-open: exactly one probe at a time
+            if self._probe_in_flight:
+                self._reject()
+            self._probe_in_flight = True
+
+    def release_probe(self):
+        """Free the half-open probe slot of a call that ended without an outcome"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN and self.stats:
+                    self.stats.record_trip()
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def _reject(self):
+        """Count and raise a shed call (lock held)"""
+        if self.stats:
+            self.stats.record_rejection()
+        remaining = max(self.recovery_timeout - (time.monotonic() - self._opened_at), 0.0)
+        raise CircuitOpenError(
+            f"{self.name.upper()} circuit open after {self._failures} consecutive failures; "
+            f"retrying in {remaining:.1f}s"
+        )
+
+
+class BreakerRegistry:
+    """Lazily created circuit breakers keyed by provider"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        stats: Optional[RetryStats] = None,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            if provider not in self._breakers:
+                self._breakers[provider] = CircuitBreaker(
+                    provider,
+                    failure_threshold=self.failure_threshold,
+                    recovery_timeout=self.recovery_timeout,
+                    stats=self.stats,
+                )
+            return self._breakers[provider]
+
+    def states(self) -> Dict[str, str]:
+        with self._lock:
+            return {name: b.state for name, b in self._breakers.items()}
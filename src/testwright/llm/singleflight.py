@@ -0,0 +1,78 @@
+"""
+In-process single-flight coalescing of identical LLM requests.
+
+When concurrent workers build byte-identical requests (same provider,
+model, prompts and sampling parameters) only the first -- the leader --
+goes to the network.  Later callers with the same request key wait on
+the leader's ``concurrent.futures.Future`` and share its result or
+exception.  Sync callers block on the future; async callers await it via
+``asyncio.wrap_future``, so threads and event loops can share a flight.
+
+Flights are marked running as soon as they are created, so a follower
+that is cancelled while it waits (a hedge loser, a timed-out gather)
+cannot cancel the flight out from under the leader and the other
+followers.  A leader that is itself cancelled or interrupted ends the
+flight with ``FlightAbandoned``; its followers then retry, and one of
+them takes the lead.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+
+class FlightAbandoned(Exception):
+    """The leader stopped without an outcome; followers should retry"""
+
+
+class SingleFlight:
+    """Registry of in-flight requests keyed by request hash"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def join(self, key: str) -> Tuple[Future, bool]:
+        """Return the flight for ``key`` and whether the caller must lead it"""
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = Future()
+            flight.set_running_or_notify_cancel()
+            self._inflight[key] = flight
+            self.leaders += 1
+            return flight, True
+
+    def finish(
+        self,
+        key: str,
+        flight: Future,
+        result: Any = None,
+        error: Optional[BaseException] = None
+    ):
+        """Complete the leader's flight and release every waiter
+
+        An ``error`` that is not an ``Exception`` (cancellation, interrupt)
+        says nothing about the request, so followers get FlightAbandoned.
+        """
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+        if flight.done():
+            return
+        if error is not None:
+            flight.set_exception(error if isinstance(error, Exception) else FlightAbandoned())
+        else:
+            flight.set_result(result)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            }
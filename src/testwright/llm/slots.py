@@ -0,0 +1,127 @@
+"""
+Process-wide cap on LLM requests in flight.
+
+Threads and event loops draw from the same pool of slots.  A caller that
+finds none free queues a ``concurrent.futures.Future`` which ``release``
+completes in FIFO order: sync callers block on it, async callers await it
+via ``asyncio.wrap_future``, so waiting never polls or ties up a thread.
+
+A slot covers the whole exchange, not just sending the request:
+``release_on_close`` keeps it held until a streamed response's body has
+been read and closed.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from typing import AsyncIterator, Callable, Deque, Iterator
+
+import httpx  # type: ignore
+
+
+class CallSlots:
+    """FIFO counting semaphore shared by threads and event loops"""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._lock = threading.Lock()
+        self._available = self.limit
+        self._waiters: Deque[Future] = deque()
+
+    def _take_or_wait(self) -> Future:
+        """A completed future if a slot was free, else a queued waiter"""
+        waiter: Future = Future()
+        with self._lock:
+            if self._available > 0 and not self._waiters:
+                self._available -= 1
+                waiter.set_result(None)
+            else:
+                self._waiters.append(waiter)
+        return waiter
+
+    def acquire(self):
+        """Block until a slot is free and take it"""
+        self._take_or_wait().result()
+
+    async def aacquire(self):
+        """Awaitable variant of acquire; cancelling the wait gives up the slot"""
+        waiter = self._take_or_wait()
+        try:
+            await asyncio.wrap_future(waiter)
+        except asyncio.CancelledError:
+            # Cancelled before release() handed us the slot: leave the queue.
+            # Otherwise the slot is ours and must be passed on.
+            if waiter.cancel():
+                with self._lock:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+            else:
+                self.release()
+            raise
+
+    def release(self):
+        """Hand the slot to the oldest live waiter, or return it to the pool"""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                try:
+                    waiter.set_result(None)
+                    return
+                except InvalidStateError:
+                    continue  # Its caller was cancelled
+            if self._available >= self.limit:
+                raise ValueError("CallSlots released too many times")
+            self._available += 1
+
+    def in_use(self) -> int:
+        with self._lock:
+            return self.limit - self._available
+
+    def __enter__(self) -> "CallSlots":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class _ReleasingStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Response body that calls ``release`` once when it is closed"""
+
+    def __init__(self, stream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    def _release_once(self):
+        if not self._released:
+            self._released = True
+            self._release()
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._release_once()
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release_once()
+
+
+def release_on_close(response: httpx.Response, release: Callable[[], None]):
+    """Call ``release`` when ``response`` is closed (now, if its body was already read)"""
+    if response.is_closed:
+        release()
+    else:
+        response.stream = _ReleasingStream(response.stream, release)
@@ -0,0 +1,137 @@
+"""
+Server-sent-events helpers and an incremental JSON array parser.
+
+``iter_sse_events`` turns the ``data:`` lines of an OpenAI-compatible
+streaming completion into event dicts.  ``JSONArrayStreamParser`` is fed
+the concatenated content deltas and returns each element of a named
+top-level array (e.g. ``test_cases``) the moment its closing brace
+arrives, long before the full document is valid JSON.
+"""
+
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+
+# Returned by _sse_payload for the end-of-stream sentinel
+_DONE = object()
+
+
+def _sse_payload(line: str) -> Any:
+    """Decoded ``data:`` payload of a line, ``_DONE`` for ``[DONE]``, else None"""
+    if not line or not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return _DONE
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError:
+        return None
+
+
+def iter_sse_events(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Yield decoded ``data:`` payloads until ``[DONE]``"""
+    for line in lines:
+        event = _sse_payload(line)
+        if event is _DONE:
+            return
+        if event is not None:
+            yield event
+
+
+async def aiter_sse_events(lines: AsyncIterable[str]) -> AsyncIterator[Dict[str, Any]]:
+    """Awaitable variant of iter_sse_events"""
+    async for line in lines:
+        event = _sse_payload(line)
+        if event is _DONE:
+            return
+        if event is not None:
+            yield event
+
+
+def event_delta(event: Dict[str, Any]) -> str:
+    """Return the content delta carried by a streaming event"""
+    choices = event.get("choices") or []
+    if not choices:
+        return ""
+    return (choices[0].get("delta") or {}).get("content") or ""
+
+
+def event_finish_reason(event: Dict[str, Any]) -> Optional[str]:
+    """Return the finish_reason of a streaming event, if it carries one"""
+    choices = event.get("choices") or []
+    if not choices:
+        return None
+    return choices[0].get("finish_reason")
+
+
+class JSONArrayStreamParser:
+    """Extract complete object/array elements of ``{"<key>": [ ... ]}`` from partial text"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self._key_pattern = re.compile(r'"' + re.escape(key) + r'"\s*:\s*$')
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume more text and return any elements completed by it"""
+        self._text += chunk
+        items = []
+        text = self._text
+
+        while self._pos < len(text) and not self.done:
+            ch = text[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+
+            elif ch == '"':
+                self._in_string = True
+
+            elif ch in "{[":
+                if self._array_depth is None:
+                    if ch == "[" and self._key_pattern.search(text[max(0, self._pos - 200):self._pos]):
+                        self._array_depth = self._depth + 1
+                elif self._item_start is None and self._depth == self._array_depth:
+                    self._item_start = self._pos
+                self._depth += 1
+
+            elif ch in "}]":
+                self._depth -= 1
+                if self._array_depth is not None:
+                    if self._item_start is not None and self._depth == self._array_depth:
+                        item = self._decode(text[self._item_start:self._pos + 1])
+                        if item is not None:
+                            items.append(item)
+                        self._item_start = None
+                    elif self._depth < self._array_depth:
+                        self.done = True
+
+            self._pos += 1
+
+        return items
+
+    @staticmethod
+    def _decode(fragment: str) -> Optional[Any]:
+        try:
+            return json.loads(fragment)
+        except json.JSONDecodeError:
+            return None
+
+    @property
+    def text(self) -> str:
+        """All text fed so far"""
+        return self._text
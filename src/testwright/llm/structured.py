@@ -0,0 +1,104 @@
+"""
+Native structured-output support.
+
+Agents declare a JSON schema for their response (``output_schema``) and
+``BaseAgent.call_llm_json`` sends it as a ``json_schema`` response_format
+so the provider guarantees parseable JSON instead of the prompt-suffix /
+re-ask loop.  Providers or models that reject the parameter are
+remembered and transparently use the legacy path from then on.
+"""
+
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+from testwright.llm.retry import LLMAPIError
+
+
+STRING: Dict[str, Any] = {"type": "string"}
+NULLABLE_STRING: Dict[str, Any] = {"type": ["string", "null"]}
+NUMBER: Dict[str, Any] = {"type": "number"}
+INTEGER: Dict[str, Any] = {"type": "integer"}
+BOOLEAN: Dict[str, Any] = {"type": "boolean"}
+STRING_LIST: Dict[str, Any] = {"type": "array", "items": STRING}
+
+
+def enum(*values: str) -> Dict[str, Any]:
+    return {"type": "string", "enum": list(values)}
+
+
+def array_of(items: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "array", "items": items}
+
+
+def object_schema(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Strict-mode object: every property required, no extras"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def json_schema_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap a schema as an OpenAI-compatible ``response_format``"""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": schema, "strict": True},
+    }
+
+
+def is_unsupported_error(error: Exception) -> bool:
+    """True if a provider rejected the request because of response_format"""
+    if not isinstance(error, LLMAPIError) or error.status_code not in (400, 404, 422):
+        return False
+    body = error.body.lower()
+    return "response_format" in body or "json_schema" in body or "structured" in body
+
+
+class StructuredOutputStats:
+    """Counters comparing schema-constrained calls, local repairs and re-asks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._unsupported: Set[Tuple[str, str]] = set()
+        self.structured_calls = 0
+        self.structured_first_try = 0
+        self.structured_fallbacks = 0
+        self.unsupported_fallbacks = 0
+        self.legacy_calls = 0
+        self.legacy_reasks = 0
+        self.repaired_locally = 0
+        self.partial_accepted = 0
+        self.partial_rejected = 0
+        self.continued = 0
+        self.continuation_calls = 0
+
+    def supports(self, provider: str, model: str) -> bool:
+        with self._lock:
+            return (provider, model) not in self._unsupported
+
+    def mark_unsupported(self, provider: str, model: str):
+        with self._lock:
+            self._unsupported.add((provider, model))
+            self.unsupported_fallbacks += 1
+
+    def record(self, field: str, amount: int = 1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def to_dict(self) -> Dict[str, Optional[int]]:
+        with self._lock:
+            return {
+                "structured_calls": self.structured_calls,
+                "structured_first_try": self.structured_first_try,
+                "structured_fallbacks": self.structured_fallbacks,
+                "unsupported_fallbacks": self.unsupported_fallbacks,
+                "legacy_calls": self.legacy_calls,
+                "legacy_reasks": self.legacy_reasks,
+                "repaired_locally": self.repaired_locally,
+                "partial_accepted": self.partial_accepted,
+                "partial_rejected": self.partial_rejected,
+                "continued": self.continued,
+                "continuation_calls": self.continuation_calls,
+            }
@@ -0,0 +1,141 @@
+"""
+Compact binary serialization for the pipeline dataclasses.
+
+Checkpoints snapshot ``PipelineState`` after every node, so the state's
+test cases, chunks and summaries are serialized many times per run.
+LangGraph's default serializer handles arbitrary dataclasses by
+recording each one's module path and keyword arguments; this encoder
+instead writes a registered dataclass as a msgpack extension holding its
+class name and positional field values, which is smaller and several
+times faster to encode and decode.
+
+Dicts with non-string keys (``module_summaries`` is keyed by module id)
+are written as key/value pair lists.  Values the fast path cannot encode
+(unregistered classes, sets) fall back to LangGraph's
+``JsonPlusSerializer``.
+"""
+
+import dataclasses
+from typing import Any, Dict, List, Tuple, Type
+
+import ormsgpack
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from testwright.models.schemas import (
+    IdealVerification,
+    ModuleSummary,
+    NavigationGraph,
+    NavigationNode,
+    ParsedFunctionalDescription,
+    ParsedModule,
+    TestCase,
+    TestSuiteOutput,
+    VerificationMatch,
+    WorkflowChunk,
+)
+
+# Extension codes; class names (not codes) identify registered dataclasses
+# so the format does not depend on registration order
+_EXT_SCHEMA = 16
+_EXT_KEYED_DICT = 17
+
+# Type tag written by dumps_typed for the fast path
+SCHEMA_TYPE = "testwright-msgpack"
+
+_registry: Dict[str, Type[Any]] = {}
+_fields: Dict[Type[Any], Tuple[str, ...]] = {}
+
+
+def register_schema(cls: Type[Any]) -> Type[Any]:
+    """Make a dataclass encodable on the fast path (usable as a decorator)"""
+    if not dataclasses.is_dataclass(cls):
+        raise TypeError(f"{cls.__name__} is not a dataclass")
+    _registry[cls.__qualname__] = cls
+    _fields[cls] = tuple(f.name for f in dataclasses.fields(cls))
+    return cls
+
+
+for _cls in (
+    ParsedModule,
+    ParsedFunctionalDescription,
+    WorkflowChunk,
+    ModuleSummary,
+    NavigationNode,
+    NavigationGraph,
+    TestCase,
+    IdealVerification,
+    VerificationMatch,
+    TestSuiteOutput,
+):
+    register_schema(_cls)
+
+
+def _field_value(value: Any) -> Any:
+    # Maps such as NavigationGraph.nodes are keyed by int, which msgpack
+    # maps cannot round-trip; store them as pair lists
+    if isinstance(value, dict):
+        if value and not all(isinstance(k, str) for k in value):
+            return ormsgpack.Ext(_EXT_KEYED_DICT, _pack([[k, _field_value(v)] for k, v in value.items()]))
+        return {k: _field_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_field_value(v) for v in value]
+    return value
+
+
+def _default(obj: Any) -> Any:
+    fields = _fields.get(type(obj))
+    if fields is None:
+        raise TypeError(f"{type(obj).__name__} is not a registered schema")
+    values = [_field_value(getattr(obj, name)) for name in fields]
+    return ormsgpack.Ext(_EXT_SCHEMA, _pack([type(obj).__qualname__, values]))
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == _EXT_SCHEMA:
+        name, values = _unpack(data)
+        return _registry[name](*values)
+    if code == _EXT_KEYED_DICT:
+        return {k: v for k, v in _unpack(data)}
+    raise ValueError(f"unknown msgpack extension {code}")
+
+
+def _pack(obj: Any) -> bytes:
+    return ormsgpack.packb(obj, default=_default, option=ormsgpack.OPT_PASSTHROUGH_DATACLASS)
+
+
+def _unpack(data: bytes) -> Any:
+    return ormsgpack.unpackb(data, ext_hook=_ext_hook)
+
+
+def to_bytes(obj: Any) -> bytes:
+    """Encode registered dataclasses and plain data; raises TypeError otherwise"""
+    return _pack(_field_value(obj))
+
+
+def from_bytes(data: bytes) -> Any:
+    """Decode the output of ``to_bytes``"""
+    return _unpack(data)
+
+
+class SchemaSerializer:
+    """LangGraph ``SerializerProtocol`` with a fast path for the schema dataclasses"""
+
+    def __init__(self):
+        self.fallback = JsonPlusSerializer()
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        try:
+            return SCHEMA_TYPE, to_bytes(obj)
+        except (TypeError, ormsgpack.MsgpackEncodeError):
+            return self.fallback.dumps_typed(obj)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ == SCHEMA_TYPE:
+            return from_bytes(payload)
+        return self.fallback.loads_typed(data)
+
+
+def schema_types() -> List[str]:
+    """Names of the dataclasses encoded on the fast path"""
+    return sorted(_registry)
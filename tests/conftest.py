@@ -0,0 +1,106 @@
+import json
+import threading
+from typing import Any, Callable, Dict, List
+
+import httpx
+import pytest
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.pool import HTTPPool
+from testwright.llm.retry import RetryPolicy
+from testwright.llm.singleflight import SingleFlight
+from testwright.llm.structured import StructuredOutputStats
+
+
+class FakeLLM:
+    """OpenAI-compatible endpoint answering from a queue of replies
+
+    A reply is ``(content, finish_reason)``, an ``httpx.Response`` or a
+    callable taking the request body.  Once the queue is empty requests
+    are answered by ``default``, which returns ``{}``.
+    """
+
+    def __init__(self):
+        self.replies: List[Any] = []
+        self.requests: List[Dict[str, Any]] = []
+        self.default: Callable[[Dict[str, Any]], Any] = lambda body: ("{}", "stop")
+        self._lock = threading.Lock()
+
+    def reply(self, content: str, finish_reason: str = "stop"):
+        self.replies.append((content, finish_reason))
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        with self._lock:
+            self.requests.append(body)
+            reply = self.replies.pop(0) if self.replies else self.default
+        if callable(reply):
+            reply = reply(body)
+        if isinstance(reply, httpx.Response):
+            return reply
+        content, finish_reason = reply
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": content}, "finish_reason": finish_reason}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150},
+        })
+
+    async def ahandle(self, request: httpx.Request) -> httpx.Response:
+        return self.handle(request)
+
+
+class EchoAgent(BaseAgent):
+    """Minimal agent for exercising BaseAgent directly"""
+
+    @property
+    def name(self) -> str:
+        return "Echo Agent"
+
+    @property
+    def system_prompt(self) -> str:
+        return "You echo."
+
+    def run(self, *args, **kwargs):
+        return None
+
+
+@pytest.fixture(autouse=True)
+def restore_agent_config():
+    """Undo configure_* calls a test makes on the shared BaseAgent state"""
+    saved = {
+        name: value for name, value in vars(BaseAgent).items()
+        if name.startswith("_") and not name.startswith("__") and not callable(value)
+        and not isinstance(value, (classmethod, staticmethod, property))
+    }
+    yield
+    for name, value in saved.items():
+        setattr(BaseAgent, name, value)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch) -> FakeLLM:
+    """Route every agent request to a FakeLLM, with instant retries"""
+    llm = FakeLLM()
+    monkeypatch.setattr(
+        HTTPPool, "client",
+        lambda self, provider: httpx.Client(transport=httpx.MockTransport(llm.handle)),
+    )
+    monkeypatch.setattr(
+        HTTPPool, "async_client",
+        lambda self, provider: httpx.AsyncClient(transport=httpx.MockTransport(llm.ahandle)),
+    )
+    BaseAgent.configure_pool(HTTPPool())
+    BaseAgent.configure_retry(RetryPolicy(max_retries=3, base_delay=0.0, jitter=False))
+    BaseAgent.configure_single_flight(SingleFlight())
+    BaseAgent.configure_cache(None)
+    BaseAgent.configure_rate_limit(None)
+    BaseAgent.configure_metrics(None)
+    BaseAgent.configure_hedging(None)
+    BaseAgent.configure_batch(None)
+    BaseAgent.configure_output_budget(None)
+    BaseAgent.configure_structured_output(StructuredOutputStats())
+    return llm
+
+
+@pytest.fixture
+def agent(fake_llm) -> EchoAgent:
+    return EchoAgent(api_key="test")
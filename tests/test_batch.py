@@ -0,0 +1,75 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.batch import BatchRunner, LocalBatchTransport
+
+
+def _runner(fake_llm, tmp_path, **kwargs) -> BatchRunner:
+    transport = LocalBatchTransport(str(tmp_path / "provider"), httpx.MockTransport(fake_llm.handle),
+                                    process_after=kwargs.pop("process_after", 0.0))
+    runner = BatchRunner(str(tmp_path / "batches"), poll_interval=0.01, transport=transport, **kwargs)
+    BaseAgent.configure_batch(runner)
+    return runner
+
+
+def test_job_answers_the_stage_without_direct_calls(fake_llm, agent, tmp_path):
+    runner = _runner(fake_llm, tmp_path, process_after=0.05)
+    fake_llm.default = lambda body: (f'{{"echo": {len(body["messages"][-1]["content"])}}}', "stop")
+    prompts = ["first prompt", "second, longer prompt"]
+
+    assert agent.prefetch_batch("stage", [agent.batch_request(prompt) for prompt in prompts]) == 2
+    assert len(fake_llm.requests) == 2
+
+    results = [agent.call_llm_json(prompt) for prompt in prompts]
+    assert results[0] != results[1]
+    assert len(fake_llm.requests) == 2
+    assert runner.stats.to_dict() | {"wait_seconds": 0} == {
+        "jobs": 1, "requests": 2, "completed": 2, "failed": 0, "served": 2, "wait_seconds": 0,
+    }
+
+    # Already answered requests are not submitted again
+    assert agent.prefetch_batch("stage", [agent.batch_request(prompts[0])]) == 0
+    assert runner.stats.to_dict()["jobs"] == 1
+
+
+def test_failed_lines_fall_back_to_direct_calls(fake_llm, agent, tmp_path):
+    runner = _runner(fake_llm, tmp_path)
+    fake_llm.default = lambda body: (
+        httpx.Response(400, text="rejected") if "bad" in body["messages"][-1]["content"]
+        else ('{"ok": true}', "stop")
+    )
+
+    assert agent.prefetch_batch("stage", [agent.batch_request("good"), agent.batch_request("bad")]) == 1
+    assert runner.stats.to_dict()["failed"] == 1
+
+    fake_llm.default = lambda body: ('{"ok": "direct"}', "stop")
+    assert agent.call_llm_json("good") == {"ok": True}
+    assert agent.call_llm_json("bad") == {"ok": "direct"}
+    assert len(fake_llm.requests) == 3
+
+
+def test_failed_job_leaves_every_request_to_direct_calls(fake_llm, agent, tmp_path):
+    runner = BatchRunner(str(tmp_path), poll_interval=0.01,
+                         transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+    BaseAgent.configure_batch(runner)
+
+    assert agent.prefetch_batch("stage", [agent.batch_request("prompt")]) == 0
+    assert runner.stats.to_dict()["failed"] == 1
+    assert agent.call_llm_json("prompt") == {}
+    assert len(fake_llm.requests) == 1
+
+
+def test_concurrent_runs_of_a_stage_keep_their_own_files(fake_llm, agent, tmp_path):
+    runner = _runner(fake_llm, tmp_path)
+    batches = [[agent.batch_request(f"chunk {n}-{i}") for i in range(3)] for n in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        answered = list(executor.map(lambda requests: runner.run(agent, "generation", requests), batches))
+
+    assert answered == [3, 3, 3, 3]
+    files = os.listdir(tmp_path / "batches")
+    assert len(files) == 8
+    assert sum(name.endswith("-input.jsonl") for name in files) == 4
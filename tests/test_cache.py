@@ -0,0 +1,86 @@
+import sqlite3
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.cache import ResponseCache, cache_key
+
+
+def _key(prompt: str) -> str:
+    return cache_key("openai", "gpt-4o", "system", prompt, 0.3, 100)
+
+
+def test_cache_key_depends_on_every_request_field():
+    base = cache_key("openai", "gpt-4o", "system", "prompt", 0.3, 100)
+    assert base == cache_key("openai", "gpt-4o", "system", "prompt", 0.3, 100)
+    assert base != cache_key("openrouter", "gpt-4o", "system", "prompt", 0.3, 100)
+    assert base != cache_key("openai", "gpt-4o", "system", "prompt", 0.7, 100)
+    assert base != cache_key("openai", "gpt-4o", "system", "prompt", 0.3, 100, {"type": "json_object"})
+
+
+def test_round_trip_keeps_finish_reason(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    cache.put(_key("a"), '{"a": 1}', "stop")
+
+    assert cache.get(_key("a")) == ('{"a": 1}', "stop")
+    assert cache.get(_key("b")) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=10)
+    cache.put(_key("a"), "aaaa")
+    cache.put(_key("b"), "bbbb")
+    cache.get(_key("a"))
+    cache.put(_key("c"), "cccc")
+
+    assert cache.get(_key("b")) is None
+    assert cache.get(_key("a")) is not None
+    assert cache.evictions == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=-1)
+    cache.put(_key("a"), "aaaa")
+    assert cache.get(_key("a")) is None
+
+
+def test_opens_files_without_finish_reason_column(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+        "size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO responses VALUES (?, 'old', 3, 1e12, 1e12)", (_key("a"),))
+    conn.commit()
+    conn.close()
+
+    assert ResponseCache(path).get(_key("a")) == ("old", None)
+
+
+def test_malformed_json_is_not_cached(tmp_path, fake_llm, agent):
+    BaseAgent.configure_cache(ResponseCache(str(tmp_path / "cache.sqlite")))
+    fake_llm.reply("not json at all")
+    fake_llm.reply('{"ok": true}')
+
+    assert agent.call_llm_json("question", max_retries=1) == {"ok": True}
+    assert len(fake_llm.requests) == 2
+
+    assert agent._cache.stats()["entries"] == 1
+
+    # The first attempt was not stored, so a later run asks again instead
+    # of failing the same way from the cache
+    fake_llm.reply('{"ok": "again"}')
+    assert agent.call_llm_json("question", max_retries=1) == {"ok": "again"}
+    assert len(fake_llm.requests) == 3
+
+
+def test_truncated_response_is_not_cached(tmp_path, fake_llm, agent):
+    BaseAgent.configure_cache(ResponseCache(str(tmp_path / "cache.sqlite")))
+    fake_llm.reply("complete text", "length")
+    fake_llm.reply("complete text", "stop")
+
+    assert agent._complete("question", 0.3, 100) == ("complete text", "length")
+    assert agent._complete("question", 0.3, 100) == ("complete text", "stop")
+    # The stored answer comes back with its finish_reason
+    assert agent._complete("question", 0.3, 100) == ("complete text", "stop")
+    assert len(fake_llm.requests) == 2
@@ -0,0 +1,86 @@
+import operator
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+
+from testwright.core.checkpoint import SqliteCheckpointer
+from testwright.models.schemas import ModuleSummary, ParsedModule
+from testwright.models.serialization import SchemaSerializer
+
+
+class State(TypedDict, total=False):
+    api_key: str
+    steps: Annotated[List[str], operator.add]
+    modules: List[ParsedModule]
+
+
+def _graph(checkpointer: SqliteCheckpointer, calls: List[str], fail: List[bool]):
+    def parse(state):
+        calls.append("parse")
+        return {"steps": ["parse"], "modules": [ParsedModule(id=1, title="Login", raw_description="Sign in")]}
+
+    def generate(state):
+        calls.append("generate")
+        assert state["api_key"] == "sk-secret"
+        if fail:
+            fail.pop()
+            raise RuntimeError("provider went away")
+        return {"steps": [f"generate:{state['modules'][0].title}"]}
+
+    graph = StateGraph(State)
+    graph.add_node("parse", parse)
+    graph.add_node("generate", generate)
+    graph.add_edge(START, "parse")
+    graph.add_edge("parse", "generate")
+    graph.add_edge("generate", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def test_serializer_round_trips_schema_objects():
+    serde = SchemaSerializer()
+    value = {
+        "modules": [ParsedModule(id=1, title="Login", raw_description="Sign in")],
+        "summaries": {3: ModuleSummary(module_id=3, module_title="Cart", summary="Items")},
+    }
+    type_, payload = serde.dumps_typed(value)
+
+    assert type_ == "testwright-msgpack"
+    assert serde.loads_typed((type_, payload)) == value
+
+
+def test_resume_skips_completed_nodes_and_keeps_secrets_off_disk(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    config = {"configurable": {"thread_id": "run-1"}}
+    calls: List[str] = []
+
+    saver = SqliteCheckpointer(path, transient={"api_key": "sk-secret"})
+    graph = _graph(saver, calls, fail=[True])
+    with pytest.raises(RuntimeError):
+        graph.invoke({"api_key": "sk-secret", "steps": []}, config)
+    saver.close()
+    assert calls == ["parse", "generate"]
+
+    # A new process: reopen the file and continue the same run without input
+    saver = SqliteCheckpointer(path, transient={"api_key": "sk-secret"})
+    result = _graph(saver, calls, fail=[]).invoke(None, config)
+
+    assert calls == ["parse", "generate", "generate"]
+    assert result["steps"] == ["parse", "generate:Login"]
+    assert [run["run_id"] for run in saver.runs()] == ["run-1"]
+    saver.close()
+
+    with open(path, "rb") as f:
+        assert b"sk-secret" not in f.read()
+
+
+def test_delete_thread_forgets_the_run(tmp_path):
+    saver = SqliteCheckpointer(str(tmp_path / "checkpoints.sqlite"), transient={"api_key": "sk-secret"})
+    config = {"configurable": {"thread_id": "run-1"}}
+    _graph(saver, [], fail=[]).invoke({"api_key": "sk-secret", "steps": []}, config)
+    assert saver.get_tuple(config) is not None
+
+    saver.delete_thread("run-1")
+
+    assert saver.get_tuple(config) is None
+    assert saver.runs() == []
@@ -0,0 +1,101 @@
+import json
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.cache import ResponseCache
+from testwright.llm.continuation import OutputBudget, continuation_prompt, merge_continuation
+
+from tests.conftest import EchoAgent
+
+
+class ListingAgent(EchoAgent):
+    continuation_key = "items"
+    max_continuations = 2
+
+
+def test_merge_skips_items_already_received():
+    received = [{"id": 1}, {"id": 2}]
+    more = {"items": [{"id": 2}, {"id": 3}, {"id": 3}]}
+    assert merge_continuation(received, more, "items") == [{"id": 3}]
+    assert merge_continuation(received, {}, "items") == []
+
+
+def test_continuation_prompt_repeats_the_prompt_and_lists_received_items():
+    prompt = continuation_prompt("List the items.", "items", [{"id": 1}])
+    assert prompt.startswith("List the items.\n")
+    assert json.dumps([{"id": 1}]) in prompt
+    assert '1 complete "items" entries' in prompt
+
+
+def test_budget_learns_a_rounded_cap_from_observed_sizes():
+    budget = OutputBudget(min_samples=3, headroom=1.0, floor=256, step=256)
+    budget.observe("Agent", 300)
+    budget.observe("Agent", 400)
+    assert budget.max_tokens("Agent", 4000) == 4000
+
+    budget.observe("Agent", 500)
+    assert budget.learned("Agent") == 512
+    assert budget.max_tokens("Agent", 4000) == 512
+    assert budget.max_tokens("Agent", 300) == 300
+    assert budget.summary() == {"Agent": {"samples": 3, "max_tokens": 512, "capped_calls": 1}}
+
+
+def test_truncated_response_is_continued_and_stitched(fake_llm):
+    agent = ListingAgent(api_key="test")
+    fake_llm.reply('{"title": "t", "items": [{"id": 1}, {"id": 2}, {"id"', "length")
+    fake_llm.reply('{"items": [{"id": 2}, {"id": 3}, {"i', "length")
+    fake_llm.reply('{"items": [{"id": 4}]}')
+
+    result = agent.call_llm_json("List the items.")
+    assert result == {"title": "t", "items": [{"id": 1}, {"id": 2}, {"id": 3}, {"id": 4}]}
+    assert len(fake_llm.requests) == 3
+    follow_up = fake_llm.requests[2]["messages"][-1]["content"]
+    assert json.dumps([{"id": 1}, {"id": 2}, {"id": 3}]) in follow_up
+
+
+def test_continuation_stops_at_the_limit_or_when_nothing_new_arrives(fake_llm):
+    agent = ListingAgent(api_key="test")
+    fake_llm.default = lambda body: ('{"items": [{"id": 1}, {"id"', "length")
+
+    assert agent.call_llm_json("List the items.") == {"items": [{"id": 1}]}
+    # One original call; the first continuation only repeats item 1
+    assert len(fake_llm.requests) == 2
+
+    fake_llm.requests.clear()
+    counter = iter(range(2, 100))
+    fake_llm.default = lambda body: (f'{{"items": [{{"id": {next(counter)}}}, {{"id"', "length")
+    result = agent.call_llm_json("List more items.")
+    assert [item["id"] for item in result["items"]] == [2, 3, 4]
+    assert len(fake_llm.requests) == 1 + ListingAgent.max_continuations
+
+
+def test_learned_budget_caps_max_tokens_of_continuable_agents(fake_llm):
+    BaseAgent.configure_output_budget(OutputBudget(min_samples=1, headroom=1.0, floor=64, step=64))
+    agent = ListingAgent(api_key="test")
+    fake_llm.reply('{"items": []}')
+    agent.call_llm_json("first", max_tokens=4000)
+    fake_llm.reply('{"items": []}')
+    agent.call_llm_json("second", max_tokens=4000)
+
+    assert fake_llm.requests[0]["max_tokens"] == 4000
+    assert fake_llm.requests[1]["max_tokens"] == 64
+
+    EchoAgent(api_key="test").call_llm_json("not continuable", max_tokens=4000)
+    assert fake_llm.requests[2]["max_tokens"] == 4000
+
+
+def test_warm_cache_rerun_is_free_while_the_budget_relearns(fake_llm, tmp_path):
+    BaseAgent.configure_cache(ResponseCache(str(tmp_path / "cache.sqlite")))
+    prompts = ["first", "second", "third"]
+
+    def run():
+        # Each run is a fresh process: the budget starts from nothing
+        BaseAgent.configure_output_budget(OutputBudget(min_samples=1, headroom=1.0, floor=64, step=64))
+        agent = ListingAgent(api_key="test")
+        return [agent.call_llm_json(prompt, max_tokens=4000) for prompt in prompts]
+
+    fake_llm.default = lambda body: ('{"items": [1]}', "stop")
+    cold = run()
+    assert [request["max_tokens"] for request in fake_llm.requests] == [4000, 64, 64]
+
+    assert run() == cold
+    assert len(fake_llm.requests) == len(prompts)
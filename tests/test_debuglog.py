@@ -0,0 +1,122 @@
+import json
+import threading
+
+import pytest
+
+from testwright.llm.debuglog import DebugLogger, debug_log_segments, read_text
+from testwright.llm.replay import load_recordings
+
+
+def _records(path: str):
+    return [json.loads(line) for line in read_text(path).splitlines() if line.strip()]
+
+
+def _fill(logger: DebugLogger, count: int, size: int = 100):
+    for n in range(count):
+        logger.log("Agent", "NOTE", f"{n:04d}" + "x" * size)
+    logger.close()
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_rotated_segments_are_listed_oldest_first(tmp_path, compress):
+    path = str(tmp_path / "debug.jsonl")
+    logger = DebugLogger(path, max_bytes=1000, backups=3, compress=compress)
+    _fill(logger, 40)
+
+    segments = debug_log_segments(path)
+    suffix = ".gz" if compress else ""
+    assert segments == [f"{path}.3{suffix}", f"{path}.2{suffix}", f"{path}.1{suffix}", path]
+    numbers = [int(record["content"][:4]) for segment in segments for record in _records(segment)]
+    # The oldest segments were rotated away; what is left is contiguous and in order
+    assert numbers == list(range(numbers[0], 40))
+    assert numbers[0] > 0
+    assert logger.stats.to_dict()["rotations"] > 3
+
+
+def test_call_split_across_segments_is_still_paired(tmp_path):
+    path = str(tmp_path / "debug.jsonl")
+    logger = DebugLogger(path, max_bytes=300, backups=5, compress=True)
+    logger.log("Agent", "SYSTEM PROMPT", "You help.")
+    for n in range(3):
+        logger.log("Agent", "USER PROMPT", f"question {n} " + "q" * 100, call_id=f"call-{n}")
+        logger.log("Agent", "LLM RESPONSE", f"answer {n} " + "a" * 100, call_id=f"call-{n}")
+    logger.close()
+
+    assert len(debug_log_segments(path)) > 2
+    recordings = load_recordings(path)
+    assert [entry["user"][:10] for entry in recordings] == [f"question {n}" for n in range(3)]
+    assert [entry["content"][:8] for entry in recordings] == [f"answer {n}" for n in range(3)]
+    assert all(entry["system"] == "You help." for entry in recordings)
+
+
+def test_long_payloads_are_truncated_to_head_and_tail(tmp_path):
+    path = str(tmp_path / "debug.jsonl")
+    logger = DebugLogger(path, max_payload=20)
+    content = "HEAD" + "-" * 100 + "TAIL"
+    logger.log("Agent", "USER PROMPT", content, call_id="c1")
+    logger.log("Agent", "LLM RESPONSE", "short", call_id="c1")
+    logger.close()
+
+    long, short = _records(path)
+    assert long["truncated"] is True
+    assert long["length"] == len(content)
+    assert long["content"].startswith("HEAD") and long["content"].endswith("TAIL")
+    assert "[88 chars omitted]" in long["content"]
+    assert "truncated" not in short and short["content"] == "short"
+    assert logger.stats.to_dict()["truncated"] == 1
+
+
+def test_sampling_keeps_whole_calls(tmp_path):
+    path = str(tmp_path / "debug.jsonl")
+    logger = DebugLogger(path, max_payload=10, sample_rate=0.5)
+    for n in range(100):
+        logger.log("Agent", "USER PROMPT", "p" * 50, call_id=f"call-{n}")
+        logger.log("Agent", "LLM RESPONSE", "r" * 50, call_id=f"call-{n}")
+    logger.close()
+
+    kept = {}
+    for record in _records(path):
+        kept.setdefault(record["call_id"], set()).add(not record.get("truncated"))
+    # A prompt and its response are always kept or cut together
+    assert all(len(choices) == 1 for choices in kept.values())
+    sampled = sum(choices == {True} for choices in kept.values())
+    assert 25 < sampled < 75
+
+    # The choice is per call id, so it repeats across sessions
+    again = DebugLogger(str(tmp_path / "again.jsonl"), max_payload=10, sample_rate=0.5)
+    ids = [f"call-{n}" for n in range(100)]
+    assert [again._sampled(call_id) for call_id in ids] == [kept[i] == {True} for i in ids]
+    again.close()
+
+
+class _StalledFile:
+    """Wraps the log file so the writer thread blocks on its first write"""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.entered.set()
+        self.release.wait(5)
+        return self.inner.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+def test_records_are_dropped_rather_than_blocking_when_the_queue_is_full(tmp_path):
+    path = str(tmp_path / "debug.jsonl")
+    logger = DebugLogger(path, queue_size=1)
+    stalled = logger._file = _StalledFile(logger._file)
+
+    logger.log("Agent", "NOTE", "first")
+    assert stalled.entered.wait(5)
+    logger.log("Agent", "NOTE", "second")
+    logger.log("Agent", "NOTE", "third")
+    stalled.release.set()
+    logger.close()
+
+    assert [record["content"] for record in _records(path)] == ["first", "second"]
+    assert logger.stats.to_dict() == {"written": 2, "dropped": 1, "truncated": 0, "rotations": 0}
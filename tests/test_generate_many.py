@@ -0,0 +1,78 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from testwright.agents.rag_indexer import RAGIndexer
+from testwright.core import generator as pipeline
+
+
+def _instance(schema):
+    """Smallest value matching a JSON schema"""
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: _instance(prop) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_instance(schema["items"])]
+    return {"string": "x", "boolean": False, "integer": 1, "number": 1}.get(kind)
+
+
+def _spec(name, n_modules):
+    return {
+        "project_name": name,
+        "website_url": f"https://{name}.example",
+        "modules": [
+            {"id": i, "title": f"Page {i}", "description": f"{name} page {i} with a form."}
+            for i in range(1, n_modules + 1)
+        ],
+    }
+
+
+@pytest.fixture
+def schema_llm(fake_llm, monkeypatch):
+    """Answer every structured request with a minimal valid object, tracking calls in flight"""
+    lock = threading.Lock()
+    fake_llm.in_flight = fake_llm.peak = 0
+
+    def answer(body):
+        with lock:
+            fake_llm.in_flight += 1
+            fake_llm.peak = max(fake_llm.peak, fake_llm.in_flight)
+        time.sleep(0.01)
+        with lock:
+            fake_llm.in_flight -= 1
+        schema = body.get("response_format", {}).get("json_schema", {}).get("schema")
+        return json.dumps(_instance(schema) if schema else {}), "stop"
+
+    fake_llm.default = answer
+    monkeypatch.setattr(RAGIndexer, "_load_model", classmethod(lambda cls, name: (_ for _ in ()).throw(ImportError())))
+    return fake_llm
+
+
+def test_specs_share_the_call_cap_and_report_their_own_usage(schema_llm, tmp_path):
+    specs = {str(tmp_path / "big"): _spec("big", 3), str(tmp_path / "small"): _spec("small", 1)}
+
+    with pipeline.TestCaseGenerator(api_key="test", concurrency=2) as generator:
+        results = generator.generate_many(specs)
+        total = generator.metrics.summary()["total"]["calls"]
+
+    assert list(results) == list(specs) and generator.spec_errors == {}
+    assert 1 <= schema_llm.peak <= 2
+
+    usage = {}
+    for output_dir in specs:
+        with open(os.path.join(output_dir, "test-cases.json"), encoding="utf-8") as f:
+            usage[output_dir] = json.load(f)["summary"]["llm_usage"]["total"]["calls"]
+    assert usage[str(tmp_path / "big")] > usage[str(tmp_path / "small")]
+    # Coalesced calls are recorded by each spec that made them
+    assert sum(usage.values()) == total >= len(schema_llm.requests)
+
+
+def test_output_dirs_must_differ(tmp_path):
+    with pipeline.TestCaseGenerator(api_key="test") as generator:
+        with pytest.raises(ValueError):
+            generator.generate_many({str(tmp_path / "a"): {}, f"{tmp_path / 'a'}/": {}})
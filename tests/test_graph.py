@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from testwright.core import graph as pipeline_graph
+from testwright.core.graph import PARALLEL_STAGES, build_graph
+
+DOWNSTREAM = ("assembler", "verification_flag", "ideal_verification",
+              "verification_matcher", "execution_plan", "finalize")
+
+
+class _Stages:
+    """Stand-in nodes recording which stages ran and how their branches overlapped"""
+
+    def __init__(self):
+        self.calls = []
+        self.seen = {}
+        self.in_flight = 0
+        self.most = 0
+        self._lock = threading.Lock()
+
+    def branch(self, name, update):
+        def node(state):
+            assert "parsed_desc" in state
+            with self._lock:
+                self.calls.append(name)
+                self.in_flight += 1
+                self.most = max(self.most, self.in_flight)
+            time.sleep(0.05)
+            with self._lock:
+                self.in_flight -= 1
+            return update
+        return node
+
+    def step(self, name, update=None):
+        def node(state):
+            with self._lock:
+                self.calls.append(name)
+                self.seen[name] = dict(state)
+            return update or {}
+        return node
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    stages = _Stages()
+    nodes = {
+        "parse": stages.step("parse", {"parsed_desc": "parsed"}),
+        "navigation": stages.branch("navigation", {"nav_graph": "graph"}),
+        "chunker": stages.branch("chunker", {"all_chunks": ["chunk"],
+                                             "degraded_modules": {2: "chunking"}}),
+        "summary": stages.branch("summary", {"module_summaries": {1: "summary"},
+                                             "degraded_stages": {"summary": 1}}),
+        "test_generation": stages.step("test_generation", {"all_tests": ["test"],
+                                                           "degraded_modules": {3: "generation"}}),
+        **{name: stages.step(name) for name in DOWNSTREAM},
+    }
+    for name, node in nodes.items():
+        monkeypatch.setattr(pipeline_graph, f"{name}_node", node)
+    return stages
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_branches_join_on_a_single_test_generation(stages, parallel):
+    final = build_graph(parallel=parallel).invoke({"functional_desc": {}})
+
+    assert stages.calls.count("test_generation") == 1
+    assert stages.calls[0] == "parse"
+    assert sorted(stages.calls[1:4]) == sorted(PARALLEL_STAGES)
+    assert stages.calls[4:] == ["test_generation", *DOWNSTREAM]
+    assert stages.most == (len(PARALLEL_STAGES) if parallel else 1)
+
+    # test_generation sees every branch's output, merged
+    joined = stages.seen["test_generation"]
+    assert (joined["nav_graph"], joined["all_chunks"], joined["module_summaries"]) == (
+        "graph", ["chunk"], {1: "summary"}
+    )
+    assert final["degraded_modules"] == {2: "chunking", 3: "generation"}
+    assert final["degraded_stages"] == {"summary": 1}
+    assert set(final["stage_timings"]) == {
+        "parse", *PARALLEL_STAGES, "test_generation", *DOWNSTREAM
+    }
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.hedging import HedgePolicy, Route
+from testwright.llm.retry import CircuitBreaker, LLMAPIError, RetryPolicy
+
+
+def _answer(content: str) -> httpx.Response:
+    return httpx.Response(200, json={
+        "choices": [{"message": {"content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    })
+
+
+def _hedge(*routes: Route, **kwargs) -> HedgePolicy:
+    kwargs = {"initial_delay": 0.05, "min_delay": 0.01, "min_samples": 100, **kwargs}
+    policy = HedgePolicy(list(routes) or [Route(model="backup")], **kwargs)
+    BaseAgent.configure_hedging(policy)
+    return policy
+
+
+@pytest.fixture
+def policy(fake_llm):
+    policy = _hedge()
+    yield policy
+    policy.close()
+
+
+def test_delay_follows_the_learned_percentile():
+    policy = HedgePolicy([Route(model="backup")], percentile=50.0, min_samples=3, initial_delay=9.0,
+                         min_delay=0.5)
+    assert policy.delay("Agent") == 9.0
+    for latency in (0.1, 2.0, 4.0):
+        policy.observe("Agent", latency)
+    assert policy.delay("Agent") == 2.0
+
+    policy.observe("Agent", 0.1)
+    policy.observe("Agent", 0.1)
+    assert policy.delay("Agent") == 0.5
+    # Past calls slower than 1s averaged 3s
+    assert policy.estimate_saved("Agent", 1.0) == pytest.approx(2.0)
+    policy.close()
+
+
+def test_call_faster_than_the_delay_is_not_hedged(fake_llm, agent, policy):
+    policy.initial_delay = 1.0
+    fake_llm.default = lambda body: (time.sleep(0.1), _answer(body["model"]))[1]
+
+    assert agent._complete("hi", 0.3, 100) == (agent.model, "stop")
+    assert [request["model"] for request in fake_llm.requests] == [agent.model]
+    assert policy.stats.to_dict()["hedged"] == 0
+    assert len(policy._latencies[agent.name]) == 1
+
+
+def test_slow_call_is_hedged_and_the_backup_wins(fake_llm, agent, policy):
+    primary_done = threading.Event()
+
+    def answer(body):
+        if body["model"] == "backup":
+            return _answer("backup")
+        time.sleep(0.3)
+        primary_done.set()
+        return _answer("primary")
+
+    fake_llm.default = answer
+    start = time.perf_counter()
+    assert agent._complete("hi", 0.3, 100) == ("backup", "stop")
+    assert time.perf_counter() - start < 0.3
+    assert [request["model"] for request in fake_llm.requests] == [agent.model, "backup"]
+    assert policy.stats.to_dict()["hedge_wins"] == 1
+
+    # The abandoned original drains on the policy's threads; its real
+    # latency is learned and the saving measured
+    assert primary_done.wait(2)
+    deadline = time.monotonic() + 2
+    while not policy._latencies.get(agent.name):
+        assert time.monotonic() < deadline, "original never settled"
+        time.sleep(0.01)
+    assert policy._latencies[agent.name][0] >= 0.3
+    assert policy.stats.to_dict()["saved_seconds"] > 0
+
+
+def test_async_loser_is_cancelled(fake_llm, agent, policy):
+    cancelled = []
+
+    async def answer(request):
+        model = json.loads(request.content)["model"]
+        if model == "backup":
+            return _answer("backup")
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+        return _answer("primary")
+
+    fake_llm.ahandle = answer
+    start = time.perf_counter()
+    assert asyncio.run(agent._acomplete("hi", 0.3, 100)) == ("backup", "stop")
+    assert time.perf_counter() - start < 2.0
+    assert cancelled == [agent.model]
+    assert policy.stats.to_dict()["hedge_wins"] == 1
+
+
+def test_failed_route_fails_over_without_waiting_for_the_delay(fake_llm, agent, policy):
+    policy.initial_delay = 10.0
+    fake_llm.default = lambda body: (
+        _answer("backup") if body["model"] == "backup" else httpx.Response(400, text="bad request")
+    )
+
+    start = time.perf_counter()
+    assert agent._complete("hi", 0.3, 100) == ("backup", "stop")
+    assert asyncio.run(agent._acomplete("hi again", 0.3, 100)) == ("backup", "stop")
+    assert time.perf_counter() - start < 1.0
+    assert policy.stats.to_dict()["failovers"] == 2
+
+
+def test_every_route_failing_raises(fake_llm, agent, policy):
+    fake_llm.default = lambda body: httpx.Response(400, text=f"{body['model']} refused")
+
+    with pytest.raises(LLMAPIError, match="backup refused"):
+        agent._complete("hi", 0.3, 100)
+    assert len(fake_llm.requests) == 2
+
+    with pytest.raises(LLMAPIError, match="backup refused"):
+        asyncio.run(agent._acomplete("hi again", 0.3, 100))
+    assert len(fake_llm.requests) == 4
+
+
+def test_cancelled_loser_frees_its_half_open_probe(fake_llm, agent):
+    BaseAgent.configure_retry(RetryPolicy(max_retries=0, base_delay=0.0), failure_threshold=1,
+                              recovery_timeout=0.0)
+    breaker = BaseAgent._breakers.get(agent.provider)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    async def answer(request):
+        model = json.loads(request.content)["model"]
+        if model != "backup":
+            await asyncio.sleep(5)
+        return _answer(model)
+
+    # The stalled original is the half-open probe; the backup on another
+    # provider wins and the original is cancelled mid-request
+    fake_llm.ahandle = answer
+    policy = _hedge(Route(provider="openrouter", model="backup"))
+    try:
+        assert asyncio.run(agent._acomplete("hi", 0.3, 100)) == ("backup", "stop")
+    finally:
+        policy.close()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    BaseAgent.configure_hedging(None)
+    del fake_llm.ahandle
+    assert agent._complete("after", 0.3, 100) == ("{}", "stop")
+    assert breaker.state == CircuitBreaker.CLOSED
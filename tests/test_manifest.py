@@ -0,0 +1,114 @@
+import json
+
+import httpx
+
+from testwright.agents import ChunkerAgent, ParserAgent
+from testwright.core.manifest import (
+    build_manifest,
+    load_manifest,
+    module_fingerprint,
+    restore_tests,
+    reusable_modules,
+    write_manifest,
+)
+from testwright.core.nodes import test_generation_node as generation_node
+from testwright.models import schemas
+
+SPEC = {
+    "project_name": "Bank",
+    "modules": [
+        {"id": 1, "title": "Login", "description": "Sign in with username and password."},
+        {"id": 2, "title": "Transfer", "description": "Move funds between accounts."},
+    ],
+}
+
+
+def _state(**overrides):
+    modules = [
+        schemas.ParsedModule(id=m["id"], title=m["title"], raw_description=m["description"], workflows=["Main"])
+        for m in SPEC["modules"]
+    ]
+    chunks = [
+        schemas.WorkflowChunk(chunk_id=f"{m.id}_workflow_0", module_id=m.id, module_title=m.title,
+                              workflow_name=f"{m.title} workflow", workflow_description="")
+        for m in modules
+    ]
+    state = {
+        "functional_desc": SPEC,
+        "parsed_desc": schemas.ParsedFunctionalDescription("Bank", "", "", modules),
+        "all_chunks": chunks,
+        "api_key": "test",
+        "model": "gpt-4o",
+        "provider": "openai",
+        "debug": False,
+        "debug_file": "debug_log.txt",
+    }
+    state.update(overrides)
+    return state
+
+
+def _answer(body):
+    prompt = body["messages"][1]["content"]
+    if "Transfer workflow" in prompt:
+        return httpx.Response(400, json={"error": {"message": "model overloaded"}})
+    return json.dumps({"test_cases": [{
+        "title": "Valid login", "test_type": "positive", "priority": "High",
+        "preconditions": "None", "steps": ["Enter credentials", "Click Login"],
+        "expected_result": "Dashboard is shown",
+    }]}), "stop"
+
+
+def test_fingerprint_ignores_whitespace_but_not_wording():
+    module = SPEC["modules"][0]
+    assert module_fingerprint(module) == module_fingerprint({**module, "description": " Sign in  with\nusername and password. "})
+    assert module_fingerprint(module) != module_fingerprint({**module, "description": "Sign in with email."})
+
+
+def test_reusable_modules_matches_unchanged_modules(tmp_path):
+    tests = [schemas.TestCase(id="", title="t", module_id=m["id"], module_title=m["title"], workflow="w",
+                              test_type="positive", priority="High", preconditions="")
+             for m in SPEC["modules"]]
+    state = _state()
+    write_manifest(str(tmp_path), build_manifest(SPEC, state["parsed_desc"], state["all_chunks"], tests, "gpt-4o", set()))
+    manifest = load_manifest(str(tmp_path))
+
+    changed = {**SPEC, "modules": [SPEC["modules"][0], {**SPEC["modules"][1], "description": "New rules."}]}
+    reused, _ = reusable_modules(changed, manifest, "gpt-4o")
+    assert list(reused) == [1]
+    assert restore_tests(reused[1])[0].module_title == "Login"
+
+    assert reusable_modules(SPEC, manifest, "gpt-4o-mini") == ({}, "previous run used model gpt-4o")
+    duplicated = {**SPEC, "modules": [SPEC["modules"][0], {**SPEC["modules"][1], "id": 1}]}
+    assert reusable_modules(duplicated, manifest, "gpt-4o")[0] == {}
+
+
+def test_failed_chunk_keeps_its_module_out_of_the_manifest(fake_llm, capsys):
+    fake_llm.replies.extend([_answer, _answer])
+
+    update = generation_node(_state())
+
+    assert [tc.module_id for tc in update["all_tests"]] == [1]
+    assert [entry["id"] for entry in update["manifest"]["modules"]] == [1]
+    assert "Transfer workflow: FAILED" in capsys.readouterr().out
+
+
+def test_degraded_parse_keeps_its_module_out_of_the_manifest(fake_llm):
+    fake_llm.replies.extend([_answer] * 2)
+    chunks = _state()["all_chunks"][:1]
+
+    update = generation_node(_state(all_chunks=chunks, degraded_modules={1: "parse"}))
+
+    assert len(update["all_tests"]) == 1
+    assert update["manifest"]["modules"] == []
+
+
+def test_parser_and_chunker_record_their_fallbacks(fake_llm):
+    failure = httpx.Response(400, json={"error": {"message": "model overloaded"}})
+    fake_llm.replies.extend([failure, failure])
+    parser, chunker = ParserAgent(api_key="test"), ChunkerAgent(api_key="test")
+
+    module = parser.parse_module(SPEC["modules"][1])
+    chunks = chunker.run(schemas.ParsedModule(id=2, title="Transfer", raw_description="", workflows=["A", "B"]))
+
+    assert module.workflows == [] and parser.degraded == {2}
+    assert [chunk.workflow_name for chunk in chunks] == ["A", "B"] and chunker.degraded == {2}
@@ -0,0 +1,108 @@
+import json
+
+import httpx
+
+from testwright.agents.base import BaseAgent
+from testwright.core.memo import ArtifactStore, memoizable, memoize, storable
+from testwright.core.nodes import navigation_node
+from testwright.core.nodes import test_generation_node as generation_node
+from testwright.llm.structured import StructuredOutputStats
+from testwright.models.schemas import ParsedModule
+
+from tests.test_manifest import _answer, _state as _generation_state
+
+CONFIG = {"model": "gpt-4o", "provider": "openai", "stream": False}
+
+
+def _node(calls):
+    @memoizable("modules")
+    def rename(state):
+        calls.append(1)
+        module = state["modules"][0]
+        module.title = module.title.upper()  # mutates what it reads
+        return {"renamed": [module]}
+
+    return rename
+
+
+def _state(title="Login", **config):
+    return {**CONFIG, **config, "modules": [ParsedModule(id=1, title=title, raw_description="")], "other": 1}
+
+
+def test_key_covers_inputs_config_and_agent_settings(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts.sqlite"))
+    node = _node([])
+    key = store.key("rename", node, _state())
+
+    assert key == store.key("rename", node, {**_state(), "other": 2})
+    assert key != store.key("rename", node, _state(title="Logout"))
+    assert key != store.key("rename", node, _state(stream=True))
+    assert key != store.key("other_stage", node, _state())
+
+    BaseAgent.configure_structured_output(StructuredOutputStats(), enabled=False)
+    assert key != store.key("rename", node, _state())
+
+
+def test_hit_skips_the_node_and_inputs_are_not_mutated(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts.sqlite"))
+    calls = []
+    node = memoize("rename", _node(calls), store)
+
+    cold_state = _state()
+    cold = node(cold_state)
+    warm = node(_state())
+
+    assert len(calls) == 1
+    assert cold == warm == {"renamed": [ParsedModule(id=1, title="LOGIN", raw_description="")]}
+    # Later stages are keyed on the same input whether the node ran or not
+    assert cold_state["modules"][0].title == "Login"
+    assert store.stats.to_dict()["rename"]["hits"] == 1
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts.sqlite"), max_bytes=250)
+    store.put("a", "stage", {"value": "a" * 100}, 1.0)
+    store.put("b", "stage", {"value": "b" * 100}, 1.0)
+    store.get("a")
+    store.put("c", "stage", {"value": "c" * 100}, 1.0)
+
+    assert store.get("b") is None
+    assert store.get("a") == ({"value": "a" * 100}, 1.0)
+    assert store.evictions == 1
+
+
+def test_updates_with_fallbacks_are_not_storable():
+    assert storable({"all_tests": [], "degraded_modules": {}})
+    assert not storable({"all_tests": [], "degraded_modules": {2: "generation"}})
+    assert not storable({"ideal_verifications": {}, "degraded_stages": {"ideal_verification": 3}})
+
+
+def test_failed_chunk_is_not_memoized(fake_llm, tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts.sqlite"))
+    node = memoize("test_generation", generation_node, store)
+
+    fake_llm.default = _answer
+    update = node(_generation_state())
+    assert update["degraded_modules"] == {2: "generation"}
+    assert store.stats.to_dict()["test_generation"] == {"hits": 0, "misses": 1, "unstored": 1, "saved": 0.0}
+
+    # The provider recovered: the stage runs again instead of replaying the failure
+    fake_llm.default = lambda body: (json.dumps({"test_cases": []}), "stop")
+    calls = len(fake_llm.requests)
+    assert node(_generation_state())["degraded_modules"] == {}
+    assert len(fake_llm.requests) > calls
+
+    calls = len(fake_llm.requests)
+    node(_generation_state())
+    assert len(fake_llm.requests) == calls
+    assert store.stats.to_dict()["test_generation"]["hits"] == 1
+
+
+def test_stage_fallback_is_reported_and_not_memoized(fake_llm, tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts.sqlite"))
+    node = memoize("navigation", navigation_node, store)
+    fake_llm.default = lambda body: httpx.Response(400, json={"error": {"message": "bad request"}})
+
+    update = node(_generation_state())
+    assert update["degraded_stages"] == {"navigation": 2}
+    assert store.stats.to_dict()["navigation"]["unstored"] == 1
@@ -0,0 +1,117 @@
+import json
+
+import httpx
+import pytest
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.metrics import CallMetrics, CallRecord, estimate_cost, percentile
+from testwright.llm.retry import LLMAPIError
+
+
+def _record(agent="Parser", status="ok", latency=1.0, **kwargs) -> CallRecord:
+    kwargs.setdefault("prompt_tokens", 1000)
+    kwargs.setdefault("completion_tokens", 100)
+    return CallRecord(agent=agent, provider="openai", model="gpt-4o", status=status,
+                      latency=latency, **kwargs)
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(n) for n in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile([3.0, 1.0, 2.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_estimate_cost_prices_cached_prompt_tokens_separately():
+    # gpt-4o: $2.50 prompt, $1.25 cached prompt, $10.00 completion per 1M tokens
+    assert estimate_cost("gpt-4o", 1_000_000, 0) == pytest.approx(2.50)
+    assert estimate_cost("gpt-4o", 1_000_000, 1_000_000, cached_tokens=400_000) == pytest.approx(
+        0.6 * 2.50 + 0.4 * 1.25 + 10.00
+    )
+    assert estimate_cost("openai/gpt-4o", 1_000_000, 0) == pytest.approx(2.50)
+    assert estimate_cost("unknown-model", 10, 10) is None
+
+
+def test_summary_rolls_up_per_agent_and_in_total():
+    metrics = CallMetrics()
+    for latency in (1.0, 2.0, 3.0, 4.0):
+        metrics.record(_record(latency=latency, retries=1))
+    metrics.record(_record(status="cached", latency=0.0))
+    metrics.record(_record(status="coalesced", latency=9.0))
+    metrics.record(_record(status="batched", latency=60.0))
+    metrics.record(_record(agent="Writer", status="error", latency=5.0, prompt_tokens=0,
+                           completion_tokens=0, http_status=500))
+    metrics.record(_record(agent="Writer", cached_tokens=500))
+
+    summary = metrics.summary()
+    parser, writer = summary["by_agent"]["Parser"], summary["by_agent"]["Writer"]
+    total = summary["total"]
+
+    assert parser["calls"] == 7
+    assert (parser["cache_hits"], parser["coalesced"], parser["batched"]) == (1, 1, 1)
+    assert parser["retries"] == 4 and parser["errors"] == 0
+    # Only network calls count towards latency
+    assert parser["latency_total_s"] == 10.0
+    assert (parser["latency_p50_s"], parser["latency_p95_s"]) == (2.0, 4.0)
+    one_call = estimate_cost("gpt-4o", 1000, 100)
+    # Cached and coalesced calls are priced at the original; batched at half
+    assert parser["cost_usd"] == pytest.approx(6.5 * one_call, abs=1e-4)
+
+    assert writer["errors"] == 1 and writer["latency_total_s"] == 6.0
+    assert writer["cached_tokens"] == 500 and writer["prefix_cache_ratio"] == 0.5
+    assert writer["prefix_cache_savings_usd"] == round(
+        one_call - estimate_cost("gpt-4o", 1000, 100, cached_tokens=500), 4
+    )
+    assert total["calls"] == 9 and total["errors"] == 1
+    assert total["prompt_tokens"] == parser["prompt_tokens"] + writer["prompt_tokens"] == 8000
+
+
+def test_summary_filters_by_run_id():
+    metrics = CallMetrics()
+    metrics.record(_record(run_id="a"))
+    metrics.record(_record(run_id="a", agent="Writer"))
+    metrics.record(_record(run_id="b"))
+
+    assert metrics.summary("a")["total"]["calls"] == 2
+    assert list(metrics.summary("b")["by_agent"]) == ["Parser"]
+    assert metrics.summary("missing") == {}
+    assert metrics.summary()["total"]["calls"] == 3
+
+
+def test_exports(tmp_path):
+    metrics = CallMetrics()
+    metrics.record(_record(agent='Quote "Agent"', latency=2.0))
+    metrics.record(_record(agent='Quote "Agent"', status="cached", latency=0.0))
+
+    path = metrics.export_jsonl(str(tmp_path / "calls.jsonl"))
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["status"] for row in rows] == ["ok", "cached"]
+    assert rows[0]["prompt_tokens"] == 1000 and rows[0]["call_id"] != rows[1]["call_id"]
+
+    text = open(metrics.export_prometheus(str(tmp_path / "metrics.prom")), encoding="utf-8").read()
+    lines = text.splitlines()
+    assert 'testwright_llm_calls_total{agent="Quote \\"Agent\\"",status="ok"} 1' in lines
+    assert 'testwright_llm_calls_total{agent="Quote \\"Agent\\"",status="cached"} 1' in lines
+    assert 'testwright_llm_tokens_total{agent="Quote \\"Agent\\"",kind="prompt"} 2000' in lines
+    assert 'testwright_llm_latency_seconds_count{agent="Quote \\"Agent\\""} 1' in lines
+    assert "# TYPE testwright_llm_latency_seconds summary" in lines
+
+
+def test_agent_calls_are_recorded(fake_llm, agent):
+    metrics = CallMetrics()
+    BaseAgent.configure_metrics(metrics)
+    fake_llm.replies.append(lambda body: httpx.Response(503, text="busy"))
+    fake_llm.reply("hello")
+    fake_llm.replies.append(lambda body: httpx.Response(400, text="bad request"))
+
+    assert agent.call_llm("hi") == "hello"
+    with pytest.raises(LLMAPIError):
+        agent.call_llm("again")
+
+    ok, error = metrics.records()
+    assert (ok.agent, ok.status, ok.retries, ok.finish_reason) == ("Echo Agent", "ok", 1, "stop")
+    assert (ok.prompt_tokens, ok.completion_tokens) == (100, 50)
+    assert (error.status, error.http_status) == ("error", 400)
+    assert metrics.summary()["total"]["errors"] == 1
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+
+from testwright.agents.base import BaseAgent
+from testwright.core.nodes import chunker_node, module_pipeline_node, parse_node
+from testwright.core.nodes import test_generation_node as generation_node
+from testwright.llm.pool import HTTPPool
+from testwright.models import schemas
+
+from tests.test_manifest import _state
+
+SPEC = {
+    "project_name": "Bank",
+    "modules": [
+        {"id": n, "title": title, "description": f"{title} page."}
+        for n, title in enumerate(["Login", "Transfer", "Bill Pay", "Loans"], start=1)
+    ],
+}
+
+
+def _title(body) -> str:
+    prompt = body["messages"][-1]["content"]
+    return next(m["title"] for m in SPEC["modules"] if f"Module Title: {m['title']}\n" in prompt
+                or f"Module: {m['title']}\n" in prompt)
+
+
+def _parsed(title: str) -> str:
+    return json.dumps({"mentioned_items": [], "workflows": [f"{title} A", f"{title} B"],
+                       "business_rules": [], "expected_behaviors": [], "requires_auth": False})
+
+
+def _split(title: str) -> str:
+    return json.dumps({"workflow_chunks": [
+        {"workflow_name": f"{title} {w}", "workflow_description": "", "related_items": [],
+         "related_rules": [], "related_behaviors": []}
+        for w in "AB"
+    ]})
+
+
+def _generated(title: str) -> str:
+    return json.dumps({"test_cases": [{
+        "title": f"{title} works", "test_type": "positive", "priority": "High",
+        "preconditions": "None", "steps": ["Open the page"], "expected_result": "It works",
+    }]})
+
+
+def _generation_state():
+    modules = [schemas.ParsedModule(id=m["id"], title=m["title"], raw_description=m["description"])
+               for m in SPEC["modules"]]
+    return _state(functional_desc=SPEC, all_chunks=_chunks(),
+                  parsed_desc=schemas.ParsedFunctionalDescription("Bank", "", "", modules))
+
+
+def _chunks():
+    return [
+        schemas.WorkflowChunk(chunk_id=f"{m['id']}_workflow_{n}", module_id=m["id"],
+                              module_title=m["title"], workflow_name=f"{m['title']} {w}",
+                              workflow_description="")
+        for m in SPEC["modules"] for n, w in enumerate("AB")
+    ]
+
+
+class _Loop:
+    """Async provider that answers later modules first and tracks overlap"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.in_flight = 0
+        self.most = 0
+        self.loops = set()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        title = _title(body)
+        self.loops.add(asyncio.get_running_loop())
+        self.in_flight += 1
+        self.most = max(self.most, self.in_flight)
+        await asyncio.sleep(0.05 * (5 - [m["title"] for m in SPEC["modules"]].index(title)))
+        self.in_flight -= 1
+        content = self.answer(title)
+        if isinstance(content, httpx.Response):
+            return content
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        })
+
+
+def _sync_forbidden(request):
+    raise AssertionError("stage used the synchronous client")
+
+
+def test_parse_node_extracts_modules_on_one_event_loop(fake_llm):
+    provider = fake_llm.ahandle = _Loop(_parsed)
+    fake_llm.handle = _sync_forbidden
+
+    update = parse_node(_state(functional_desc=SPEC))
+
+    modules = update["parsed_desc"].modules
+    assert [m.title for m in modules] == ["Login", "Transfer", "Bill Pay", "Loans"]
+    assert [m.workflows[0] for m in modules] == ["Login A", "Transfer A", "Bill Pay A", "Loans A"]
+    assert provider.most == len(SPEC["modules"])
+    assert len(provider.loops) == 1
+
+
+def test_parse_node_fan_out_is_bounded(fake_llm):
+    BaseAgent.configure_concurrency(2)
+    provider = fake_llm.ahandle = _Loop(_parsed)
+
+    update = parse_node(_state(functional_desc=SPEC))
+
+    modules = update["parsed_desc"].modules
+    assert [m.title for m in modules] == ["Login", "Transfer", "Bill Pay", "Loans"]
+    assert provider.most == 2
+
+
+def test_parse_node_isolates_a_failing_module(fake_llm):
+    def answer(title):
+        if title == "Transfer":
+            return httpx.Response(400, json={"error": {"message": "model overloaded"}})
+        return _parsed(title)
+
+    fake_llm.ahandle = _Loop(answer)
+
+    update = parse_node(_state(functional_desc=SPEC))
+
+    modules = update["parsed_desc"].modules
+    assert [m.title for m in modules] == ["Login", "Transfer", "Bill Pay", "Loans"]
+    assert [len(m.workflows) for m in modules] == [2, 0, 2, 2]
+    assert update["degraded_modules"] == {2: "parse"}
+
+
+def test_chunker_node_splits_modules_concurrently(fake_llm):
+    provider = fake_llm.ahandle = _Loop(_split)
+    fake_llm.handle = _sync_forbidden
+    modules = [
+        schemas.ParsedModule(id=m["id"], title=m["title"], raw_description="",
+                             workflows=[f"{m['title']} A", f"{m['title']} B"])
+        for m in SPEC["modules"]
+    ]
+
+    update = chunker_node(_state(parsed_desc=schemas.ParsedFunctionalDescription("Bank", "", "", modules)))
+
+    assert [c.workflow_name for c in update["all_chunks"]] == [
+        f"{m['title']} {w}" for m in SPEC["modules"] for w in "AB"
+    ]
+    assert provider.most == len(SPEC["modules"])
+    assert update["degraded_modules"] == {}
+
+
+def test_stage_loop_closes_the_pooled_clients_it_opened(fake_llm, monkeypatch):
+    # Real pooled clients this time, over a mounted transport
+    monkeypatch.undo()
+    pool = HTTPPool(http2=False)
+    pool.mount("openai", httpx.MockTransport(_Loop(_parsed)))
+    opened = []
+    open_client = pool.async_client
+
+    def track(provider):
+        client = open_client(provider)
+        if client not in opened:
+            opened.append(client)
+        return client
+
+    pool.async_client = track
+    BaseAgent.configure_pool(pool)
+
+    update = parse_node(_state(functional_desc=SPEC))
+
+    assert len(update["parsed_desc"].modules[0].workflows) == 2
+    assert len(opened) == 1
+    assert opened[0].is_closed
+
+
+def test_generation_node_keeps_chunk_order_within_the_limit(fake_llm):
+    BaseAgent.configure_concurrency(3)
+    provider = fake_llm.ahandle = _Loop(_generated)
+    fake_llm.handle = _sync_forbidden
+
+    update = generation_node(_generation_state())
+
+    assert [tc.workflow for tc in update["all_tests"]] == [c.workflow_name for c in _chunks()]
+    assert provider.most == 3
+    assert update["degraded_modules"] == {}
+
+
+def test_generation_node_isolates_a_failing_chunk(fake_llm, capsys):
+    def answer(title):
+        if title == "Bill Pay":
+            return httpx.Response(400, json={"error": {"message": "model overloaded"}})
+        return _generated(title)
+
+    fake_llm.ahandle = _Loop(answer)
+
+    update = generation_node(_generation_state())
+
+    assert [tc.module_title for tc in update["all_tests"]] == [
+        "Login", "Login", "Transfer", "Transfer", "Loans", "Loans"
+    ]
+    assert update["degraded_modules"] == {3: "generation"}
+    assert [entry["id"] for entry in update["manifest"]["modules"]] == [1, 2, 4]
+    out = capsys.readouterr().out
+    assert "Bill Pay / Bill Pay A: FAILED" in out and "Bill Pay / Bill Pay B: FAILED" in out
+
+
+class _Threads:
+    """Sync provider for the parser, chunker and generator, later modules first"""
+
+    answers = {"parser_agent": _parsed, "chunker_agent": _split,
+               "test_generation_agent": _generated}
+    delays = {"Login": 0.15, "Transfer": 0.1, "Bill Pay": 0.05, "Loans": 0.01}
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.most = 0
+        self.done = []
+
+    def __call__(self, body):
+        kind = body["response_format"]["json_schema"]["name"]
+        title = _title(body)
+        with self.lock:
+            self.in_flight += 1
+            self.most = max(self.most, self.in_flight)
+        time.sleep(self.delays[title])
+        with self.lock:
+            self.in_flight -= 1
+            self.done.append((kind, title))
+        if (kind, title) in self.fail:
+            return httpx.Response(400, json={"error": {"message": "model overloaded"}})
+        return self.answers[kind](title), "stop"
+
+
+def test_module_pipeline_keeps_spec_order_within_the_limit(fake_llm):
+    BaseAgent.configure_concurrency(2)
+    provider = fake_llm.default = _Threads()
+
+    update = module_pipeline_node(_state(functional_desc=SPEC))
+
+    titles = [m["title"] for m in SPEC["modules"]]
+    assert [m.title for m in update["parsed_desc"].modules] == titles
+    assert [c.workflow_name for c in update["all_chunks"]] == [c.workflow_name for c in _chunks()]
+    assert [tc.workflow for tc in update["all_tests"]] == [c.workflow_name for c in _chunks()]
+    assert provider.most == 2
+
+
+def test_module_pipeline_generates_each_module_as_soon_as_it_is_split(fake_llm):
+    provider = fake_llm.default = _Threads()
+
+    update = module_pipeline_node(_state(functional_desc=SPEC))
+
+    assert len(update["all_tests"]) == len(_chunks())
+    # The fastest module has its tests before the slowest one is even parsed
+    done = provider.done
+    assert done.index(("test_generation_agent", "Loans")) < done.index(("parser_agent", "Login"))
+
+
+def test_module_pipeline_isolates_failures_to_their_module(fake_llm, capsys):
+    fake_llm.default = _Threads(fail={("chunker_agent", "Transfer"),
+                                      ("test_generation_agent", "Bill Pay")})
+
+    update = module_pipeline_node(_state(functional_desc=SPEC))
+
+    # Transfer falls back to one chunk per parsed workflow; Bill Pay has no tests
+    assert [c.workflow_name for c in update["all_chunks"]] == [c.workflow_name for c in _chunks()]
+    assert [tc.module_title for tc in update["all_tests"]] == [
+        "Login", "Login", "Transfer", "Transfer", "Loans", "Loans"
+    ]
+    assert update["degraded_modules"] == {2: "chunking", 3: "generation"}
+    assert [entry["id"] for entry in update["manifest"]["modules"]] == [1, 4]
+    assert "Bill Pay / Bill Pay A: FAILED" in capsys.readouterr().out
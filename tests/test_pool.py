@@ -0,0 +1,93 @@
+import asyncio
+
+import httpx
+
+from testwright.agents.base import BaseAgent
+from testwright.core import generator as pipeline
+from testwright.llm.pool import HTTPPool
+
+from tests.conftest import EchoAgent
+
+
+def _ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={
+        "choices": [{"message": {"content": "ok"}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    })
+
+
+def _pool() -> HTTPPool:
+    pool = HTTPPool(http2=False)
+    for provider in ("openai", "openrouter"):
+        pool.mount(provider, httpx.MockTransport(_ok))
+    return pool
+
+
+def test_agents_share_one_sync_client_per_provider():
+    pool = _pool()
+    BaseAgent.configure_pool(pool)
+    first, second = EchoAgent(api_key="k"), EchoAgent(api_key="k")
+    other = EchoAgent(api_key="k", provider="openrouter")
+
+    assert first.client is second.client is pool.client("openai")
+    assert other.client is not first.client
+
+    first._complete("a", 0.3, 10)
+    second._complete("b", 0.3, 10)
+    other._complete("c", 0.3, 10)
+    assert pool.stats()["openai"]["requests"] == 2
+    assert pool.stats()["openrouter"]["requests"] == 1
+    pool.close()
+
+
+def test_close_closes_sync_clients_and_the_next_call_reopens():
+    pool = _pool()
+    client = pool.client("openai")
+    pool.close()
+
+    assert client.is_closed
+    fresh = pool.client("openai")
+    assert fresh is not client and not fresh.is_closed
+    assert fresh.post("https://api.openai.com/v1/chat/completions", json={}).status_code == 200
+    # Counters outlive the clients they were collected from
+    assert pool.stats()["openai"]["requests"] == 1
+    pool.close()
+
+
+def test_async_clients_are_shared_per_loop_and_closed_with_it():
+    pool = _pool()
+
+    async def run():
+        client = pool.async_client("openai")
+        assert pool.async_client("openai") is client
+        await client.post("https://api.openai.com/v1/chat/completions", json={})
+        await pool.aclose()
+        return client
+
+    first, second = asyncio.run(run()), asyncio.run(run())
+    assert first is not second
+    assert first.is_closed and second.is_closed
+    assert pool.stats()["openai"]["requests"] == 2
+
+
+def test_aclose_leaves_sync_clients_open():
+    pool = _pool()
+    sync_client = pool.client("openai")
+
+    async def run():
+        client = pool.async_client("openai")
+        await pool.aclose()
+        return client
+
+    assert asyncio.run(run()).is_closed
+    assert not sync_client.is_closed
+    pool.close()
+
+
+def test_generator_installs_its_pool_and_releases_it_on_close():
+    with pipeline.TestCaseGenerator(api_key="test") as generator:
+        assert BaseAgent.get_pool() is generator.pool
+        client = generator.pool.client("openai")
+
+    assert client.is_closed
+    assert BaseAgent._pool is None
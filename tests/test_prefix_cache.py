@@ -0,0 +1,91 @@
+import os
+
+import httpx
+
+from testwright.agents import test_generator
+from testwright.agents.base import BaseAgent
+from testwright.agents.verify_flag import VerificationFlagAgent
+from testwright.agents.verify_ideal import IdealVerificationAgent
+from testwright.core import generator as pipeline
+from testwright.llm.metrics import CallMetrics
+from testwright.models import schemas
+
+SUMMARIES = {
+    1: schemas.ModuleSummary(1, "Transfer", "Moves money.", action_states=["balance"]),
+    2: schemas.ModuleSummary(2, "Accounts", "Lists balances.", can_verify_states=["balance"]),
+}
+
+
+def _shared_prefix(first: str, second: str) -> str:
+    return os.path.commonprefix([first, second])
+
+
+def _chunk(name: str) -> schemas.WorkflowChunk:
+    return schemas.WorkflowChunk(f"1-{name}", 1, "Transfer", name, f"{name} money.",
+                                 related_items=[f"{name} button"], related_rules=[f"{name} rule"])
+
+
+def _test(n: int) -> schemas.TestCase:
+    return schemas.TestCase(f"TC-{n}", f"Transfer {n}", 1, "Transfer", "Send", "positive", "High",
+                            "Logged in", expected_result=f"Balance drops by {n}")
+
+
+def test_generation_prompt_keeps_the_chunk_details_last():
+    agent = test_generator.TestGenerationAgent(api_key="k")
+    send, schedule = agent._build_prompt(_chunk("Send")), agent._build_prompt(_chunk("Schedule"))
+
+    prefix = _shared_prefix(send, schedule)
+    # Everything up to the workflow itself is identical across chunks
+    assert prefix.endswith("WORKFLOW TO TEST:\nModule: Transfer\nWorkflow: S")
+    assert "Send" not in prefix and "Schedule" not in prefix
+    assert len(prefix) > 0.8 * len(send)
+
+
+def test_flag_prompt_shares_instructions_and_modules_across_batches():
+    agent = VerificationFlagAgent(api_key="k")
+    context = agent._build_modules_context(SUMMARIES)
+    batches = [
+        [{"id": f"TC-{n}", "title": f"Transfer {n}", "module": "Transfer", "workflow": "Send",
+          "expected_result": "Done"}]
+        for n in (1, 2)
+    ]
+    first, second = (agent._build_prompt(batch, context) for batch in batches)
+
+    prefix = _shared_prefix(first, second)
+    assert prefix.endswith(f"{context}\n\nTEST CASES TO ANALYZE:\n- TC-")
+    assert prefix.index("RULES:") < prefix.index(context)
+
+
+def test_ideal_prompt_shares_rules_and_modules_across_batches():
+    agent = IdealVerificationAgent(api_key="k")
+    context = agent._build_verification_context(SUMMARIES)
+    first = agent._build_batch_prompt([_test(1), _test(3)], context)
+    second = agent._build_batch_prompt([_test(2)], context)
+
+    prefix = _shared_prefix(first, second)
+    assert prefix.endswith(f"{context}\n\nTEST CASES NEEDING VERIFICATION:\n\nTest ID: TC-")
+    assert prefix.index("CROSS-MODULE VERIFICATION RULE") < prefix.index(context)
+
+
+def test_cached_prompt_tokens_are_reported(fake_llm, agent, capsys):
+    metrics = CallMetrics()
+    BaseAgent.configure_metrics(metrics)
+    for cached in (0, 800):
+        fake_llm.replies.append(lambda body, cached=cached: httpx.Response(200, json={
+            "choices": [{"message": {"content": "ok"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1000, "completion_tokens": 10, "total_tokens": 1010,
+                      "prompt_tokens_details": {"cached_tokens": cached}},
+        }))
+    agent.call_llm("first")
+    agent.call_llm("second")
+
+    assert [record.cached_tokens for record in metrics.records()] == [0, 800]
+    usage = metrics.summary()
+    echo = usage["by_agent"]["Echo Agent"]
+    assert echo["prefix_cache_ratio"] == 0.4
+    assert echo["prefix_cache_savings_usd"] > 0
+
+    output = schemas.TestSuiteOutput("Bank", "", "", schemas.NavigationGraph(),
+                                     summary={"llm_usage": usage})
+    pipeline.TestCaseGenerator._print_summary(output)
+    assert "prefix cache: 40% of prompt tokens" in capsys.readouterr().out
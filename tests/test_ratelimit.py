@@ -0,0 +1,50 @@
+import json
+
+import httpx
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.ratelimit import RateLimiter, TokenBucket
+
+
+def _tokens(limiter: RateLimiter) -> float:
+    _, bucket = limiter._buckets_for("openai", "gpt-4o")
+    return bucket._tokens
+
+
+def test_bucket_goes_into_debt_and_reports_the_wait():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.reserve(60) == 0.0
+    assert 9.9 < bucket.reserve(10) <= 10.0
+
+
+def test_reconcile_refunds_the_unused_estimate():
+    limiter = RateLimiter(tokens_per_minute=600, headroom=1.0)
+    limiter.acquire("openai", "gpt-4o", 500)
+    limiter.reconcile("openai", "gpt-4o", 500, 100)
+    assert 500 <= _tokens(limiter) < 505
+
+
+def test_retried_attempt_is_refunded(fake_llm, agent):
+    limiter = RateLimiter(tokens_per_minute=600, headroom=1.0)
+    BaseAgent.configure_rate_limit(limiter)
+    fake_llm.replies.append(httpx.Response(429, json={"error": "slow down"}))
+    fake_llm.reply("hello")
+
+    assert agent._complete("hi", 0.3, 100) == ("hello", "stop")
+    # Only the successful attempt is charged, at its reported 150 tokens
+    assert 450 <= _tokens(limiter) < 455
+
+
+def test_streamed_call_is_corrected_to_reported_usage(fake_llm, agent):
+    limiter = RateLimiter(tokens_per_minute=600, headroom=1.0)
+    BaseAgent.configure_rate_limit(limiter)
+    events = [
+        {"choices": [{"delta": {"content": "hel"}}]},
+        {"choices": [{"delta": {"content": "lo"}, "finish_reason": "stop"}]},
+        {"choices": [], "usage": {"prompt_tokens": 20, "completion_tokens": 2}},
+    ]
+    body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+    fake_llm.replies.append(httpx.Response(200, text=body, headers={"content-type": "text/event-stream"}))
+
+    assert "".join(agent.stream_llm("hi", 0.3, 400)) == "hello"
+    assert 578 <= _tokens(limiter) < 583
@@ -0,0 +1,66 @@
+import pytest
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.repair import repair_json
+
+
+def test_surrounding_prose_and_fences_are_stripped():
+    repaired = repair_json('Here you go:\n```json\n{"a": [1, 2]}\n```\nHope that helps!')
+    assert repaired.value == {"a": [1, 2]}
+    assert not repaired.truncated
+    assert repaired.changes == ["stripped surrounding text"]
+
+
+def test_trailing_commas_are_dropped():
+    repaired = repair_json('{"a": [1, 2,], "b": {"c": 3,},}')
+    assert repaired.value == {"a": [1, 2], "b": {"c": 3}}
+    assert "removed trailing comma" in repaired.changes
+
+
+def test_truncated_array_keeps_only_complete_items():
+    repaired = repair_json('{"tests": [{"id": 1, "steps": ["a"]}, {"id": 2, "steps": ["b", "c')
+    assert repaired.truncated
+    assert repaired.value == {"tests": [{"id": 1, "steps": ["a"]}]}
+
+
+def test_brackets_inside_strings_are_not_structure():
+    repaired = repair_json('{"text": "a } and ] and \\" quote", "more": [1')
+    assert repaired.value == {"text": 'a } and ] and " quote', "more": []}
+
+
+def test_truncated_member_of_an_object_is_dropped():
+    repaired = repair_json('{"a": 1, "b": tru')
+    assert repaired.truncated
+    assert repaired.value == {"a": 1}
+
+
+def test_nothing_recoverable():
+    assert repair_json("no json here") is None
+    assert repair_json('{"a": }') is None
+
+
+def test_malformed_response_is_repaired_without_a_reask(fake_llm, agent):
+    fake_llm.reply('Sure! {"name": "login", "steps": ["open", "submit",],}')
+    assert agent.call_llm_json("describe") == {"name": "login", "steps": ["open", "submit"]}
+    assert len(fake_llm.requests) == 1
+    assert BaseAgent._structured_stats.to_dict()["repaired_locally"] == 1
+
+
+def test_truncated_response_needs_accept_partial(fake_llm, agent):
+    truncated = '{"tests": [{"id": 1}, {"id": 2}, {"id'
+    fake_llm.reply(truncated, "length")
+    fake_llm.reply('{"tests": [{"id": 1}]}')
+    assert agent.call_llm_json("list") == {"tests": [{"id": 1}]}
+    assert len(fake_llm.requests) == 2
+
+    fake_llm.reply(truncated, "length")
+    result = agent.call_llm_json("list again", accept_partial=lambda partial: len(partial["tests"]) >= 2)
+    assert result == {"tests": [{"id": 1}, {"id": 2}]}
+    assert len(fake_llm.requests) == 3
+
+
+def test_unrepairable_response_fails_after_the_reasks(fake_llm, agent):
+    fake_llm.default = lambda body: ("I cannot answer that.", "stop")
+    with pytest.raises(Exception, match="after 3 attempts"):
+        agent.call_llm_json("describe", max_retries=2)
+    assert len(fake_llm.requests) == 3
@@ -0,0 +1,196 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.debuglog import DebugLogger
+from testwright.llm.pool import HTTPPool
+from testwright.llm.replay import ReplayTransport, SessionRecorder, load_recordings
+from testwright.llm.retry import LLMAPIError, RetryPolicy
+from testwright.llm.singleflight import SingleFlight
+
+from tests.conftest import EchoAgent
+
+
+class Planner(EchoAgent):
+    @property
+    def name(self) -> str:
+        return "Planner"
+
+    @property
+    def system_prompt(self) -> str:
+        return "You plan."
+
+
+class Reviewer(EchoAgent):
+    @property
+    def name(self) -> str:
+        return "Reviewer"
+
+    @property
+    def system_prompt(self) -> str:
+        return "You review."
+
+
+class RevisedReviewer(Reviewer):
+    @property
+    def system_prompt(self) -> str:
+        return "You review, carefully."
+
+
+class _Mounted(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """One transport object serving both client flavours, as HTTPPool.mount expects"""
+
+    def __init__(self, sync: httpx.BaseTransport, async_: httpx.AsyncBaseTransport):
+        self.sync = sync
+        self.async_ = async_
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self.sync.handle_request(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self.async_.handle_async_request(request)
+
+
+def _provider(request: httpx.Request) -> httpx.Response:
+    """Answers every prompt with "<system> -> <user>", streamed when asked"""
+    body = json.loads(request.content)
+    system, user = (message["content"] for message in body["messages"])
+    content = f"{system} -> {user}"
+    usage = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+    if body.get("stream"):
+        parts = (content[:5], content[5:])
+        events = [{"choices": [{"delta": {"content": part}}]} for part in parts]
+        events.append({"choices": [{"delta": {}, "finish_reason": "stop"}]})
+        events.append({"choices": [], "usage": usage})
+        text = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        return httpx.Response(200, text=text, headers={"content-type": "text/event-stream"})
+    return httpx.Response(200, json={
+        "choices": [{"message": {"content": content}, "finish_reason": "stop"}],
+        "usage": usage,
+    })
+
+
+@pytest.fixture(autouse=True)
+def offline():
+    BaseAgent.configure_retry(RetryPolicy(max_retries=0, base_delay=0.0))
+    BaseAgent.configure_single_flight(SingleFlight())
+    BaseAgent.configure_cache(None)
+    BaseAgent.configure_rate_limit(None)
+    BaseAgent.configure_metrics(None)
+    BaseAgent.configure_hedging(None)
+    BaseAgent.configure_batch(None)
+    BaseAgent.configure_output_budget(None)
+
+
+def _use(transport, provider: str) -> HTTPPool:
+    pool = HTTPPool(http2=False)
+    pool.mount(provider, transport)
+    BaseAgent.configure_pool(pool)
+    return pool
+
+
+def _record(path) -> str:
+    """Record a small two-agent session, sync, async and streamed"""
+    recorder = SessionRecorder(str(path))
+    backend = httpx.MockTransport(_provider)
+    pool = _use(_Mounted(recorder.wrap(backend), recorder.wrap_async(backend)), "openai")
+    planner, reviewer = Planner(api_key="k"), Reviewer(api_key="k")
+
+    planner._complete("modules", 0.3, 100)
+    planner._complete("summary", 0.3, 100)
+    reviewer._complete("modules", 0.3, 100)
+    assert asyncio.run(reviewer._acomplete("verdict", 0.3, 100))[0] == "You review. -> verdict"
+    assert "".join(planner.stream_llm("stream me")) == "You plan. -> stream me"
+    pool.close()
+    return str(path)
+
+
+def _replay(path, **kwargs) -> ReplayTransport:
+    replay = ReplayTransport.from_file(path, **kwargs)
+    _use(replay, "replay")
+    return replay
+
+
+def test_recording_normalizes_plain_and_streamed_calls(tmp_path):
+    recordings = load_recordings(_record(tmp_path / "session.jsonl"))
+    assert [(entry["system"], entry["user"]) for entry in recordings] == [
+        ("You plan.", "modules"),
+        ("You plan.", "summary"),
+        ("You review.", "modules"),
+        ("You review.", "verdict"),
+        ("You plan.", "stream me"),
+    ]
+    streamed = recordings[-1]
+    assert streamed["content"] == "You plan. -> stream me"
+    assert streamed["finish_reason"] == "stop"
+    assert streamed["usage"]["total_tokens"] == 15
+
+
+def test_replay_answers_each_call_with_its_own_recording(tmp_path):
+    replay = _replay(_record(tmp_path / "session.jsonl"))
+    planner = Planner(api_key="k", provider="replay")
+    reviewer = Reviewer(api_key="k", provider="replay")
+
+    # Out of recorded order, and one prompt shared by both agents
+    assert "".join(planner.stream_llm("stream me")) == "You plan. -> stream me"
+    assert reviewer._complete("modules", 0.3, 100) == ("You review. -> modules", "stop")
+    assert asyncio.run(reviewer._acomplete("verdict", 0.3, 100))[0] == "You review. -> verdict"
+    assert planner._complete("summary", 0.3, 100) == ("You plan. -> summary", "stop")
+    assert planner._complete("modules", 0.3, 100) == ("You plan. -> modules", "stop")
+    # A repeated request still resolves to its last recording
+    assert planner._complete("modules", 0.3, 100) == ("You plan. -> modules", "stop")
+    assert replay.stats.to_dict() == {"exact": 6, "fallback": 0, "missed": 0}
+
+
+def test_changed_prompts_fall_back_to_the_user_prompt_then_the_agent(tmp_path):
+    replay = _replay(_record(tmp_path / "session.jsonl"))
+
+    revised = RevisedReviewer(api_key="k", provider="replay")
+    assert revised._complete("verdict", 0.3, 100) == ("You review. -> verdict", "stop")
+
+    planner = Planner(api_key="k", provider="replay")
+    answers = [planner._complete(f"{prompt} (edited)", 0.3, 100)[0] for prompt in ("a", "b", "c")]
+    assert answers == ["You plan. -> modules", "You plan. -> summary", "You plan. -> stream me"]
+    assert replay.stats.to_dict() == {"exact": 1, "fallback": 3, "missed": 0}
+
+
+def test_unmatched_request_is_a_404(tmp_path):
+    replay = _replay(_record(tmp_path / "session.jsonl"))
+
+    class Stranger(EchoAgent):
+        system_prompt = "Never recorded."
+
+    with pytest.raises(LLMAPIError) as error:
+        Stranger(api_key="k", provider="replay")._complete("anything", 0.3, 100)
+    assert error.value.status_code == 404
+    assert replay.stats.to_dict()["missed"] == 1
+
+
+@pytest.mark.parametrize("structured", [True, False])
+def test_debug_log_is_replayable(tmp_path, structured):
+    path = tmp_path / ("debug.jsonl" if structured else "debug.txt")
+    BaseAgent.reset_debug_state()
+    logger = DebugLogger(str(path)) if structured else None
+    BaseAgent.configure_debug_log(logger)
+    _use(httpx.MockTransport(_provider), "openai")
+    planner = Planner(api_key="k", debug=True, debug_file=str(path))
+    reviewer = Reviewer(api_key="k", debug=True, debug_file=str(path))
+    BaseAgent.init_debug_session(str(path), "gpt-4o")
+    for agent, prompt in ((planner, "modules"), (reviewer, "modules"), (planner, "summary")):
+        agent._complete(prompt, 0.3, 100)
+    if logger is not None:
+        logger.close()
+
+    recordings = load_recordings(str(path))
+    assert [(e["agent"], e["system"], e["user"], e["content"]) for e in recordings] == [
+        ("Planner", "You plan.", "modules", "You plan. -> modules"),
+        ("Reviewer", "You review.", "modules", "You review. -> modules"),
+        ("Planner", "You plan.", "summary", "You plan. -> summary"),
+    ]
+
+    _replay(str(path))
+    reviewer = Reviewer(api_key="k", provider="replay")
+    assert reviewer._complete("modules", 0.3, 100)[0] == "You review. -> modules"
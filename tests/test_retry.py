@@ -0,0 +1,171 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.retry import CircuitBreaker, CircuitOpenError, LLMAPIError, RetryPolicy, RetryStats
+
+
+def test_backoff_doubles_up_to_the_cap():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(4)] == [1.0, 2.0, 4.0, 5.0]
+
+
+def test_jittered_backoff_never_undercuts_retry_after():
+    policy = RetryPolicy(base_delay=1.0, max_delay=10.0)
+    for attempt in range(5):
+        assert 3.0 <= policy.backoff(attempt, retry_after=3.0) <= 10.0
+    assert policy.backoff(0, retry_after=600.0) == 10.0
+
+
+def test_retry_after_headers():
+    def parse(headers):
+        return RetryPolicy.retry_after(httpx.Response(429, headers=headers))
+
+    assert parse({"retry-after-ms": "1500"}) == 1.5
+    assert parse({"retry-after": "7"}) == 7.0
+    date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25.0 < parse({"retry-after": date}) <= 30.0
+    assert parse({"retry-after": "soon"}) is None
+    assert parse({}) is None
+
+
+def test_only_transient_statuses_are_retried():
+    policy = RetryPolicy()
+    assert all(policy.is_retryable(code) for code in (408, 429, 500, 503))
+    assert not any(policy.is_retryable(code) for code in (200, 400, 401, 404))
+
+
+def test_breaker_opens_then_lets_one_probe_through():
+    stats = RetryStats()
+    breaker = CircuitBreaker("openai", failure_threshold=2, recovery_timeout=0.05, stats=stats)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert stats.circuit_trips == 1
+    assert stats.circuit_rejections == 2
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker("openai", failure_threshold=1, recovery_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_transient_errors_are_retried_until_success(fake_llm, agent):
+    fake_llm.replies.append(httpx.Response(503, text="busy"))
+    fake_llm.replies.append(httpx.Response(429, text="slow down", headers={"retry-after": "0"}))
+    fake_llm.reply("hello")
+
+    assert agent._complete("hi", 0.3, 100) == ("hello", "stop")
+    assert len(fake_llm.requests) == 3
+    assert BaseAgent._retry_policy.stats.retries == 2
+
+
+def test_connection_errors_are_retried(fake_llm, agent):
+    def refuse(body):
+        raise httpx.ConnectError("connection refused")
+
+    fake_llm.replies.append(refuse)
+    fake_llm.reply("hello")
+    assert agent._complete("hi", 0.3, 100) == ("hello", "stop")
+    assert len(fake_llm.requests) == 2
+
+
+def test_client_errors_and_exhausted_retries_raise(fake_llm, agent):
+    fake_llm.replies.append(httpx.Response(400, text="bad request"))
+    with pytest.raises(LLMAPIError) as error:
+        agent._complete("hi", 0.3, 100)
+    assert error.value.status_code == 400
+    assert len(fake_llm.requests) == 1
+
+    fake_llm.default = lambda body: httpx.Response(500, text="down")
+    with pytest.raises(LLMAPIError):
+        agent._complete("hi again", 0.3, 100)
+    assert len(fake_llm.requests) == 1 + 4
+    assert BaseAgent._retry_policy.stats.gave_up == 1
+
+
+def test_open_breaker_sheds_calls_without_a_request(fake_llm, agent):
+    BaseAgent.configure_retry(RetryPolicy(max_retries=0, base_delay=0.0), failure_threshold=1)
+    fake_llm.replies.append(httpx.Response(500, text="down"))
+    with pytest.raises(LLMAPIError):
+        agent._complete("hi", 0.3, 100)
+
+    with pytest.raises(CircuitOpenError):
+        agent._complete("hi again", 0.3, 100)
+    assert len(fake_llm.requests) == 1
+
+
+class _Interrupted(BaseException):
+    """Stands in for KeyboardInterrupt without upsetting pytest"""
+
+
+def _open_breaker(fake_llm, agent) -> CircuitBreaker:
+    BaseAgent.configure_retry(RetryPolicy(max_retries=0, base_delay=0.0), failure_threshold=1,
+                              recovery_timeout=0.0)
+    fake_llm.replies.append(httpx.Response(500, text="down"))
+    with pytest.raises(LLMAPIError):
+        agent._complete("hi", 0.3, 100)
+    breaker = BaseAgent._breakers.get(agent.provider)
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_cancelled_half_open_probe_frees_the_breaker(fake_llm, agent):
+    breaker = _open_breaker(fake_llm, agent)
+
+    async def cancel_the_probe():
+        started = asyncio.Event()
+
+        async def stall(request):
+            started.set()
+            await asyncio.sleep(10)
+
+        fake_llm.ahandle = stall
+        probe = asyncio.ensure_future(agent._acomplete("probe", 0.3, 100))
+        await started.wait()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(cancel_the_probe())
+    del fake_llm.ahandle
+
+    assert agent._complete("after", 0.3, 100) == ("{}", "stop")
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_interrupted_half_open_probe_frees_the_breaker(fake_llm, agent):
+    breaker = _open_breaker(fake_llm, agent)
+
+    def interrupt(body):
+        raise _Interrupted()
+
+    fake_llm.replies.append(interrupt)
+    with pytest.raises(_Interrupted):
+        agent._complete("probe", 0.3, 100)
+
+    assert agent._complete("after", 0.3, 100) == ("{}", "stop")
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.retry import LLMAPIError, RetryPolicy
+from testwright.llm.singleflight import SingleFlight
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def _gated(release: threading.Event, reply):
+    def answer(body):
+        release.wait(5)
+        return reply
+
+    return answer
+
+
+def test_first_caller_leads_and_later_ones_share_the_flight():
+    flights = SingleFlight()
+    flight, leader = flights.join("k")
+    follower, follower_leads = flights.join("k")
+    assert leader and not follower_leads and follower is flight
+
+    flights.finish("k", flight, result="done")
+    assert follower.result() == "done"
+    assert flights.join("k")[1]
+    assert flights.stats() == {"leaders": 2, "coalesced": 1, "in_flight": 1}
+
+
+def test_identical_concurrent_requests_share_one_call(fake_llm, agent):
+    release = threading.Event()
+    fake_llm.replies.append(_gated(release, ("hello", "stop")))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(agent._complete, "hi", 0.3, 100) for _ in range(4)]
+        _wait_for(lambda: BaseAgent._single_flight.stats()["coalesced"] == 3)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == [("hello", "stop")] * 4
+    assert len(fake_llm.requests) == 1
+    assert BaseAgent._single_flight.stats()["in_flight"] == 0
+
+
+def test_different_requests_are_not_coalesced(fake_llm, agent):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(lambda prompt: agent._complete(prompt, 0.3, 100), ["a", "b"]))
+    assert len(fake_llm.requests) == 2
+    assert BaseAgent._single_flight.stats()["coalesced"] == 0
+
+
+def test_leader_failure_reaches_every_follower(fake_llm, agent):
+    BaseAgent.configure_retry(RetryPolicy(max_retries=0, base_delay=0.0))
+    release = threading.Event()
+    fake_llm.replies.append(_gated(release, httpx.Response(400, text="bad request")))
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(agent._complete, "hi", 0.3, 100) for _ in range(3)]
+        _wait_for(lambda: BaseAgent._single_flight.stats()["coalesced"] == 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(LLMAPIError):
+                future.result()
+
+    assert len(fake_llm.requests) == 1
+    # The failed flight is gone, so the next identical call goes out again
+    assert agent._complete("hi", 0.3, 100) == ("{}", "stop")
+    assert len(fake_llm.requests) == 2
+
+
+def test_event_loop_joins_a_thread_flight(fake_llm, agent):
+    release = threading.Event()
+    fake_llm.replies.append(_gated(release, ("hello", "stop")))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        leader = executor.submit(agent._complete, "hi", 0.3, 100)
+        _wait_for(lambda: BaseAgent._single_flight.stats()["in_flight"] == 1)
+
+        async def follow():
+            follower = asyncio.ensure_future(agent._acomplete("hi", 0.3, 100))
+            while BaseAgent._single_flight.stats()["coalesced"] < 1:
+                await asyncio.sleep(0.005)
+            release.set()
+            return await follower
+
+        assert asyncio.run(follow()) == ("hello", "stop")
+        assert leader.result() == ("hello", "stop")
+
+    assert len(fake_llm.requests) == 1
+
+
+def test_cancelled_follower_leaves_the_flight_to_the_others(fake_llm, agent):
+    async def scenario():
+        release = asyncio.Event()
+
+        async def gated(request):
+            await release.wait()
+            return fake_llm.handle(request)
+
+        fake_llm.ahandle = gated
+        calls = [asyncio.ensure_future(agent._acomplete("hi", 0.3, 100)) for _ in range(3)]
+        while BaseAgent._single_flight.stats()["coalesced"] < 2:
+            await asyncio.sleep(0.005)
+        calls[1].cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    fake_llm.reply("hello")
+    leader, cancelled, follower = asyncio.run(scenario())
+    assert leader == follower == ("hello", "stop")
+    assert isinstance(cancelled, asyncio.CancelledError)
+    assert len(fake_llm.requests) == 1
+
+
+def test_follower_takes_over_from_a_cancelled_leader(fake_llm, agent):
+    async def scenario():
+        release = asyncio.Event()
+
+        async def gated(request):
+            await release.wait()
+            return fake_llm.handle(request)
+
+        fake_llm.ahandle = gated
+        leader = asyncio.ensure_future(agent._acomplete("hi", 0.3, 100))
+        follower = asyncio.ensure_future(agent._acomplete("hi", 0.3, 100))
+        while BaseAgent._single_flight.stats()["coalesced"] < 1:
+            await asyncio.sleep(0.005)
+        leader.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    fake_llm.reply("hello")
+    assert asyncio.run(scenario()) == ("hello", "stop")
+    assert BaseAgent._single_flight.stats() == {"leaders": 2, "coalesced": 1, "in_flight": 0}
+
+
+def test_finishing_a_completed_flight_is_harmless():
+    flights = SingleFlight()
+    flight, _ = flights.join("k")
+    assert not flight.cancel()
+    flights.finish("k", flight, result="done")
+    flights.finish("k", flight, error=RuntimeError("late"))
+    assert flight.result() == "done"
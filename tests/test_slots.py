@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.slots import CallSlots
+
+
+class _Chunks(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Body read lazily, one server-sent event at a time, like a network stream"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __iter__(self):
+        yield from self.chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def _stream_reply(text: str) -> httpx.Response:
+    events = [{"choices": [{"delta": {"content": part}}]} for part in text.split()]
+    events.append({"choices": [{"delta": {}, "finish_reason": "stop"}]})
+    chunks = [f"data: {json.dumps(event)}\n\n".encode() for event in events] + [b"data: [DONE]\n\n"]
+    return httpx.Response(200, stream=_Chunks(chunks), headers={"content-type": "text/event-stream"})
+
+
+def test_waiters_are_served_in_order():
+    slots = CallSlots(1)
+    slots.acquire()
+    served = []
+
+    def worker(n):
+        with slots:
+            served.append(n)
+
+    threads = []
+    for n in range(3):
+        thread = threading.Thread(target=worker, args=(n,))
+        thread.start()
+        threads.append(thread)
+        while len(slots._waiters) <= n:
+            time.sleep(0.001)
+    slots.release()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert served == [0, 1, 2]
+    assert slots.in_use() == 0
+
+
+def test_cancelled_async_waiter_does_not_keep_a_slot():
+    async def scenario():
+        slots = CallSlots(1)
+        await slots.aacquire()
+        waiter = asyncio.ensure_future(slots.aacquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        slots.release()
+        assert slots.in_use() == 0
+        await asyncio.wait_for(slots.aacquire(), timeout=1)
+
+    asyncio.run(scenario())
+
+
+def test_async_waiters_share_the_cap_with_threads():
+    slots = CallSlots(1)
+    slots.acquire()
+
+    async def scenario():
+        task = asyncio.ensure_future(slots.aacquire())
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        threading.Timer(0.05, slots.release).start()
+        await asyncio.wait_for(task, timeout=1)
+
+    asyncio.run(scenario())
+    assert slots.in_use() == 1
+
+
+def test_stream_holds_its_slot_until_the_body_is_read(fake_llm, agent):
+    BaseAgent.configure_call_slots(1)
+    fake_llm.replies.append(_stream_reply("hello there"))
+
+    stream = agent.stream_llm("hi", 0.3, 100)
+    assert next(stream) == "hello"
+    assert BaseAgent._call_slots.in_use() == 1
+    assert "".join(stream) == "there"
+    assert BaseAgent._call_slots.in_use() == 0
+
+    assert agent._complete("hi again", 0.3, 100) == ("{}", "stop")
+    assert BaseAgent._call_slots.in_use() == 0
+
+
+def test_async_stream_holds_its_slot_until_the_body_is_read(fake_llm, agent):
+    BaseAgent.configure_call_slots(1)
+    fake_llm.replies.append(_stream_reply("hello there"))
+
+    async def scenario():
+        stream = agent.astream_llm("hi", 0.3, 100)
+        assert await stream.__anext__() == "hello"
+        assert BaseAgent._call_slots.in_use() == 1
+        rest = [delta async for delta in stream]
+        assert rest == ["there"]
+        assert BaseAgent._call_slots.in_use() == 0
+
+    asyncio.run(scenario())
+
+
+def test_abandoned_stream_releases_its_slot(fake_llm, agent):
+    BaseAgent.configure_call_slots(1)
+    fake_llm.replies.append(_stream_reply("hello there"))
+
+    stream = agent.stream_llm("hi", 0.3, 100)
+    next(stream)
+    stream.close()
+    assert BaseAgent._call_slots.in_use() == 0
@@ -0,0 +1,161 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.metrics import CallMetrics
+from testwright.llm.retry import LLMAPIError
+from testwright.llm.streaming import (
+    JSONArrayStreamParser,
+    aiter_sse_events,
+    event_delta,
+    event_finish_reason,
+    iter_sse_events,
+)
+
+
+class _Chunks(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Body read lazily, one network chunk at a time"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __iter__(self):
+        yield from self.chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def _sse(lines, chunk_size=7) -> httpx.Response:
+    """Event stream whose bytes arrive in ``chunk_size`` pieces, splitting lines and events"""
+    body = "".join(line + "\n\n" for line in lines).encode()
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    return httpx.Response(200, stream=_Chunks(chunks), headers={"content-type": "text/event-stream"})
+
+
+def _data(event) -> str:
+    return f"data: {json.dumps(event)}"
+
+
+def _delta(text: str) -> str:
+    return _data({"choices": [{"index": 0, "delta": {"content": text}}]})
+
+
+USAGE = {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15}
+
+STREAM = [
+    ": keep-alive",
+    _data({"choices": [{"index": 0, "delta": {"role": "assistant"}}]}),
+    _delta("Hel"),
+    "data: {not json",
+    "event: ping",
+    _delta("lo "),
+    _delta("world"),
+    _data({"choices": [{"index": 0, "delta": {}, "finish_reason": "length"}]}),
+    _data({"choices": [], "usage": USAGE}),
+    "data: [DONE]",
+    _delta("after the end"),
+]
+
+
+def test_sse_events_skip_noise_and_stop_at_done():
+    events = list(iter_sse_events(line for chunk in STREAM for line in (chunk, "")))
+    assert [event_delta(event) for event in events] == ["", "Hel", "lo ", "world", "", ""]
+    assert [event_finish_reason(event) for event in events] == [None] * 4 + ["length", None]
+    assert events[-1]["usage"] == USAGE
+
+
+def test_async_sse_events_stop_at_done():
+    async def lines():
+        for line in STREAM:
+            yield line
+
+    async def collect():
+        return [event_delta(event) async for event in aiter_sse_events(lines())]
+
+    assert asyncio.run(collect()) == ["", "Hel", "lo ", "world", "", ""]
+
+
+def test_sse_data_without_a_space_is_still_data():
+    assert list(iter_sse_events(['data:{"choices": []}', "data:[DONE]", "data: {}"])) == [{"choices": []}]
+
+
+def test_array_parser_yields_items_as_they_close():
+    document = ('{"title": "x", "test_cases": [{"id": 1, "name": "has } and ]"}, '
+                '{"id": 2, "steps": [1, 2]}]}')
+    parser = JSONArrayStreamParser("test_cases")
+    items = []
+    for i in range(0, len(document), 5):
+        items.extend(parser.feed(document[i:i + 5]))
+        if len(items) == 1:
+            assert not parser.done
+    assert items == [{"id": 1, "name": "has } and ]"}, {"id": 2, "steps": [1, 2]}]
+    assert parser.done
+    assert parser.text == document
+
+
+def test_array_parser_ignores_other_arrays():
+    parser = JSONArrayStreamParser("items")
+    assert parser.feed('{"other": [{"id": 0}], "items": [{"id": 1') == []
+    assert parser.feed("}]}") == [{"id": 1}]
+    assert parser.done
+
+
+def test_stream_llm_records_finish_reason_and_trailing_usage(fake_llm, agent):
+    metrics = CallMetrics()
+    BaseAgent.configure_metrics(metrics)
+    fake_llm.replies.append(lambda body: _sse(STREAM))
+
+    assert list(agent.stream_llm("hi")) == ["Hel", "lo ", "world"]
+    request = fake_llm.requests[0]
+    assert request["stream"] is True
+    assert request["stream_options"] == {"include_usage": True}
+
+    record, = metrics.records()
+    assert record.streamed and record.status == "ok"
+    assert record.finish_reason == "length"
+    assert (record.prompt_tokens, record.completion_tokens) == (12, 3)
+
+
+def test_astream_llm_reads_split_chunks_and_stops_at_done(fake_llm, agent):
+    metrics = CallMetrics()
+    BaseAgent.configure_metrics(metrics)
+    fake_llm.replies.append(lambda body: _sse(STREAM, chunk_size=3))
+
+    async def collect():
+        return [delta async for delta in agent.astream_llm("hi")]
+
+    assert asyncio.run(collect()) == ["Hel", "lo ", "world"]
+    record, = metrics.records()
+    assert record.finish_reason == "length"
+    assert record.completion_tokens == 3
+
+
+def test_streamed_items_arrive_from_split_deltas(fake_llm, agent):
+    document = '{"test_cases": [{"id": 1}, {"id": 2}]}'
+    deltas = [_delta(document[i:i + 4]) for i in range(0, len(document), 4)]
+    fake_llm.replies.append(lambda body: _sse(deltas + ["data: [DONE]"]))
+    assert list(agent.stream_llm_json_items("list", "test_cases")) == [{"id": 1}, {"id": 2}]
+
+
+def test_streamed_request_is_retried_then_fails_on_a_client_error(fake_llm, agent):
+    fake_llm.replies.append(httpx.Response(503, text="busy"))
+    fake_llm.replies.append(lambda body: _sse([_delta("ok"), "data: [DONE]"]))
+    assert list(agent.stream_llm("hi")) == ["ok"]
+    assert len(fake_llm.requests) == 2
+
+    fake_llm.replies.append(httpx.Response(400, text="bad request"))
+    with pytest.raises(LLMAPIError):
+        list(agent.stream_llm("hi again"))
+
+    fake_llm.replies.append(httpx.Response(400, text="bad request"))
+
+    async def collect():
+        return [delta async for delta in agent.astream_llm("hi async")]
+
+    with pytest.raises(LLMAPIError):
+        asyncio.run(collect())
@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from testwright.agents.base import BaseAgent
+from testwright.llm.retry import LLMAPIError
+from testwright.llm.structured import StructuredOutputStats, STRING_LIST, object_schema
+
+from tests.conftest import EchoAgent
+
+JSON_SUFFIX = "IMPORTANT: Return your response as valid JSON only."
+
+
+class ListAgent(EchoAgent):
+    @property
+    def name(self) -> str:
+        return "List Agent"
+
+    @property
+    def output_schema(self) -> dict:
+        return object_schema({"items": STRING_LIST})
+
+
+def _rejected(body):
+    message = "response_format json_schema is not supported"
+    return httpx.Response(400, json={"error": {"message": message}})
+
+
+@pytest.fixture
+def lister(fake_llm) -> ListAgent:
+    return ListAgent(api_key="test")
+
+
+def test_declared_schema_is_sent_as_json_schema(fake_llm, lister):
+    fake_llm.reply('{"items": ["a", "b"]}')
+
+    assert lister.call_llm_json("List things.") == {"items": ["a", "b"]}
+
+    (body,) = fake_llm.requests
+    assert body["response_format"] == {
+        "type": "json_schema",
+        "json_schema": {"name": "list_agent", "schema": lister.output_schema, "strict": True},
+    }
+    # The provider enforces the shape, so the prompt carries no JSON-only suffix
+    assert body["messages"][-1]["content"] == "List things."
+    stats = BaseAgent._structured_stats.to_dict()
+    assert stats["structured_calls"] == stats["structured_first_try"] == 1
+    assert stats["legacy_calls"] == 0
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_rejected_response_format_falls_back_to_prompt_json(fake_llm, lister, use_async):
+    fake_llm.replies.append(_rejected)
+    fake_llm.reply('{"items": ["a"]}')
+    fake_llm.reply('{"items": ["b"]}')
+
+    def call(prompt):
+        if use_async:
+            return asyncio.run(lister.acall_llm_json(prompt))
+        return lister.call_llm_json(prompt)
+
+    assert call("First.") == {"items": ["a"]}
+    # The rejection is remembered: the next call goes straight to prompt JSON
+    assert call("Second.") == {"items": ["b"]}
+
+    rejected, first, second = fake_llm.requests
+    assert "response_format" in rejected
+    for body, prompt in ((first, "First."), (second, "Second.")):
+        assert "response_format" not in body
+        assert body["messages"][-1]["content"].startswith(f"{prompt}\n\n{JSON_SUFFIX}")
+    stats = BaseAgent._structured_stats.to_dict()
+    assert (stats["unsupported_fallbacks"], stats["legacy_calls"]) == (1, 2)
+    assert not BaseAgent._structured_stats.supports("openai", "gpt-4o")
+
+
+def test_other_client_errors_are_not_mistaken_for_unsupported(fake_llm, lister):
+    fake_llm.replies.append(
+        lambda body: httpx.Response(400, json={"error": {"message": "max_tokens too large"}})
+    )
+
+    with pytest.raises(LLMAPIError):
+        lister.call_llm_json("List things.")
+    assert BaseAgent._structured_stats.supports("openai", "gpt-4o")
+    assert len(fake_llm.requests) == 1
+
+
+def test_disabled_structured_output_uses_prompt_json(fake_llm, lister):
+    BaseAgent.configure_structured_output(StructuredOutputStats(), enabled=False)
+    fake_llm.reply('{"items": []}')
+
+    assert lister.call_llm_json("List things.") == {"items": []}
+    (body,) = fake_llm.requests
+    assert "response_format" not in body
+    assert JSON_SUFFIX in body["messages"][-1]["content"]
+
+
+def test_unparseable_structured_reply_is_reasked_with_prompt_json(fake_llm, lister):
+    fake_llm.reply("I cannot answer that.")
+    fake_llm.reply(json.dumps({"items": ["c"]}))
+
+    assert lister.call_llm_json("List things.") == {"items": ["c"]}
+    assert ["response_format" in body for body in fake_llm.requests] == [True, False]
+    stats = BaseAgent._structured_stats.to_dict()
+    assert (stats["structured_fallbacks"], stats["legacy_calls"]) == (1, 1)
+    # A bad reply is not a rejected parameter
+    assert BaseAgent._structured_stats.supports("openai", "gpt-4o")
@@ -0,0 +1,71 @@
+import json
+
+import httpx
+
+from testwright.agents.verify_flag import VerificationFlagAgent
+from testwright.models import schemas
+
+
+def _test(test_id: str, test_type: str = "positive", step: str = "Click Save") -> schemas.TestCase:
+    return schemas.TestCase(
+        id=test_id, title=test_id, module_id=1, module_title="Accounts", workflow="Edit",
+        test_type=test_type, priority="High", preconditions="", steps=[step],
+        expected_result="Record is saved",
+    )
+
+
+def _mixed():
+    tests = [
+        _test("TC-1"),
+        _test("TC-2", test_type="negative"),
+        _test("TC-3"),
+        _test("TC-4", step="Verify the table is displayed"),
+    ]
+    tests[3].expected_result = "Table is displayed"
+    return tests
+
+
+def _one_per_batch(agent, monkeypatch):
+    monkeypatch.setattr(agent, "_plan_batches",
+                        lambda items, render, fixed: [[item] for item in items])
+
+
+def test_flagged_tests_are_grouped_when_a_batch_fails(fake_llm, monkeypatch):
+    agent = VerificationFlagAgent(api_key="test")
+    _one_per_batch(agent, monkeypatch)
+    fake_llm.replies.append(httpx.Response(400, json={"error": "bad request"}))
+    fake_llm.reply(json.dumps({"flagged_tests": [{
+        "test_id": "TC-3", "needs_post_verification": True, "modifies_state": ["balance"],
+        "reason": "",
+    }]}))
+
+    flagged = agent.run(_mixed(), {})
+
+    # Actionable (LLM-flagged), then read-only (pre-filtered), then other types
+    assert [tc.id for tc in flagged] == ["TC-1", "TC-3", "TC-4", "TC-2"]
+    assert [tc.needs_post_verification for tc in flagged] == [False, True, False, False]
+    assert flagged[1].modifies_state == ["balance"]
+    assert agent.degraded == {"TC-1"}
+
+
+def test_tests_are_returned_as_given_when_every_batch_fails(fake_llm, monkeypatch):
+    agent = VerificationFlagAgent(api_key="test")
+    _one_per_batch(agent, monkeypatch)
+    fake_llm.replies.extend([httpx.Response(400, json={"error": "bad request"})] * 2)
+    tests = _mixed()
+
+    flagged = agent.run(tests, {})
+
+    assert flagged == tests
+    assert not any(tc.needs_post_verification for tc in flagged)
+
+
+def test_read_only_positives_come_before_other_types(fake_llm):
+    tests = [_test("TC-1", test_type="negative"),
+             _test("TC-2", step="Verify the table is displayed")]
+    tests[1].expected_result = "Table is displayed"
+
+    flagged = VerificationFlagAgent(api_key="test").run(tests, {})
+
+    assert [tc.id for tc in flagged] == ["TC-2", "TC-1"]
+    assert fake_llm.requests == []
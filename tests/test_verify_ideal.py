@@ -0,0 +1,27 @@
+import asyncio
+
+from testwright.agents.base import BaseAgent
+from testwright.agents.verify_ideal import IdealVerificationAgent
+
+
+def test_arun_keeps_batches_within_concurrency(monkeypatch):
+    BaseAgent.configure_concurrency(2)
+    agent = IdealVerificationAgent(api_key="test")
+    batches = [[f"TC-{i}"] for i in range(6)]
+    in_flight = peak = 0
+
+    async def generate(batch, context):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {batch[0]: []}
+
+    monkeypatch.setattr(agent, "_batches", lambda tests, context: batches)
+    monkeypatch.setattr(agent, "_agenerate_verifications_for_batch", generate)
+
+    result = asyncio.run(agent.arun([], {}))
+
+    assert peak == 2
+    assert list(result) == [f"TC-{i}" for i in range(6)]